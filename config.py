@@ -25,6 +25,14 @@ ST_DATA_DIR = BASE_DIR / "st_data"
 MAPPING_PATH = ST_DATA_DIR / "reason_code_mapping.parquet"
 MODEL_DF_PARQUET = ST_DATA_DIR / "model_df.parquet"
 DEFAULT_SAMPLE_PARQUET = ST_DATA_DIR / "model_df_default.parquet"
+REF_INDEX_PATH = ST_DATA_DIR / "ref_percentile_index.npz"   # 행태 해석 분위 참조 인덱스
+REF_SKETCH_PATH = ST_DATA_DIR / "ref_quantile_sketches.npz"  # 현재 model_df(data_version) 기준 분위 스케치
+REVIEW_TABLE_DIR = ST_DATA_DIR / "review_table"   # data_version별 추가검토 분류 테이블(사이드카 parquet)
+REVIEW_TABLE_KEEP = 4                             # 보관할 사이드카 파일 수(최근 것부터)
+DIST_SUMMARY_DIR = ST_DATA_DIR / "dist_summary"   # data_version별 개요 분포 요약(히스토그램/밴드 수 JSON)
+DIST_SUMMARY_KEEP = 4                             # 보관할 요약 파일 수(최근 것부터)
+DIST_SCORE_BIN_WIDTH = 5                          # 점수 히스토그램 구간 폭 (컷 T_LOW/T_HIGH가 배수가 되도록)
+DIST_PD_BINS = 100                                # PD 히스토그램 구간 수 (0~1 등간격)
 
 # ---------------- Score policy ----------------
 
@@ -45,8 +53,68 @@ T_LOW = 675     # low 컷
 T_HIGH = 720    # high 컷
 TOP_N = 10      # shap값 상위 몇개 사용?
 
-
-
+# 그룹 기여도 산출 방식
+# - False: 저장된 SHAP top10 안에서만 super_group 비중 계산 (기존 방식)
+# - True : 업로드(추론) 시 전체 SHAP 벡터 |SHAP| x (feature→super_group) 행렬곱으로
+#          (n, n_groups) 기여도 테이블을 만들어 점수 옆에 함께 저장
+FULL_SHAP_GROUP_CONTRIB = False
+GROUP_PCT_PREFIX = "grp_pct__"   # model_df에 저장되는 그룹 기여도 컬럼 접두어
+
+# ---------------- KPI 비교 (기존 PD 등급 컷 vs HCIS 듀얼 컷) ----------------
+# 기대 수익 = (1-PD) x r x EAD - 기대 손실,  기대 손실 = PD x LGD x EAD  (TODO.md)
+KPI_RATE_SCENARIOS = [0.08, 0.10, 0.12]   # 이자율 r 시나리오
+KPI_LGD = 0.6
+KPI_DEFAULT_EAD = 5_000_000.0             # amt_credit 등이 없을 때 건당 EAD 가정
+KPI_REVIEW_CONV_RATES = [0.3, 0.5, 0.7]   # 추가검토 구간 승인 전환율 시나리오(전체 고객 대상)
+KPI_CACHE_DIR = ST_DATA_DIR / "kpi_cache"  # data_version + policy_hash 기준 결과 캐시
+
+
+
+
+# ---------------- LLM 응답 캐시 ----------------
+LLM_CACHE_PATH = ST_DATA_DIR / "llm_cache.sqlite"   # 심사 리포트 영구 캐시(SQLite)
+LLM_CACHE_TTL_SEC = 7 * 24 * 3600                   # 7일 지나면 재생성
+LLM_CACHE_MAX_ENTRIES = 20_000                      # 초과 시 오래 안 쓴 항목부터 삭제
+
+# 배치 리포트 생성 (추가검토 대상 일괄 생성)
+LLM_BATCH_WORKERS = 8       # 동시 호출 수(스레드)
+LLM_BATCH_RPM = 60          # 분당 요청 한도(토큰 버킷). 재시도 호출도 포함
+
+# Gemini 클라이언트 풀: 프로세스당 클라이언트 1개(keep-alive 연결 재사용)를 세션/배치가 공유
+LLM_CLIENT_MAX_CONCURRENCY = 8       # 동시에 진행 가능한 generate_content 호출 수
+LLM_CLIENT_TIMEOUT_SEC = 60          # HTTP 요청 타임아웃
+LLM_CLIENT_HEALTH_TTL_SEC = 30       # 헬스체크 결과 재사용 시간
+
+# Gemini 장애 대응: 연속 실패 시 차단(circuit breaker) → 차단 중엔 캐시/대체 리포트 즉시 반환
+LLM_BREAKER_FAILURES = 3             # 연속 실패 N회면 차단
+LLM_BREAKER_RESET_SEC = 60           # 차단 후 N초 지나면 시험 호출 1건 허용
+LLM_RETRY_DEADLINE_SEC = 20          # 재시도 포함 호출 1건 총 대기 상한
+LLM_RETRY_MAX_DELAY_SEC = 8          # 재시도 간격 상한(지터 적용 전)
+LLM_HEDGE_ENABLED = False            # 느린 호출에 두 번째 요청을 겹쳐 보냄(비용 증가)
+LLM_HEDGE_PERCENTILE = 90            # 최근 지연의 p90을 넘기면 hedge
+LLM_HEDGE_MIN_SAMPLES = 20           # 지연 표본이 이보다 적으면 LLM_HEDGE_DEFAULT_SEC 사용
+LLM_HEDGE_DEFAULT_SEC = 8.0
+
+# LLM 입력 압축: 중복 구조(top_reasons/top_reasons_public/alias) 제거 + 실수 반올림 + 토큰 예산
+LLM_PAYLOAD_COMPACT = True
+LLM_PAYLOAD_TOKEN_BUDGET = 900       # 고객 1명 payload 입력 토큰 상한(추정치). 0이면 제한 없음
+
+# 다건 묶음 요청(packed): 한 요청에 여러 고객 payload → 응답 리스트를 고객별 캐시로 분할
+LLM_PACK_INPUT_TOKENS = 30_000       # 요청 1건 입력 토큰 예산(시스템 지시문 포함, 추정치)
+LLM_PACK_MAX_OUTPUT_TOKENS = 16_000  # 요청 1건 출력 토큰 상한
+LLM_PACK_MAX_CASES = 12              # 요청 1건 최대 고객 수
+
+# 대출 심사 화면: 다음 추가검토 고객 리포트 백그라운드 선생성
+LLM_PREFETCH_K = 3          # 현재 고객 다음 몇 명까지
+LLM_PREFETCH_WORKERS = 2    # 화면 조회용 호출과 한도를 나눠 쓰도록 작게
+
+# ---------------- Background jobs (업로드 처리) ----------------
+JOBS_DB_PATH = ST_DATA_DIR / "jobs.sqlite"   # 작업 상태 테이블(단계/진행률/결과)
+JOBS_DIR = ST_DATA_DIR / "jobs"              # 작업별 입력 파일/미리보기 저장 폴더
+JOB_WORKERS = 2              # 동시에 처리할 업로드 수(프로세스)
+JOB_POLL_SEC = 1.0           # 화면 진행률 갱신 주기
+JOB_KEEP_DAYS = 7            # 지난 작업 기록/파일 보관 기간
+UPLOAD_INFER_CHUNK_ROWS = 20_000   # 추론+SHAP을 이 행 수 단위로 나눠 진행률 보고
 
 # ---------------- Grade policy (ABSOLUTE CUTS) ----------------
 
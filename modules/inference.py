@@ -3,6 +3,8 @@ import shap
 import xgboost as xgb
 from packaging import version
 
+from utils.hcis_core import compute_group_contributions
+
 def predict_pd_only(model, calibrator, model_type: str, X):
     # 1) PD raw
     if model_type == "XGB":
@@ -15,13 +17,8 @@ def predict_pd_only(model, calibrator, model_type: str, X):
     pd_hat = calibrator.predict(pd_raw)
     return pd_hat
 
-def predict_pd_upload_with_shap(
-    model,
-    calibrator,
-    model_type: str,
-    X,
-    top_n: int = 10
-):
+def _predict_pd_and_shap_matrix(model, calibrator, model_type: str, X):
+    """PD + 전체 SHAP 행렬 (n, F). XGB가 아니면 SHAP은 None."""
     # =========================
     # 1) PD (기존 그대로)
     # =========================
@@ -37,8 +34,7 @@ def predict_pd_upload_with_shap(
     # =========================
     # 2) SHAP 분기
     # =========================
-    shap_features = None
-    shap_values = None
+    sv = None
 
     if model_type == "XGB":
         xgb_ver = version.parse(xgb.__version__)
@@ -65,22 +61,69 @@ def predict_pd_upload_with_shap(
             # 마지막 컬럼 = bias → 제거
             sv = sv[:, :-1]
 
-        # -------------------------
-        # top-N 정리
-        # -------------------------
-        feat_names = np.array(X.columns)
-        shap_features = []
-        shap_values = []
+    return pd_hat, sv
+
+
+def _top_n_from_shap(sv, feat_names, top_n: int):
+    # -------------------------
+    # top-N 정리
+    # -------------------------
+    feat_names = np.array(feat_names)
+    shap_features = []
+    shap_values = []
+
+    for i in range(sv.shape[0]):
+        row = sv[i]
+        top_idx = np.argsort(np.abs(row))[::-1][:top_n]
+        shap_features.append(feat_names[top_idx].tolist())
+        shap_values.append(row[top_idx].astype(float).tolist())
 
-        for i in range(sv.shape[0]):
-            row = sv[i]
-            top_idx = np.argsort(np.abs(row))[::-1][:top_n]
-            shap_features.append(feat_names[top_idx].tolist())
-            shap_values.append(row[top_idx].astype(float).tolist())
+    return shap_features, shap_values
+
+
+def predict_pd_upload_with_shap(
+    model,
+    calibrator,
+    model_type: str,
+    X,
+    top_n: int = 10
+):
+    pd_hat, sv = _predict_pd_and_shap_matrix(model, calibrator, model_type, X)
+
+    shap_features = None
+    shap_values = None
+    if sv is not None:
+        shap_features, shap_values = _top_n_from_shap(sv, X.columns, top_n)
 
     return pd_hat, shap_features, shap_values
 
 
+def predict_pd_upload_with_shap_groups(
+    model,
+    calibrator,
+    model_type: str,
+    X,
+    group_onehot,
+    groups,
+    top_n: int = 10
+):
+    """
+    predict_pd_upload_with_shap + 전체 SHAP 기반 그룹 기여도 테이블.
+
+    - group_onehot: (F, G) feature→super_group one-hot (X.columns 순서)
+    - 반환: pd_hat, shap_features, shap_values, group_contrib (n, G) float32 DataFrame 또는 None
+    """
+    pd_hat, sv = _predict_pd_and_shap_matrix(model, calibrator, model_type, X)
+
+    if sv is None:
+        return pd_hat, None, None, None
+
+    shap_features, shap_values = _top_n_from_shap(sv, X.columns, top_n)
+    group_contrib = compute_group_contributions(sv, group_onehot, groups)
+
+    return pd_hat, shap_features, shap_values, group_contrib
+
+
 
 # def predict_pd_single(model, calibrator, model_type, X):
 #     if model_type == "XGB":
@@ -2,14 +2,25 @@ import joblib
 from pathlib import Path
 import streamlit as st
 
-@st.cache_resource
-def load_artifact():
+ARTIFACT_PATH = Path("artifacts/model/v1.0.2_XGB_artifact.joblib")  # 🔥 반드시 v1.0.2
+
+
+def artifact_version() -> str:
+    """아티팩트 파일 기준 버전 문자열 (버전 캐시 키용, 파일이 없으면 빈 문자열)"""
+    from utils.data_loader import data_version_of
+
+    return data_version_of(ARTIFACT_PATH)
+
+
+def load_artifact_uncached():
     """
     모델 아티팩트 로드 (model, calibrator, model_type, feature_names)
 
     ✅ pickle 호환 패치 포함:
     과거에 __main__.IsotonicCalibrator 등으로 저장된 경우에도
     Streamlit 실행(__main__=홈.py)에서 로드 가능하도록 주입.
+
+    Streamlit 런타임이 없는 백그라운드 작업 프로세스(utils/jobs.py)는 이 함수를 직접 사용.
     """
 
     import __main__
@@ -23,9 +34,7 @@ def load_artifact():
     # -----------------------------
     # 아티팩트 로드
     # -----------------------------
-    artifact = joblib.load(
-        Path("artifacts/model/v1.0.2_XGB_artifact.joblib")  # 🔥 반드시 v1.0.2
-    )
+    artifact = joblib.load(ARTIFACT_PATH)
 
     return (
         artifact["model"],
@@ -33,3 +42,21 @@ def load_artifact():
         artifact["model_type"],
         artifact["feature_names"],
     )
+
+
+@st.cache_resource
+def load_artifact():
+    """Streamlit 프로세스용: 아티팩트를 한 번만 로드해 모든 세션이 공유"""
+    return load_artifact_uncached()
+
+
+@st.cache_resource
+def load_feature_keyword_table():
+    """
+    아티팩트 feature 어휘 -> 키워드 family 비트마스크 테이블.
+    어휘는 모델에 고정이므로 아티팩트를 로드할 때 한 번만 만든다.
+    """
+    from utils.risk_types import FeatureKeywordTable
+
+    _, _, _, feature_names = load_artifact()
+    return FeatureKeywordTable.from_features(feature_names)
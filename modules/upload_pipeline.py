@@ -0,0 +1,326 @@
+"""
+업로드 parquet → 추론 결과(model_df.parquet) 파이프라인 (백그라운드 작업용)
+
+- 개요 탭 '처리 시작'에서 하던 전처리 → 컬럼 정렬 → 추론+SHAP → HCIS → 저장 → 분위 스케치 갱신을
+  워커 프로세스에서 실행 (utils/jobs.py). 단계별 진행률은 progress(stage, fraction)로 보고
+- 추론+SHAP은 UPLOAD_INFER_CHUNK_ROWS 행씩 나눠 처리 → 가장 오래 걸리는 단계 안에서도 진행률/ETA 갱신
+- 결과는 임시 파일에 쓴 뒤 os.replace로 교체 → 다른 화면이 반쯤 쓰인 파일을 읽지 않음
+- 여러 업로드가 동시에 끝나도 교체/스케치 갱신은 잠금 파일로 한 번에 하나씩
+- 저장 직후 새 data_version 기준 추가검토 분류 테이블(utils/review_table.py)도 미리 생성
+- 행태 해석용 원 feature 값과 EAD 추정 컬럼(CONTEXT_COLS)을 정렬 전 X에서 골라 결과에 함께 저장
+  → 대출 심사 화면의 분위 참조 인덱스/고객 행 조회, KPI·시뮬레이션의 고객별 EAD가 실제 값을 사용
+- 개요 화면용 분포 요약(점수/PD 히스토그램, 밴드 수 — utils/distribution_summary.py)도 같은 시점에 저장
+"""
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    ID_COL,
+    MODEL_DF_PARQUET,
+    REF_SKETCH_PATH,
+    MAPPING_PATH,
+    FULL_SHAP_GROUP_CONTRIB,
+    UPLOAD_INFER_CHUNK_ROWS,
+)
+
+from utils.feature_semantic_map import FEATURE_SEMANTIC_MAP
+from utils.review_simulation import EAD_COLS
+
+UPLOAD_JOB_KIND = "upload"
+UPLOAD_JOB_TARGET = "modules.upload_pipeline:run_upload_pipeline"
+PREVIEW_ROWS = 30
+
+# 결과(model_df)에 함께 저장할 원 feature 컬럼
+# - behavioral_insights가 row.get(f)로 읽는 값 + 고객별 EAD(estimate_ead_array) / 소득 대비 규모 문장용 금액
+CONTEXT_COLS = list(dict.fromkeys([*FEATURE_SEMANTIC_MAP, *EAD_COLS, "amt_income_total"]))
+
+# (단계 키, 표시 이름, 소요시간 가중치)
+UPLOAD_STAGES = [
+    ("read", "파일 읽기", 1.0),
+    ("preprocess", "전처리(파생변수)", 3.0),
+    ("align", "학습 컬럼 정렬", 1.0),
+    ("inference", "추론 + SHAP", 12.0),
+    ("hcis", "HCIS 점수/밴드 산출", 1.0),
+    ("save", "결과 저장", 1.0),
+    ("summary", "분포 요약 생성", 0.2),
+    ("review", "추가검토 분류 테이블 생성", 2.0),
+    ("sketch", "분위 스케치 갱신", 1.0),
+]
+
+ProgressFn = Callable[..., None]
+
+# 워커 프로세스 안에서 아티팩트 1회만 로드
+_ARTIFACT = None
+
+
+def _get_artifact():
+    global _ARTIFACT
+    if _ARTIFACT is None:
+        from modules.model_loader import load_artifact_uncached
+        _ARTIFACT = load_artifact_uncached()
+    return _ARTIFACT
+
+
+@contextmanager
+def _file_lock(path: Path, timeout_sec: float = 120.0, stale_sec: float = 600.0):
+    """프로세스 간 잠금 (O_EXCL 잠금 파일). stale_sec보다 오래된 잠금은 죽은 작업으로 보고 제거"""
+    path = Path(path)
+    deadline = time.monotonic() + timeout_sec
+    while True:
+        try:
+            fd = os.open(str(path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, str(os.getpid()).encode())
+            os.close(fd)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - path.stat().st_mtime > stale_sec:
+                    path.unlink()
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"잠금 대기 시간 초과: {path}")
+            time.sleep(0.2)
+    try:
+        yield
+    finally:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def replace_output_parquet(df: pd.DataFrame, output_path: Path = MODEL_DF_PARQUET) -> str:
+    """
+    df를 임시 파일에 쓴 뒤 잠금 아래 os.replace로 결과 파일 교체 (업로드 작업/샘플 로드 공용).
+    반환: 교체된 파일의 data_version
+    """
+    from utils.data_loader import data_version_of
+
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(f".{output_path.stem}.{os.getpid()}.tmp.parquet")
+    df.to_parquet(tmp_path, index=False)
+    with _file_lock(output_path.with_name(f".{output_path.name}.lock")):
+        os.replace(tmp_path, output_path)
+        return data_version_of(output_path)
+
+
+def _context_frame(X: pd.DataFrame) -> pd.DataFrame:
+    """전처리 결과 X에서 CONTEXT_COLS만 숫자로 복사 (정렬 전이라 모델 입력에 없는 feature도 보존, 없는 컬럼은 만들지 않음)"""
+    cols = [c for c in CONTEXT_COLS if c in X.columns]
+    return X[cols].apply(pd.to_numeric, errors="coerce").astype(float).reset_index(drop=True)
+
+
+def _infer_chunked(model, calibrator, model_type, X: pd.DataFrame, progress: ProgressFn):
+    """추론+SHAP을 행 단위로 나눠 실행. 반환: pd_hat, shap_features, shap_values, group_contrib"""
+    from modules.inference import predict_pd_upload_with_shap, predict_pd_upload_with_shap_groups
+    from utils.hcis_core import build_map_dict, build_group_onehot, SUPER_GROUPS
+
+    group_onehot = None
+    if FULL_SHAP_GROUP_CONTRIB:
+        group_onehot = build_group_onehot(list(X.columns), build_map_dict(MAPPING_PATH))
+
+    n = len(X)
+    step = max(1, int(UPLOAD_INFER_CHUNK_ROWS))
+    pd_parts, feat_parts, val_parts, grp_parts = [], [], [], []
+    has_shap = True
+    for start in range(0, max(n, 1), step):
+        Xc = X.iloc[start:start + step]
+        if group_onehot is not None:
+            pd_c, f_c, v_c, g_c = predict_pd_upload_with_shap_groups(
+                model, calibrator, model_type, Xc, group_onehot, SUPER_GROUPS, top_n=10
+            )
+            if g_c is not None:
+                grp_parts.append(g_c.reset_index(drop=True))
+        else:
+            pd_c, f_c, v_c = predict_pd_upload_with_shap(model, calibrator, model_type, Xc, top_n=10)
+        pd_parts.append(np.asarray(pd_c).reshape(-1).astype(float))
+        if f_c is None or v_c is None:
+            has_shap = False
+        else:
+            feat_parts.extend(f_c)
+            val_parts.extend(v_c)
+        done = min(n, start + step)
+        progress("inference", done / max(n, 1), f"{done:,} / {n:,}행")
+
+    pd_hat = np.concatenate(pd_parts) if pd_parts else np.empty(0, dtype=float)
+    group_contrib = pd.concat(grp_parts, ignore_index=True) if grp_parts and len(grp_parts) == len(pd_parts) else None
+    if not has_shap:
+        return pd_hat, None, None, group_contrib
+    return pd_hat, feat_parts, val_parts, group_contrib
+
+
+def run_upload_pipeline(
+    *,
+    input_path: str,
+    source_name: str,
+    work_dir: str,
+    output_path: str = str(MODEL_DF_PARQUET),
+    sketch_path: str = str(REF_SKETCH_PATH),
+    progress: Optional[ProgressFn] = None,
+) -> Dict[str, Any]:
+    """
+    업로드 파일 1건 처리. progress(stage, fraction, message)로 단계별 진행률 보고.
+    반환: {"rows", "output_path", "preview_path", "source_name", "stage_sec", "data_version",
+           "sketch_error", "review_error", "summary_error"}
+    """
+    from modules.preprocess import preprocess_features_only
+    from modules.align import sanitize_and_align
+    from utils.hcis_core import compute_hcis_columns, build_map_dict
+    from utils.quantile_sketch import update_sketch_file
+    from utils.review_table import write_review_table
+    from utils.distribution_summary import write_distribution_summary
+    from utils.risk_types import FeatureKeywordTable
+
+    progress = progress or (lambda *a, **k: None)
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    output_path = Path(output_path)
+    stage_sec: Dict[str, float] = {}
+
+    def _timed(stage: str):
+        stage_sec[stage] = time.perf_counter()
+        progress(stage, 0.0)
+
+    def _end(stage: str):
+        stage_sec[stage] = round(time.perf_counter() - stage_sec[stage], 3)
+        progress(stage, 1.0)
+
+    _timed("read")
+    df_raw = pd.read_parquet(input_path)
+    df_raw.columns = df_raw.columns.str.lower()
+    _end("read")
+
+    # 1) 전처리: ids는 preprocess_features_only가 리턴한 것을 그대로 신뢰
+    _timed("preprocess")
+    X, ids = preprocess_features_only(df_raw)
+    ids_arr = np.asarray(ids).reshape(-1).astype(str)
+    context = _context_frame(X)
+    del df_raw
+    _end("preprocess")
+
+    # 2) 학습 컬럼 정렬
+    _timed("align")
+    model, calibrator, model_type, feature_names = _get_artifact()
+    X = sanitize_and_align(X, feature_names)
+    _end("align")
+
+    # 3) 추론 + SHAP (옵션: 전체 SHAP 기반 그룹 기여도 테이블)
+    _timed("inference")
+    pd_hat_arr, shap_feats, shap_vals, group_contrib = _infer_chunked(model, calibrator, model_type, X, progress)
+    _end("inference")
+
+    # 4) 길이 검증
+    if len(ids_arr) != len(pd_hat_arr):
+        raise ValueError(f"Length mismatch: ids={len(ids_arr)}, pd_hat={len(pd_hat_arr)}")
+
+    _timed("hcis")
+    pred_df = pd.DataFrame({ID_COL: ids_arr, "pd_hat": pd_hat_arr})
+
+    # 5) SHAP 컬럼
+    if shap_feats is not None and shap_vals is not None:
+        if len(shap_feats) != len(pred_df) or len(shap_vals) != len(pred_df):
+            raise ValueError(
+                f"Length mismatch: pred_df={len(pred_df)}, "
+                f"shap_feats={len(shap_feats)}, shap_vals={len(shap_vals)}"
+            )
+        pred_df["shap_features"] = list(shap_feats)
+        pred_df["shap_values"] = list(shap_vals)
+
+    # 5-1) 그룹 기여도 테이블 (n, n_groups) float32
+    if group_contrib is not None:
+        pred_df = pd.concat([pred_df, group_contrib.set_index(pred_df.index)], axis=1)
+
+    # 5-2) 행태 해석용 원 feature 값
+    if len(context.columns):
+        pred_df = pd.concat([pred_df, context.set_index(pred_df.index)], axis=1)
+
+    # 6) HCIS 파생
+    pred_df = compute_hcis_columns(pred_df, pd_col="pd_hat")
+    pred_df["source_file"] = source_name
+    _end("hcis")
+
+    # 7) 저장: 임시 파일 → 원자적 교체
+    _timed("save")
+    preview_path = work_dir / "preview.parquet"
+    pred_df.head(PREVIEW_ROWS).to_parquet(preview_path, index=False)
+    data_version = replace_output_parquet(pred_df, output_path)
+    _end("save")
+
+    # 7-1) 개요 분포 요약 (실패해도 개요 화면이 처음 열 때 PD 컬럼만 읽어 다시 생성)
+    _timed("summary")
+    summary_error = None
+    try:
+        write_distribution_summary(pred_df["pd_hat"].to_numpy(dtype=float), data_version, source=str(output_path))
+    except Exception as e:
+        summary_error = str(e)
+    _end("summary")
+
+    # 7-2) 추가검토 분류 테이블 (실패해도 추가검토 페이지가 처음 열 때 다시 생성)
+    _timed("review")
+    review_error = None
+    try:
+        write_review_table(
+            pred_df,
+            data_version,
+            build_map_dict(MAPPING_PATH),
+            keyword_table=FeatureKeywordTable.from_features(feature_names),
+        )
+    except Exception as e:
+        review_error = str(e)
+    _end("review")
+
+    # 8) 행태 해석용 분위 스케치 (새 data_version 기준으로 다시 시작 → 교체된 이전 model_df 분포와 섞지 않음)
+    #    원 feature 값(context) 기준: 대출 심사 화면이 조회하는 model_df 컬럼과 같은 값
+    _timed("sketch")
+    sketch_error = None
+    try:
+        with _file_lock(Path(sketch_path).with_name(f".{Path(sketch_path).name}.lock")):
+            update_sketch_file(context, Path(sketch_path), data_version=data_version)
+    except Exception as e:
+        sketch_error = str(e)
+    _end("sketch")
+
+    return {
+        "rows": int(len(pred_df)),
+        "output_path": str(output_path),
+        "preview_path": str(preview_path),
+        "source_name": source_name,
+        "stage_sec": stage_sec,
+        "data_version": data_version,
+        "sketch_error": sketch_error,
+        "review_error": review_error,
+        "summary_error": summary_error,
+    }
+
+
+run_upload_pipeline.job_stages = UPLOAD_STAGES
+
+
+def submit_upload_job(data: bytes, source_name: str, runner=None) -> str:
+    """업로드 바이트를 작업 폴더에 저장하고 백그라운드 처리 제출. job_id 반환"""
+    from utils.jobs import get_job_runner
+
+    runner = runner if runner is not None else get_job_runner()
+    job_id = runner.new_job_id()
+    work_dir = runner.job_dir(job_id)
+    input_path = work_dir / "input.parquet"
+    input_path.write_bytes(data)
+    return runner.submit(
+        UPLOAD_JOB_KIND,
+        UPLOAD_JOB_TARGET,
+        job_id=job_id,
+        input_path=str(input_path),
+        source_name=source_name,
+        work_dir=str(work_dir),
+    )
@@ -10,7 +10,8 @@
 import streamlit as st
 import pandas as pd
 import altair as alt
-import numpy as np
+import pyarrow.parquet as pq
+import time
 import streamlit.components.v1 as components
 from pathlib import Path
 # -----------------------------------------------------------
@@ -26,20 +27,26 @@ from config import (
     T_LOW,
     T_HIGH,
     MODEL_DF_PARQUET,
-    ST_DATA_DIR,
-    DEFAULT_SAMPLE_PARQUET
+    DEFAULT_SAMPLE_PARQUET,
+    MAPPING_PATH,
+    REF_SKETCH_PATH,
+    JOB_POLL_SEC,
+    KPI_DEFAULT_EAD,
 )
 
 # 데이터 로드 / 전처리 / 점수화 관련 공통 함수
-from utils.data_loader import load_base_df, ensure_id, pick_pd_column
+from utils.data_loader import load_base_df, pick_pd_column, data_version_of
+from utils.kpi_engine import load_or_compute_policy_kpis
+from utils.stress_test import run_stress_test, customer_segments, default_scenarios
+from utils.review_simulation import estimate_ead_array, has_customer_ead
 # (removed) score/grade/decision utilities (HCIS band 기반으로 통일)
 
-# 업로드 데이터 전처리, 모델링, 추출 함수
-from modules.model_loader import load_artifact
-from modules.preprocess import preprocess_features_only
-from modules.align import sanitize_and_align
-from modules.inference import predict_pd_upload_with_shap
-from utils.hcis_core import compute_hcis_columns
+# 업로드 처리(전처리 → 추론 → HCIS → 저장)는 백그라운드 작업으로 실행
+from modules.upload_pipeline import UPLOAD_JOB_KIND, replace_output_parquet, submit_upload_job
+from utils.jobs import get_job_runner
+from utils.hcis_core import build_map_dict
+from utils.cache_registry import CacheVersion, active_data_path, current_cache_version, get_cache_registry
+from utils.distribution_summary import ensure_distribution_summary
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 # -----------------------------------------------------------
@@ -70,9 +77,6 @@ st.set_page_config(page_title=f"{APP_TITLE} | 개요", layout="wide")
 if "data_ready" not in st.session_state:
     st.session_state["data_ready"] = False   # 처음 실행은 항상 비어있게
 
-if "data_version" not in st.session_state:
-    st.session_state["data_version"] = 0     # 캐시 갱신 키
-
 # ---------------------------
 # 세션 키 초기화
 # ---------------------------
@@ -99,69 +103,157 @@ def bootstrap_default_sample():
         return
 
     elif DEFAULT_SAMPLE_PARQUET.exists():
+        # 샘플을 그대로 쓰는 것뿐 → 데이터가 바뀐 게 아니므로 캐시는 건드리지 않음
         st.session_state["data_ready"] = True
-        st.session_state["data_version"] += 1
-        st.cache_data.clear()
 
 # 세션 초기화 직후 1회 실행 
 bootstrap_default_sample()
 
 
 # ===========================================================
-# Lazy model loader (업로드 탭에서만 사용)
+# 업로드 백그라운드 작업 (진행률 폴링 + 결과 연결)
 # ===========================================================
-@st.cache_resource(show_spinner="모델 로딩 중...")
-def get_model_artifact():
-    # modules/model_loader.py 의 load_artifact()를 사용한다고 가정
-    return load_artifact()  # (model, calibrator, model_type, feature_names)
+# 새로고침해도 같은 작업에 다시 붙도록 job_id를 URL(query param)에도 보관
+if "tab4_job_id" not in st.session_state:
+    st.session_state["tab4_job_id"] = st.query_params.get("upload_job")
+
+
+def _set_upload_job(job_id):
+    st.session_state["tab4_job_id"] = job_id
+    if job_id:
+        st.query_params["upload_job"] = job_id
+    elif "upload_job" in st.query_params:
+        del st.query_params["upload_job"]
+
+
+def _format_sec(sec) -> str:
+    if sec is None:
+        return "계산 중"
+    sec = int(round(sec))
+    return f"{sec // 60}분 {sec % 60:02d}초" if sec >= 60 else f"{sec}초"
+
+
+# 진행 중인 작업은 이 부분만 JOB_POLL_SEC마다 다시 그림 (fragment 미지원 버전은 전체 rerun)
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+
+def _upload_job_panel():
+    job_id = st.session_state.get("tab4_job_id")
+    if not job_id:
+        return
+    info = get_job_runner().get(job_id)
+    if info is None:
+        _set_upload_job(None)
+        return
+
+    if info.status in ("queued", "running"):
+        if info.status == "queued":
+            st.info("⏳ 업로드 처리 대기 중... (다른 작업이 끝나면 시작)")
+        else:
+            st.progress(info.progress, text=f"⚙️ {info.stage_label or '처리 중'} {info.message}".rstrip())
+            st.caption(f"경과 {_format_sec(info.elapsed_sec)} · 남은 시간(추정) {_format_sec(info.eta_sec)}")
+        st.caption("처리는 서버에서 계속됩니다. 다른 탭을 보거나 새로고침해도 됩니다.")
+        if _fragment is None:
+            time.sleep(JOB_POLL_SEC)
+            st.rerun()
+        return
+
+    # 완료/실패 → 결과를 이 세션에 연결하고 전체 화면 갱신
+    _set_upload_job(None)
+    if info.status == "done":
+        result = info.result or {}
+        st.session_state["data_ready"] = True
+        CACHE.invalidate("model_df", keep_version=current_cache_version().data_version)
+        try:
+            st.session_state["tab4_result_df"] = pd.read_parquet(result["preview_path"])
+        except Exception:
+            st.session_state["tab4_result_df"] = None
+        messages = [(
+            "success",
+            f"✅ 처리 완료! {result.get('rows', 0):,}건 저장됨: {result.get('output_path', MODEL_DF_PARQUET)} "
+            f"(소요 {_format_sec(info.elapsed_sec)})",
+        )]
+        if result.get("sketch_error"):
+            messages.append(("warning", f"분위 스케치 갱신 실패(행태 해석은 기존 기준 사용): {result['sketch_error']}"))
+        if result.get("review_error"):
+            messages.append(("warning", f"추가검토 분류 테이블 생성 실패(추가검토 페이지에서 다시 생성): {result['review_error']}"))
+        if result.get("summary_error"):
+            messages.append(("warning", f"분포 요약 생성 실패(개요 화면에서 다시 생성): {result['summary_error']}"))
+        st.session_state["tab4_job_messages"] = messages
+    else:
+        st.session_state["tab4_job_messages"] = [("error", f"업로드 처리 실패: {info.error}")]
+    st.rerun()
+
+
+if _fragment is not None:
+    _upload_job_panel = _fragment(run_every=JOB_POLL_SEC)(_upload_job_panel)
 
 # ===========================================================
 # 데이터 로드 및 분포 계산 (캐싱) - 단일 정의로 통일
 # ===========================================================
+# 프로세스 공용 버전 캐시: (파일 data_version, 아티팩트 버전, policy_hash) 키
+# → 데이터가 바뀌면 invalidate("model_df")로 파생 항목만 정리 (다른 세션/페이지 캐시는 유지)
+CACHE = get_cache_registry()
 
-@st.cache_data(ttl=3600, show_spinner="데이터 로딩 중...")
-def load_and_compute_distributions(data_ready: bool, data_version: int):
+@CACHE.cached("distributions", depends_on=("model_df", "policy"), max_entries=4)
+def load_and_compute_distributions(version: CacheVersion, data_ready: bool):
     """
-    - 원천 데이터 로드
-    - PD → Score → Grade → Decision 일괄 계산
-    - KPI 산출에 필요한 통계값 사전 계산
-    반환값을 (pd, score, grade, decision, stats)로 통일
+    개요 분포 요약(DistributionSummary) 로드
+    - 업로드 처리 시 저장된 점수/PD 히스토그램 + 밴드 수 + 통계 (st_data/dist_summary)
+    - 없으면(기본 샘플 등) PD 컬럼만 읽어 한 번 생성
+    고객 단위 Series는 만들지 않음 → 화면 payload는 포트폴리오 크기와 무관
     """
     # ✅ "이번 세션에서 업로드로 활성화"되기 전까지는 무조건 비움
     if not data_ready:
         return None
 
-    # 파일은 있을 수도/없을 수도 있는데, 어쨌든 로더 결과로 판단
-    df, src = load_base_df(data_version)
-    if df is None or len(df) == 0:
+    data_path = active_data_path()
+    if data_path is None:
         return None
 
-    df = ensure_id(df)
-    pd_col = pick_pd_column(df)
-    if pd_col is None:
+    with st.spinner("데이터 로딩 중..."):
+        summary = ensure_distribution_summary(data_path, version.data_version, policy=version.policy_hash)
+    if summary is None or summary.total == 0:
         return None
+    return summary
 
-    pd_series = df[pd_col].dropna().astype(float)
-
-    # HCIS 운영 정책(클리핑/컷오프/마진 포함)으로 통일
-    tmp = pd.DataFrame({"pd_hat": pd_series})
-    tmp = compute_hcis_columns(tmp, pd_col="pd_hat")
-    score_series = tmp["hcis_score"]   # 기존 변수명 유지(하위 코드 수정 최소화)
-    decision_series = tmp["band"]      # '승인'/'추가검토'/'거절'
-    grade_series = decision_series     # 개요에서는 grade 대신 band를 동일하게 사용
 
+@CACHE.cached("policy_kpis", depends_on=("model_df", "policy"), max_entries=4)
+def load_policy_kpis(version: CacheVersion, data_ready: bool):
+    """
+    기존 PD 등급 컷 vs HCIS 듀얼 컷 KPI (전체 고객)
+    - 파일 기준 data_version + policy_hash로 디스크 캐시(st_data/kpi_cache)까지 조회
+    """
+    if not data_ready:
+        return None
+    df, src = load_base_df(version.data_version)
+    if df is None or len(df) == 0 or pick_pd_column(df) is None:
+        return None
+    with st.spinner("KPI 계산 중..."):
+        return load_or_compute_policy_kpis(df, data_version_of(src))
 
-    stats = {
-        "src": src,
-        "total_customers": len(score_series),
-        "score_min": float(score_series.min()),
-        "score_max": float(score_series.max()),
-        "score_mean": float(score_series.mean()),
-        "pd_mean": float(pd_series.mean()),
-    }
 
-    return pd_series, score_series, grade_series, decision_series, stats
+@CACHE.cached("stress", depends_on=("model_df", "policy"), max_entries=16)
+def run_portfolio_stress(version: CacheVersion, data_ready: bool, by: str, scenario_names: tuple):
+    """전체 고객 대상 스트레스 테스트 (세그먼트 기준/시나리오 조합별 캐시)"""
+    if not data_ready:
+        return None
+    df, _ = load_base_df(version.data_version)
+    if df is None or len(df) == 0:
+        return None
+    pd_col = pick_pd_column(df)
+    if pd_col is None:
+        return None
 
+    with st.spinner("스트레스 테스트 계산 중..."):
+        segments = customer_segments(df, build_map_dict(MAPPING_PATH), by=by)
+        scenarios = [sc for sc in default_scenarios(by) if sc.name in scenario_names]
+        return run_stress_test(
+            pd.to_numeric(df[pd_col], errors="coerce").to_numpy(dtype=float),
+            scenarios,
+            segments=segments,
+            ead=estimate_ead_array(df, KPI_DEFAULT_EAD),
+        )
 
 # -----------------------------------------------------------
 # 캐싱된 데이터 호출 (단일 호출)
@@ -171,7 +263,7 @@ def load_and_compute_distributions(data_ready: bool, data_version: int):
 #     st.error("분포 시각화를 위한 PD 컬럼을 찾지 못했습니다.")
 #     st.stop()
 
-# pd_s, score_s, grade_s, decision_s, stats = data
+# summary = data
 
 
 
@@ -180,15 +272,9 @@ def load_and_compute_distributions(data_ready: bool, data_version: int):
 # 분포 차트용 데이터 준비
 # -----------------------------------------------------------
 
-@st.cache_data(show_spinner=False)
-def prepare_distribution_data(grade_s, decision_s):
-    """분포 데이터 준비 (HCIS band 기준)"""
-    band_dist = (
-        decision_s.value_counts()
-        .reindex(["승인", "추가검토", "거절"], fill_value=0)
-        .reset_index()
-    )
-    band_dist.columns = ["Band", "Count"]
+def prepare_distribution_data(summary):
+    """분포 데이터 준비 (HCIS band 기준, 사전 집계된 밴드 수)"""
+    band_dist = summary.band_frame()
     # grade_dist는 기존 코드 호환을 위해 더미로 반환
     grade_dist = band_dist.copy()
     grade_dist.columns = ["Grade", "Count"]
@@ -354,12 +440,13 @@ with st.container():
     with st.container():
         with tab2:
             
-            data = load_and_compute_distributions(st.session_state["data_ready"], st.session_state["data_version"])
+            data = load_and_compute_distributions(current_cache_version(), st.session_state["data_ready"])
             if data is None:
                 st.info("📂 아직 업로드된 결과가 없습니다. Tab4에서 업로드 후 '처리 시작'을 눌러주세요.")
                 st.caption("업로드 후 자동으로 st_data/model_df.parquet가 생성됩니다.")
             else:
-                pd_s, score_s, grade_s, decision_s, stats = data
+                summary = data
+                stats = summary.stats
 
                 # -----------------------------------------------------------
                 # KPI 계산 (UI 전용)
@@ -367,14 +454,14 @@ with st.container():
                 total_customers = stats["total_customers"]
                 avg_score = stats["score_mean"]
 
-                approve_rate = (decision_s == "승인").mean() * 100
+                approve_rate = summary.band_counts.get("승인", 0) / max(total_customers, 1) * 100
                 avg_pd = stats["pd_mean"] * 100
 
                 st.metric("고객 수", stats["total_customers"])
                 st.metric("평균 PD(%)", round(stats["pd_mean"] * 100, 2))
                 st.markdown("#### 📈 HCIS 전체 고객 KPI")
 
-                grade_dist, decision_dist = prepare_distribution_data(grade_s, decision_s)
+                grade_dist, decision_dist = prepare_distribution_data(summary)
                 
                 # 차트 생성
                 grade_chart = (
@@ -492,6 +579,66 @@ with st.container():
                 with c2:
                     st.altair_chart(decision_chart, use_container_width=True)
 
+                st.divider()
+
+                # -----------------------------------------------------------
+                # 기존 PD 등급 컷 vs HCIS 듀얼 컷 KPI 비교
+                # -----------------------------------------------------------
+                st.markdown("#### ⚖️ 기존 PD 등급 컷 vs HCIS 듀얼 컷 KPI")
+                st.caption("기대 손실 = PD × LGD × EAD · 기대 수익 = (1−PD) × r × EAD − 기대 손실 · 추가검토 전환은 전환율만큼 승인 가중")
+
+                data_path = active_data_path()
+                if data_path is not None and not has_customer_ead(pq.read_schema(data_path).names):
+                    st.caption(
+                        f"ℹ️ 현재 데이터에 amt_credit(또는 amt_annuity·app_payment_rate) 컬럼이 없어 "
+                        f"모든 고객의 EAD를 {KPI_DEFAULT_EAD:,.0f}원으로 가정합니다."
+                    )
+
+                kpi_df = load_policy_kpis(current_cache_version(), st.session_state["data_ready"])
+                if kpi_df is None or kpi_df.empty:
+                    st.info("KPI 비교를 위한 PD 컬럼을 찾지 못했습니다.")
+                else:
+                    rate_options = sorted(kpi_df["rate"].unique().tolist())
+                    kpi_rate = st.radio(
+                        "이자율(r) 시나리오",
+                        options=rate_options,
+                        index=len(rate_options) // 2,
+                        format_func=lambda r: f"{r:.0%}",
+                        horizontal=True,
+                    )
+                    kpi_view = kpi_df[kpi_df["rate"] == kpi_rate].drop(columns=["rate"])
+
+                    kpi_chart = (
+                        alt.Chart(kpi_view)
+                        .mark_bar(cornerRadiusTopRight=6, cornerRadiusBottomRight=6)
+                        .encode(
+                            y=alt.Y("policy:N", title=None, sort=None, axis=alt.Axis(labelLimit=300)),
+                            x=alt.X("expected_revenue:Q", title="기대 수익(원)"),
+                            color=alt.Color("scheme:N", title="체계"),
+                            tooltip=[
+                                alt.Tooltip("policy:N", title="정책"),
+                                alt.Tooltip("approve_rate:Q", title="승인율", format=".1%"),
+                                alt.Tooltip("expected_revenue:Q", title="기대 수익", format=",.0f"),
+                                alt.Tooltip("expected_loss:Q", title="기대 손실", format=",.0f"),
+                                alt.Tooltip("approved_mean_pd:Q", title="승인군 평균 PD", format=".2%"),
+                            ],
+                        )
+                        .properties(height=320)
+                    )
+                    st.altair_chart(kpi_chart, use_container_width=True)
+                    st.dataframe(
+                        kpi_view.style.format({
+                            "approved_n": "{:,.1f}",
+                            "approve_rate": "{:.1%}",
+                            "expected_revenue": "{:,.0f}",
+                            "expected_loss": "{:,.0f}",
+                            "approved_mean_pd": "{:.2%}",
+                            "approved_default_rate": "{:.2%}",
+                        }),
+                        use_container_width=True,
+                        hide_index=True,
+                    )
+
 # ===========================================================
 # 관리자 시뮬레이션 - Tab3
 
@@ -503,22 +650,23 @@ with st.container():
         
     with st.container():
         with tab3:
-            data = load_and_compute_distributions(st.session_state["data_ready"], st.session_state["data_version"])
+            data = load_and_compute_distributions(current_cache_version(), st.session_state["data_ready"])
             if data is None:
                 st.info("📂 아직 업로드된 결과가 없습니다. Tab4에서 업로드 후 '처리 시작'을 눌러주세요.")
                 st.caption("업로드 후 자동으로 st_data/model_df.parquet가 생성됩니다.")
             else:
-                pd_s, score_s, grade_s, decision_s, stats = data
+                summary = data
+                n_total = max(summary.total, 1)
 
                 st.markdown("#### 🧮 심사 결과별 고객 수")
                 
                 sim_score_approve = T_HIGH
                 sim_score_cond = T_LOW
 
-                # 시뮬레이션 결과 통계 계산
-                sim_approve = (score_s >= sim_score_approve).sum()
-                sim_cond = ((score_s >= sim_score_cond) & (score_s < sim_score_approve)).sum()
-                sim_reject = (score_s < sim_score_cond).sum()
+                # 시뮬레이션 결과 통계 계산 (점수 히스토그램 누적합)
+                sim_approve = summary.count_at_least(sim_score_approve)
+                sim_cond = summary.count_at_least(sim_score_cond) - sim_approve
+                sim_reject = summary.total - sim_approve - sim_cond
 
                 # 시뮬레이션 결과 표시
                 result_c1, result_c2, result_c3 = st.columns(3)
@@ -528,7 +676,7 @@ with st.container():
                     <div style='text-align: center; padding: 20px; background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%); border-radius: 10px; color: white;'>
                         <div style='font-size: 12px; opacity: 0.9;'>승인</div>
                         <div style='font-size: 30px; font-weight: bold;'>{sim_approve:,}명</div>
-                        <div style='font-size: 10px; opacity: 0.8;'>{sim_approve/len(score_s)*100:.1f}%</div>
+                        <div style='font-size: 10px; opacity: 0.8;'>{sim_approve/n_total*100:.1f}%</div>
                     </div>
                     """, unsafe_allow_html=True)
 
@@ -537,7 +685,7 @@ with st.container():
                     <div style='text-align: center; padding: 20px; background: linear-gradient(135deg, #f2994a 0%, #f2c94c 100%); border-radius: 10px; color: white;'>
                         <div style='font-size: 12px; opacity: 0.9;'>추가검토</div>
                         <div style='font-size: 30px; font-weight: bold;'>{sim_cond:,}명</div>
-                        <div style='font-size: 10px; opacity: 0.8;'>{sim_cond/len(score_s)*100:.1f}%</div>
+                        <div style='font-size: 10px; opacity: 0.8;'>{sim_cond/n_total*100:.1f}%</div>
                     </div>
                     """, unsafe_allow_html=True)
 
@@ -546,7 +694,7 @@ with st.container():
                     <div style='text-align: center; padding: 20px; background: linear-gradient(135deg, #eb3349 0%, #f45c43 100%); border-radius: 10px; color: white;'>
                         <div style='font-size: 12px; opacity: 0.9;'>거절</div>
                         <div style='font-size: 30px; font-weight: bold;'>{sim_reject:,}명</div>
-                        <div style='font-size: 10px; opacity: 0.8;'>{sim_reject/len(score_s)*100:.1f}%</div>
+                        <div style='font-size: 10px; opacity: 0.8;'>{sim_reject/n_total*100:.1f}%</div>
                     </div>
                     """, unsafe_allow_html=True)
 
@@ -558,26 +706,21 @@ with st.container():
 
                 st.markdown("#### 🧮 점수 분포 및 심사 기준선")
 
-                score_df = pd.DataFrame({"Score": score_s})
+                # 사전 집계 구간(DIST_SCORE_BIN_WIDTH)만 전달 → 고객 수와 무관하게 수백 행
+                score_df = summary.score_hist_frame(sim_score_cond, sim_score_approve)
 
                 score_hist = (
                     alt.Chart(score_df)
-                    .transform_calculate(
-                        zone=f"""
-                        datum.Score >= {sim_score_approve} ? '승인' :
-                        datum.Score >= {sim_score_cond} ? '추가검토' :
-                        '거절'
-                        """
-                    )
                     .mark_bar(cornerRadiusTopLeft=4, cornerRadiusTopRight=4)
                     .encode(
                         x=alt.X(
-                            "Score:Q",
-                            bin=alt.Bin(maxbins=30),
+                            "bin_start:Q",
+                            bin="binned",
                             title="HCIS 점수",
                             axis=alt.Axis(labelFontSize=12)
                         ),
-                        y=alt.Y("count()", title="고객 수", axis=alt.Axis(labelFontSize=12)),
+                        x2="bin_end:Q",
+                        y=alt.Y("Count:Q", title="고객 수", axis=alt.Axis(labelFontSize=12)),
                         color=alt.Color(
                             "zone:N",
                             scale=alt.Scale(
@@ -588,7 +731,8 @@ with st.container():
                         ),
                         tooltip=[
                             alt.Tooltip("zone:N", title="구간"),
-                            alt.Tooltip("count()", title="고객 수", format=",")
+                            alt.Tooltip("bin_start:Q", title="점수 구간 시작"),
+                            alt.Tooltip("Count:Q", title="고객 수", format=",")
                         ]
                     )
                 )
@@ -631,19 +775,66 @@ with st.container():
                     st.markdown(f"- 승인 컷: **{sim_score_approve}점** 이상")
                     st.markdown(f"- 조건부 컷: **{sim_score_cond}점** 이상")
                     
-                    sim_approve = (score_s >= sim_score_approve).sum()
-                    sim_cond = ((score_s >= sim_score_cond) & (score_s < sim_score_approve)).sum()
-                    sim_reject = (score_s < sim_score_cond).sum()
+                    st.markdown(f"- 승인 고객 수: **{sim_approve:,}명** ({sim_approve/n_total*100:.1f}%)")
+                    st.markdown(f"- 조건부 고객 수: **{sim_cond:,}명** ({sim_cond/n_total*100:.1f}%)")
+                    st.markdown(f"- 위험 고객 수: **{sim_reject:,}명** ({sim_reject/n_total*100:.1f}%)")
 
-                    st.markdown(f"- 승인 고객 수: **{sim_approve:,}명** ({sim_approve/len(score_s)*100:.1f}%)")
-                    st.markdown(f"- 조건부 고객 수: **{sim_cond:,}명** ({sim_cond/len(score_s)*100:.1f}%)")
-                    st.markdown(f"- 위험 고객 수: **{sim_reject:,}명** ({sim_reject/len(score_s)*100:.1f}%)")
+                # ===========================================================
+                # 스트레스 테스트 (PD 충격 시나리오)
+                # ===========================================================
+                st.divider()
+                st.markdown("#### 🌪️ 스트레스 테스트 (PD 충격 시나리오)")
+                st.caption("세그먼트별 PD 배수/logit 이동 → HCIS 점수·밴드 재산출 · 밴드 이동 / 기대손실 / 소요자본(바젤 소매 K) 변화")
+
+                stress_by = st.radio(
+                    "세그먼트 기준",
+                    options=["super_group", "risk_type"],
+                    format_func=lambda x: "SHAP 지배 그룹" if x == "super_group" else "리스크 타입",
+                    horizontal=True,
+                )
+                scenario_names = [sc.name for sc in default_scenarios(stress_by)]
+                picked = st.multiselect("시나리오", options=scenario_names, default=scenario_names)
+
+                if picked:
+                    stress = run_portfolio_stress(
+                        current_cache_version(),
+                        st.session_state["data_ready"],
+                        stress_by,
+                        tuple(picked),
+                    )
+                    if stress is None:
+                        st.info("스트레스 테스트를 위한 PD 컬럼을 찾지 못했습니다.")
+                    else:
+                        st.dataframe(
+                            stress.summary.style.format({
+                                "mean_pd": "{:.2%}",
+                                "expected_loss": "{:,.0f}",
+                                "expected_loss_approved": "{:,.0f}",
+                                "capital_k": "{:,.0f}",
+                                "el_delta": "{:+,.0f}",
+                                "capital_delta": "{:+,.0f}",
+                                "rwa": "{:,.0f}",
+                            }),
+                            use_container_width=True,
+                            hide_index=True,
+                        )
+                        mig_pick = st.selectbox("밴드 이동 행렬 (행: 기준 → 열: 충격 후)", options=stress.scenario_names[1:])
+                        st.dataframe(
+                            stress.migration_frame(stress.scenario_names.index(mig_pick)),
+                            use_container_width=True,
+                        )
 
     with st.container():
         with tab4:
             admin_mode = st.toggle("🛠 관리자 모드", value=False)
             st.subheader("📎 데이터 관리")
 
+            # 업로드 작업 진행률 (관리자 모드와 무관하게 표시 → 새로고침 후에도 이어서 확인)
+            if st.session_state.get("tab4_job_id"):
+                _upload_job_panel()
+            for kind, text in st.session_state.pop("tab4_job_messages", []):
+                getattr(st, kind)(text)
+
             if not admin_mode:
                 st.info("관리자 모드에서만 업로드 가능합니다.")
 
@@ -658,13 +849,13 @@ with st.container():
                 if load_sample:
                     if DEFAULT_SAMPLE_PARQUET.exists():
                         # 샘플을 '운영 결과 파일' 위치로 복사해두면, 기존 로직을 그대로 재사용 가능
-                        ST_DATA_DIR.mkdir(parents=True, exist_ok=True)
+                        # (업로드 작업과 같은 임시 파일 + 잠금 + os.replace 교체 → 진행 중인 작업과 겹쳐도 안전)
                         df_sample = pd.read_parquet(DEFAULT_SAMPLE_PARQUET)
-                        df_sample.to_parquet(MODEL_DF_PARQUET, index=False)
+                        replace_output_parquet(df_sample, MODEL_DF_PARQUET)
 
                         st.session_state["data_ready"] = True
-                        st.session_state["data_version"] += 1
-                        st.cache_data.clear()
+                        # model_df에서 파생된 캐시만 정리 (새 파일 버전으로 계산된 항목은 유지)
+                        CACHE.invalidate("model_df", keep_version=current_cache_version().data_version)
                         st.success("✅ 샘플 데이터 로드 완료! Tab2/Tab3에서 분포/시뮬레이션을 확인하세요.")
                         st.rerun()
                     else:
@@ -694,21 +885,22 @@ with st.container():
                 if reset:
                     # 1) 화면 결과 비우기
                     st.session_state["tab4_result_df"] = None
-                    # 통계 비활성화 + 캐시 갱신
+                    # 통계 비활성화
                     st.session_state["data_ready"] = False
-                    st.session_state["data_version"] += 1
-                    # 2) 디스크에 남아있는 결과 파일까지 삭제
+                    # 2) 디스크에 남아있는 결과 파일까지 삭제 (분위 스케치 포함)
                     try:
                         if MODEL_DF_PARQUET.exists():
                             MODEL_DF_PARQUET.unlink()
+                        if REF_SKETCH_PATH.exists():
+                            REF_SKETCH_PATH.unlink()
                     except Exception as e:
                         st.warning(f"결과 파일 삭제 실패: {e}")
 
                     # 3) 업로더 위젯 리셋 (key 증가)
                     st.session_state["tab4_uploader_key"] += 1
 
-                    # 4) 캐시 제거 (load_and_compute_distributions() 포함)
-                    st.cache_data.clear()
+                    # 4) model_df에서 파생된 캐시만 제거 (분포/KPI/스트레스 테스트)
+                    CACHE.invalidate("model_df")
 
                     st.success("🧹 결과/업로드 초기화 완료! (파일 삭제 포함)")
                     st.rerun()
@@ -723,76 +915,39 @@ with st.container():
                     # 파일 없으면 안내하고 끝
                     if uploaded_file is None:
                         st.warning("먼저 Parquet 파일을 업로드해주세요.")
-
-                    # (B) 여기부터 새로 처리
-                    model, calibrator, model_type, feature_names = get_model_artifact()
-
-                    try:
-                        df_raw = pd.read_parquet(uploaded_file)
-                        df_raw.columns = df_raw.columns.str.lower()
-
-                        # 1) 전처리: ids는 preprocess_features_only가 리턴한 것을 그대로 신뢰
-                        X, ids = preprocess_features_only(df_raw)
-                        ids_arr = np.asarray(ids).reshape(-1).astype(str)
-
-                        # 2) 학습 컬럼 정렬
-                        X = sanitize_and_align(X, feature_names)
-
-                        # 3) 추론 + SHAP
-                        pd_hat, shap_feats, shap_vals = predict_pd_upload_with_shap(
-                            model, calibrator, model_type, X, top_n=10
+                    elif st.session_state.get("tab4_job_id"):
+                        st.warning("이미 처리 중인 업로드가 있습니다. 완료 후 다시 시도하세요.")
+                    else:
+                        # (B) 백그라운드 작업으로 제출 → 화면은 진행률만 폴링
+                        try:
+                            job_id = submit_upload_job(
+                                uploaded_file.getvalue(),
+                                getattr(uploaded_file, "name", "uploaded_parquet"),
+                            )
+                            _set_upload_job(job_id)
+                            # 업로더도 비워서 “새로 올렸을 때만” 다시 처리되게
+                            st.session_state["tab4_uploader_key"] += 1
+                            st.rerun()
+                        except Exception as e:
+                            st.exception(e)
+
+                # 최근 작업 (다른 사용자 업로드 포함)
+                recent = get_job_runner().recent(5, kind=UPLOAD_JOB_KIND)
+                if recent:
+                    with st.expander("최근 업로드 작업", expanded=False):
+                        st.dataframe(
+                            pd.DataFrame([{
+                                "작업": j.job_id,
+                                "상태": j.status,
+                                "단계": j.stage_label,
+                                "진행률": f"{j.progress:.0%}",
+                                "경과": _format_sec(j.elapsed_sec),
+                                "등록": pd.Timestamp(j.created_at, unit="s").strftime("%m-%d %H:%M:%S"),
+                            } for j in recent]),
+                            use_container_width=True,
+                            hide_index=True,
                         )
 
-                        pd_hat_arr = np.asarray(pd_hat).reshape(-1).astype(float)
-
-                        # 4) 길이 검증
-                        if len(ids_arr) != len(pd_hat_arr):
-                            raise ValueError(f"Length mismatch: ids={len(ids_arr)}, pd_hat={len(pd_hat_arr)}")
-
-                        pred_df = pd.DataFrame({
-                            "sk_id_curr": ids_arr,
-                            "pd_hat": pd_hat_arr,
-                        })
-
-                        # 5) SHAP 컬럼
-                        if shap_feats is not None and shap_vals is not None:
-                            if len(shap_feats) != len(pred_df) or len(shap_vals) != len(pred_df):
-                                raise ValueError(
-                                    f"Length mismatch: pred_df={len(pred_df)}, "
-                                    f"shap_feats={len(shap_feats)}, shap_vals={len(shap_vals)}"
-                                )
-                            pred_df["shap_features"] = list(shap_feats)
-                            pred_df["shap_values"] = list(shap_vals)
-
-                        # 6) HCIS 파생
-                        pred_df = compute_hcis_columns(pred_df, pd_col="pd_hat")
-
-                        # 7) 저장
-                        result_df = pred_df.copy()
-                        result_df["source_file"] = getattr(uploaded_file, "name", "uploaded_parquet")
-
-                        ST_DATA_DIR.mkdir(parents=True, exist_ok=True)
-                        result_df.to_parquet(MODEL_DF_PARQUET, index=False)
-
-                        # 통계 활성화 + 캐시 갱신 키 증가
-                        st.session_state["data_ready"] = True
-                        st.session_state["data_version"] += 1
-
-                        # 캐시 완전 안전빵
-                        st.cache_data.clear()
-
-                        # 세션에 "이번 결과만" 저장해서 화면에 보여주기
-                        st.session_state["tab4_result_df"] = result_df
-
-                        # 업로더도 비워서 “새로 올렸을 때만” 다시 처리되게 하고 싶다면:
-                        st.session_state["tab4_uploader_key"] += 1
-
-                        st.success(f"✅ 처리 완료! 저장됨: {MODEL_DF_PARQUET}")
-                        st.rerun()
-
-                    except Exception as e:
-                        st.exception(e)
-
             # ---------------------------
             # 4) 화면 표시: 세션에 저장된 최신 결과만 보여줌
             # ---------------------------
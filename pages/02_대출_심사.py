@@ -16,13 +16,24 @@ import math
 from pathlib import Path
 from config import (
     APP_TITLE, ID_COL, OFFSET, FACTOR, T_LOW, T_HIGH,
-    MODEL_DF_PARQUET, DEFAULT_SAMPLE_PARQUET, MAPPING_PATH, SCORE_MIN, SCORE_MAX, TOP_N
+    MODEL_DF_PARQUET, DEFAULT_SAMPLE_PARQUET, MAPPING_PATH, SCORE_MIN, SCORE_MAX, TOP_N,
+    REF_INDEX_PATH, REF_SKETCH_PATH, LLM_PREFETCH_K
 )
-from utils.hcis_core import build_map_dict, build_payload_from_team_row, compute_hcis_columns
-from utils.llm_report import render_underwriter_report
+from utils.hcis_core import (
+    build_map_dict, build_payload_from_team_row, compute_hcis_columns,
+    attach_behavioral_insights, build_underwriter_payload,
+)
+from utils.llm_report import render_underwriter_report_stream
 from utils.shap_reason import get_top_reason_items_from_shap_row
-from utils.behavioral_insights import generate_behavioral_insights
-from utils.llm_gemini import ask_underwriter
+from utils.reference_index import load_or_build_reference_index
+from utils.quantile_sketch import FeatureSketches
+from utils.data_loader import data_version_of, build_customer_index
+from utils.customer_search import CustomerSearchIndex, BAND_LABELS
+from utils.stress_test import customer_segments
+from utils.risk_types import risk_type_display
+from modules.model_loader import load_feature_keyword_table
+from utils.llm_gemini import ask_underwriter_stream, get_client_pool, get_circuit_breaker, USE_LLM
+from utils.llm_prefetch import ReportPrefetcher
 
 st.markdown("""
 <style>
@@ -40,25 +51,33 @@ st.set_page_config(page_title=f"{APP_TITLE} | 고객 심사", layout="wide")
 # -----------------------------------------------------------
 # 캐싱된 데이터 로드 및 전처리
 # -----------------------------------------------------------
-@st.cache_data(ttl=3600, show_spinner="데이터 로딩 중...")
-def load_df_work(data_path):
+# 데이터 버전당 1회 로드 → rerun/세션 간 같은 객체 공유 (cache_data처럼 매번 복사하지 않음, 읽기 전용)
+@st.cache_resource(max_entries=2, show_spinner="데이터 로딩 중...")
+def load_df_work(data_path, data_version: str = ""):
     df = pd.read_parquet(data_path)
     df[ID_COL] = df[ID_COL].astype(str)  # 검색 안정화
+    # HCIS 컬럼이 없으면 공통 로직으로 생성 (개요/대출심사 일관성 보장)
+    if ("hcis_score" not in df.columns) or ("band" not in df.columns):
+        # pd_hat 컬럼명이 다르면 여기만 바꾸면 됨
+        df = compute_hcis_columns(df, pd_col="pd_hat")
     return df
 
 # -----------------------------------------------------------
 # 운영 테이블 우선 로드 (개요 Tab4 업로드 결과: st_data/model_df.parquet)
 # -----------------------------------------------------------
 DATA_SRC = None
+DATA_PATH = None
 df_work = None
 
 if MODEL_DF_PARQUET.exists():
     DATA_SRC = f"st_data ({MODEL_DF_PARQUET.as_posix()})"
-    df_work = load_df_work(MODEL_DF_PARQUET)
+    DATA_PATH = MODEL_DF_PARQUET
+    df_work = load_df_work(MODEL_DF_PARQUET, data_version_of(MODEL_DF_PARQUET))
 
 elif DEFAULT_SAMPLE_PARQUET.exists():
     DATA_SRC = f"st_data default ({DEFAULT_SAMPLE_PARQUET.as_posix()})"
-    df_work = load_df_work(DEFAULT_SAMPLE_PARQUET)
+    DATA_PATH = DEFAULT_SAMPLE_PARQUET
+    df_work = load_df_work(DEFAULT_SAMPLE_PARQUET, data_version_of(DEFAULT_SAMPLE_PARQUET))
 
 else:
     st.info("📂 데이터가 없습니다. 샘플을 로드하거나 업로드 후 처리해 주세요.")
@@ -67,13 +86,6 @@ else:
 if df_work is None:
     st.stop()
 
-# -----------------------------------------------------------
-# HCIS 컬럼이 없으면 공통 로직으로 생성 (개요/대출심사 일관성 보장)
-# -----------------------------------------------------------
-if ("hcis_score" not in df_work.columns) or ("band" not in df_work.columns):
-    # pd_hat 컬럼명이 다르면 여기만 바꾸면 됨
-    df_work = compute_hcis_columns(df_work, pd_col="pd_hat")
-
 # -----------------------------------------------------------
 # UI
 # -----------------------------------------------------------
@@ -84,22 +96,113 @@ st.caption("샘플 데이터를 로드하셨다면 왼쪽 고객 검색에 43547
 
 # -----------------------------------------------------------
 # 고객 선택 (사이드바)
+# - 데이터 버전당 1회: 고객 ID → 행 위치 인덱스 (조회는 dict 1회 + iloc)
+# - 캐시 키는 data_version, DataFrame 인자(_df)는 해시하지 않음
+# - load_df_work와 같이 최근 2개 버전만 보관 (업로드마다 전체 크기 인덱스가 쌓이지 않게)
 # -----------------------------------------------------------
-id_list = df_work[ID_COL].dropna().astype(str).unique().tolist()
+DATA_VERSION = data_version_of(DATA_PATH)
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_customer_index(data_version: str, _df: pd.DataFrame) -> dict:
+    return build_customer_index(_df, ID_COL)
+
+customer_index = get_customer_index(DATA_VERSION, df_work)
+
+# 추가검토 대상 순서(margin 내림차순) - 추가검토 대상 페이지와 같은 순서
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_review_order(data_version: str, _df: pd.DataFrame):
+    review = _df[_df["band"] == "추가검토"]
+    order = review.sort_values("margin_score", ascending=False)[ID_COL].astype(str).tolist()
+    return order, {cid: i for i, cid in enumerate(order)}
+
+review_order, review_rank = get_review_order(DATA_VERSION, df_work)
+
+def next_review_ids(current_id, k: int) -> list:
+    """현재 고객 다음 k명(추가검토 순서). 현재 고객이 목록에 없으면 맨 앞부터"""
+    start = review_rank[current_id] + 1 if current_id in review_rank else 0
+    return review_order[start:start + k]
+
+def _go_next_review():
+    nxt = next_review_ids(st.session_state.get("customer_id_input") or None, 1)
+    if nxt:
+        st.session_state["customer_id_input"] = nxt[0]
+
+@st.cache_resource
+def get_map_dict(mapping_path: str):
+    return build_map_dict(Path(mapping_path))
+
+# 고객 검색 인덱스 (정렬 ID 배열 + band/리스크 타입/점수) - 데이터 버전당 1회
+SEARCH_PAGE_SIZE = 30
+
+@st.cache_resource(show_spinner="고객 검색 인덱스 생성 중...", max_entries=2)
+def get_search_index(data_version: str, _df: pd.DataFrame) -> CustomerSearchIndex:
+    review_mask = (_df["band"] == "추가검토").to_numpy()
+    risk_keys = np.full(len(_df), None, dtype=object)
+    if review_mask.any():
+        try:
+            keyword_table = load_feature_keyword_table()
+        except Exception:
+            keyword_table = None
+        risk_keys[review_mask] = customer_segments(
+            _df[review_mask], get_map_dict(str(MAPPING_PATH)), by="risk_type", keyword_table=keyword_table
+        )
+    return CustomerSearchIndex.build(_df, id_col=ID_COL, risk_type_keys=risk_keys)
+
+search_index = get_search_index(DATA_VERSION, df_work)
+
+def _pick_candidate():
+    pick = st.session_state.get("customer_pick")
+    if pick:
+        st.session_state["customer_id_input"] = pick
 
 with st.sidebar:
     st.subheader("🔍 고객 검색")
-    selected_id = st.text_input("고객 ID를 입력하세요 (6자리)", max_chars=6)
-
-    if selected_id:
-        if not selected_id.isdigit() or len(selected_id) != 6:
-            st.warning("❌ 6자리 숫자만 입력 가능합니다")
-            selected_id = None
-        elif selected_id not in id_list:
-            st.info("⚠️ 해당 ID가 존재하지 않습니다")
-            selected_id = None
+    query = st.text_input(
+        "고객 ID를 입력하세요 (6자리, 앞자리만 입력하면 후보 검색)", max_chars=6, key="customer_id_input"
+    ).strip()
+    st.button("다음 추가검토 고객 ▶", on_click=_go_next_review, disabled=not review_order)
+
+    with st.expander("검색 필터", expanded=False):
+        f_bands = st.multiselect("판정", list(BAND_LABELS), key="search_bands")
+        f_types = st.multiselect(
+            "리스크 타입 (추가검토)", list(search_index.risk_labels), format_func=risk_type_display, key="search_types"
+        )
+        f_score = st.slider(
+            "HCIS 점수", float(SCORE_MIN), float(SCORE_MAX), (float(SCORE_MIN), float(SCORE_MAX)), step=1.0,
+            key="search_score",
+        )
+        c_lo, c_hi = st.columns(2)
+        id_lo = c_lo.text_input("ID 시작", key="search_id_min").strip()
+        id_hi = c_hi.text_input("ID 끝", key="search_id_max").strip()
+
+    selected_id = None
+    if query and query in customer_index:
+        selected_id = query
+    elif query and not query.isdigit():
+        st.warning("❌ 숫자만 입력 가능합니다")
     else:
-        selected_id = None
+        score_on = f_score != (float(SCORE_MIN), float(SCORE_MAX))
+        if query or f_bands or f_types or score_on or id_lo or id_hi:
+            page_no = st.number_input("페이지", min_value=1, value=1, step=1, key="search_page")
+            res = search_index.search(
+                prefix=query,
+                id_min=int(id_lo) if id_lo.isdigit() else None,
+                id_max=int(id_hi) if id_hi.isdigit() else None,
+                bands=f_bands,
+                risk_types=f_types,
+                score_min=f_score[0] if score_on else None,
+                score_max=f_score[1] if score_on else None,
+                page=int(page_no) - 1,
+                page_size=SEARCH_PAGE_SIZE,
+            )
+            if res.total == 0:
+                st.info("⚠️ 해당 ID가 존재하지 않습니다" if len(query) == 6 else "⚠️ 조건에 맞는 고객이 없습니다")
+            else:
+                st.caption(f"후보 {res.total:,}명 · {res.page + 1}/{res.n_pages} 페이지")
+                st.selectbox(
+                    "후보 고객", res.ids, index=None, placeholder="고객 선택",
+                    key="customer_pick", on_change=_pick_candidate,
+                )
 
 if selected_id is None:
     st.info("👆 사이드바에서 고객 ID를 입력해주세요")
@@ -108,14 +211,11 @@ if selected_id is None:
 # -----------------------------------------------------------
 # 고객 데이터 추출 및 계산 (캐싱)
 # -----------------------------------------------------------
-@st.cache_resource
-def get_map_dict(mapping_path: str):
-    return build_map_dict(Path(mapping_path))
-
 @st.cache_data(show_spinner=False)
-def get_customer_analysis(df: pd.DataFrame, cid, mapping_path):
+def get_customer_analysis(data_version: str, cid, mapping_path, _df: pd.DataFrame):
     """
-    고객 데이터 추출 + HCIS payload 생성까지 한 번에 처리 (캐싱)
+    고객 데이터 추출 + HCIS payload 생성까지 한 번에 처리 (캐싱: 데이터 버전 + 고객 ID)
+    - 행은 고객 인덱스 위치로 바로 가져옴 (전체 복사/스캔 없음)
     반환:
       - row_dict: 고객 row (dict)
       - payload: hcis_core payload (dict)
@@ -125,20 +225,15 @@ def get_customer_analysis(df: pd.DataFrame, cid, mapping_path):
       - pos_pct: SCORE_MIN~MAX 기준 위치(%)
       - margin: cutoff 대비 마진
     """
-    df_idx = df.copy()
-    df_idx[ID_COL] = df_idx[ID_COL].astype(str)
     cid = str(cid)
-
-    matched = df_idx[df_idx[ID_COL] == cid]
-    if matched.empty:
+    pos = get_customer_index(data_version, _df).get(cid)
+    if pos is None:
         raise KeyError(f"{ID_COL}={cid} 고객을 찾지 못했습니다.")
-    if len(matched) > 1:
-        matched = matched.iloc[[0]]
 
-    row_series = matched.iloc[0]
+    row_series = _df.iloc[pos]
     row_dict = row_series.to_dict()
 
-    map_dict = build_map_dict(mapping_path)
+    map_dict = get_map_dict(str(mapping_path))
 
     payload = build_payload_from_team_row(
         row=row_series,
@@ -177,22 +272,80 @@ def get_customer_analysis(df: pd.DataFrame, cid, mapping_path):
     pos_pct = (score - SCORE_MIN) / (SCORE_MAX - SCORE_MIN)
     pos_pct = float(np.clip(pos_pct, 0, 1) * 100)
 
-    return row_series, row_dict, payload, score, band, action, pos_pct, margin, map_dict
+    return row_series, row_dict, payload, score, band, action, pos_pct, margin
 
-row_series, row, payload, score, band, action, pos_pct, margin, map_dict = get_customer_analysis(
-    df=df_work,
+row_series, row, payload, score, band, action, pos_pct, margin = get_customer_analysis(
+    data_version=DATA_VERSION,
     cid=selected_id,
-    mapping_path=MAPPING_PATH,
+    mapping_path=str(MAPPING_PATH),
+    _df=df_work,
 )
+map_dict = get_map_dict(str(MAPPING_PATH))
+
+# 분위 참조 인덱스: 데이터 버전당 1회 생성(디스크 저장) 후 재사용
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_reference_index(data_path: str, data_version: str):
+    return load_or_build_reference_index(load_df_work(Path(data_path), data_version), REF_INDEX_PATH, data_version)
+
+# 업로드 처리 때 만든 분위 스케치: 지금 model_df와 같은 data_version으로 만든 것일 때만 사용
+# (샘플 로드/다른 업로드로 교체된 뒤 남은 스케치는 무시하고 정렬 인덱스 사용)
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_reference_sketches(sketch_version: str):
+    return FeatureSketches.load(REF_SKETCH_PATH)
+
+ref_index = None
+if REF_SKETCH_PATH.exists():
+    try:
+        sketches = get_reference_sketches(data_version_of(REF_SKETCH_PATH))
+        if sketches.data_version == data_version_of(DATA_PATH) and sketches.sketches:
+            ref_index = sketches
+    except Exception:
+        pass  # 손상 파일이면 정렬 인덱스로
+if ref_index is None:
+    ref_index = get_reference_index(str(DATA_PATH), data_version_of(DATA_PATH))
+
+# model_df 전체 분포(정렬 인덱스)로 분위(높은편/낮은편) 판별
+payload = attach_behavioral_insights(payload, row_series, ref_index=ref_index, top_k=5)
 
-payload["behavioral_insights"] = generate_behavioral_insights(
-    row_series,
-    shap_top_10=payload.get("shap_top_10"),
-    ref_df=df_work,   # model_df 전체를 넣어 분위(높은편/낮은편) 판별에 사용
-    top_k=5
-)
-
-under = ask_underwriter(payload)
+# -----------------------------------------------------------
+# 다음 추가검토 고객 리포트 백그라운드 선생성
+# - 현재 고객 화면을 보는 동안 다음 K명 리포트를 캐시에 미리 저장 → 넘겨볼 때 대기 없음
+# -----------------------------------------------------------
+# - 작업 슬롯은 세션마다 1개(다른 심사자의 작업을 취소하지 않음), 토큰 버킷만 프로세스 공용
+def get_prefetcher() -> ReportPrefetcher:
+    if "report_prefetcher" not in st.session_state:
+        st.session_state["report_prefetcher"] = ReportPrefetcher()
+    return st.session_state["report_prefetcher"]
+
+if USE_LLM:
+    with st.sidebar:
+        # 공용 클라이언트 상태 (헬스체크 결과는 풀에서 TTL 동안 재사용 → rerun마다 호출하지 않음)
+        llm_ok, llm_msg = get_client_pool().health_check()
+        breaker_state = get_circuit_breaker().state
+        if llm_ok and breaker_state == "closed":
+            st.caption("AI 연결 상태: 정상")
+        else:
+            st.caption(f"AI 연결 상태: 점검 필요 ({'차단 중' if breaker_state != 'closed' else llm_msg[:60]})")
+        do_prefetch = st.toggle("다음 고객 리포트 미리 생성", value=True)
+        prefetch_k = st.number_input("미리 생성할 고객 수", min_value=1, max_value=20, value=LLM_PREFETCH_K)
+
+    prefetcher = get_prefetcher()
+    if do_prefetch:
+        next_ids = next_review_ids(selected_id, int(prefetch_k))
+        if next_ids and not prefetcher.has_job(next_ids):
+            prefetch_payloads = [
+                build_underwriter_payload(df_work.iloc[customer_index[cid]], map_dict, ref_index=ref_index)
+                for cid in next_ids if cid in customer_index
+            ]
+            prefetcher.prefetch(next_ids, prefetch_payloads)
+        stt = prefetcher.status()
+        st.sidebar.caption(
+            f"선생성 {stt['done']}/{stt['total']} "
+            f"(신규 {stt['ok']} · 캐시 {stt['cached']} · 실패 {stt['error']})"
+            + (" · 진행 중" if stt["running"] else "")
+        )
+    else:
+        prefetcher.cancel()
 
 # -----------------------------------------------------------
 # 심사 결과 (상단)
@@ -435,17 +588,25 @@ with st.container():
     st.subheader("🧠 심사팀 AI 코멘트")
 
     if st.button("심사팀 코멘트 생성", type="primary"):
-        with st.spinner("Gemini 생성 중..."):
-            under = ask_underwriter(payload)
-            if under.get("_mode") == "demo":
-                st.info("🧪 데모 모드로 AI 코멘트를 생성했습니다. (API Key 미설정)")
-            render_underwriter_report(
-                under=under,
-                band=band,
-                score=score,
-                margin=margin
-            )
+        # 스트리밍: 완성된 섹션부터 바로 표시 (캐시 적중이면 한 번에 표시)
+        llm_input_stats = {}
+        notice = st.empty()
+        under = render_underwriter_report_stream(
+            ask_underwriter_stream(payload, stats=llm_input_stats),
+            band=band,
+            score=score,
+            margin=margin
+        )
+        if under.get("_mode") == "demo":
+            notice.info("🧪 데모 모드로 AI 코멘트를 생성했습니다. (API Key 미설정)")
+        elif under.get("_mode") == "fallback":
+            notice.warning(f"⚠️ AI 서비스 장애로 임시 요약을 표시합니다. ({under.get('_error', '')})")
         with st.expander("🔧 원본 JSON 보기(디버깅/로그용)", expanded=False):
+            if llm_input_stats:
+                st.caption(
+                    f"LLM 입력 크기: {llm_input_stats['chars_before']:,}자 → {llm_input_stats['chars_after']:,}자 "
+                    f"(추정 토큰 {llm_input_stats['tokens_before']:,} → {llm_input_stats['tokens_after']:,})"
+                )
             st.json(under)
 
         st.markdown("### 🧠 고객 행태 기반 해석")
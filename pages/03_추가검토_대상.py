@@ -5,19 +5,42 @@ import pandas as pd
 from pathlib import Path
 
 from config import (
-    APP_TITLE, ID_COL, OFFSET, FACTOR, T_LOW, T_HIGH,
-    MODEL_DF_PARQUET, DEFAULT_SAMPLE_PARQUET, MAPPING_PATH, TOP_N
+    APP_TITLE, ID_COL,
+    MODEL_DF_PARQUET, DEFAULT_SAMPLE_PARQUET, MAPPING_PATH
 )
 
-from utils.hcis_core import build_map_dict, build_payload_from_team_row, compute_hcis_columns
-from utils.shap_reason import get_top_reason_items_from_shap_row
+from utils.hcis_core import build_map_dict
 from utils.risk_types import (
     RISK_TYPES,
-    classify_review_payload,
+    classify_review_batch,
     risk_type_display,
     risk_type_guidance,
 )
-from utils.review_simulation import SimParams, simulate_type_based_conversion, summarize_candidates_by_type
+from utils.review_table import (
+    BASE_COLS,
+    PASSTHROUGH_COLS,
+    REVIEW_SORT_COLUMNS,
+    ReviewTablePager,
+    ensure_review_table,
+    load_review_table,
+    review_table_columns,
+    review_table_meta,
+    signal_columns,
+    signals_from_table,
+)
+from modules.model_loader import load_feature_keyword_table
+from utils.cache_registry import current_cache_version
+from utils.review_simulation import (
+    SimParams,
+    simulate_type_based_conversion,
+    simulate_profit_grid,
+    simulate_conversion_monte_carlo,
+    summarize_candidates_by_type,
+    expected_review_profit,
+    has_customer_ead,
+    ReviewCapacityPlan,
+    DEFAULT_CONV_RATE_BY_TYPE,
+)
 
 
 
@@ -41,134 +64,110 @@ st.caption("추가검토 구간 고객을 '점수 줄세우기'가 아니라 '
 
 
 # -----------------------------------------------------------
-# Data load
+# Mapping / keyword table (사이드카가 없을 때 1회 생성용)
 # -----------------------------------------------------------
-@st.cache_data(ttl=3600, show_spinner="데이터 로딩 중...")
-def load_df_work(data_path: Path) -> pd.DataFrame:
-    df = pd.read_parquet(data_path)
-    df[ID_COL] = df[ID_COL].astype(str)
-    return df
+@st.cache_resource
+def get_map_dict_cached(mapping_path: str):
+    return build_map_dict(Path(mapping_path))
+
+def get_keyword_table():
+    # 아티팩트가 없거나 로드 실패 시 None → 분류기가 feature별로 즉석 계산
+    try:
+        return load_feature_keyword_table()
+    except Exception:
+        return None
+
+
+# -----------------------------------------------------------
+# Data load: 추가검토 분류 테이블(사이드카 parquet)에서 필요한 컬럼만
+# -----------------------------------------------------------
+@st.cache_resource(max_entries=2, show_spinner="추가검토 분류 테이블 로딩 중...")
+def load_review_base(data_path: str, data_version: str, policy: str, mapping_path: str):
+    """
+    (data_version, policy_hash) 키 사이드카 → (시뮬레이션용 df, ReviewSignals, 메타, 후보 표 pager).
+    업로드 처리 때 이미 만들어져 있으면 읽기만, 없으면(기본 샘플 등) 여기서 한 번 생성.
+    반환 객체는 세션 간 공유 → 화면 코드에서 수정하지 않음
+    (사유 문구 등 표시 컬럼은 pager가 페이지 단위로만 꺼냄)
+    """
+    path = ensure_review_table(
+        Path(data_path), data_version, get_map_dict_cached(mapping_path),
+        keyword_table=get_keyword_table(), policy=policy,
+    )
+    cols = review_table_columns(path)
+    sim_cols = [c for c in BASE_COLS if c != "top_reasons"] + list(PASSTHROUGH_COLS)
+    base = load_review_table(path, columns=sim_cols + signal_columns(cols))
+    return base, signals_from_table(base), review_table_meta(path), ReviewTablePager.from_path(path)
+
 
 DATA_SRC = None
-df_work = None
+DATA_PATH = None
 
 if MODEL_DF_PARQUET.exists():
     DATA_SRC = f"st_data ({MODEL_DF_PARQUET.as_posix()})"
-    df_work = load_df_work(MODEL_DF_PARQUET)
+    DATA_PATH = MODEL_DF_PARQUET
 
 elif DEFAULT_SAMPLE_PARQUET.exists():
     DATA_SRC = f"st_data default ({DEFAULT_SAMPLE_PARQUET.as_posix()})"
-    df_work = load_df_work(DEFAULT_SAMPLE_PARQUET)
+    DATA_PATH = DEFAULT_SAMPLE_PARQUET
 
 else:
     st.info("📂 데이터가 없습니다. 샘플을 로드하거나 업로드 후 처리해 주세요.")
     st.caption("기본 샘플: st_data/model_df_default.parquet")
+    st.stop()
 
 
 st.caption(f"데이터 소스: `{DATA_SRC}`")
 
-# HCIS 컬럼 보정
-if ("hcis_score" not in df_work.columns) or ("band" not in df_work.columns):
-    df_work = compute_hcis_columns(df_work, pd_col="pd_hat")
-
-# -----------------------------------------------------------
-# Filter: Review band
-# -----------------------------------------------------------
-df_review = df_work[df_work["band"] == "추가검토"].copy()
+CACHE_VERSION = current_cache_version()
+review_base, review_signals, review_meta, review_pager = load_review_base(
+    str(DATA_PATH), CACHE_VERSION.data_version, CACHE_VERSION.policy_hash, str(MAPPING_PATH)
+)
+n_total = int(review_meta.get("total_rows", len(review_base)))
 
 # 상단 KPI
 c1, c2, c3, c4 = st.columns(4)
 with c1:
-    st.metric("전체 고객", f"{len(df_work):,}")
+    st.metric("전체 고객", f"{n_total:,}")
 with c2:
-    st.metric("추가검토 고객", f"{len(df_review):,}")
+    st.metric("추가검토 고객", f"{len(review_base):,}")
 with c3:
-    rate = (len(df_review) / max(len(df_work), 1)) * 100
+    rate = (len(review_base) / max(n_total, 1)) * 100
     st.metric("추가검토 비중", f"{rate:.2f}%")
 with c4:
-    if len(df_review) > 0:
-        st.metric("추가검토 평균 HCIS", f"{df_review['hcis_score'].mean():.1f}")
+    if len(review_base) > 0:
+        st.metric("추가검토 평균 HCIS", f"{review_base['hcis_score'].mean():.1f}")
     else:
         st.metric("추가검토 평균 HCIS", "-")
 
-if df_review.empty:
+if review_base.empty:
     st.info("추가검토 고객이 없습니다. 개요에서 업로드/추론 후 다시 확인하세요.")
     st.stop()
 
 
-# -----------------------------------------------------------
-# Mapping + Classification (cache)
-# -----------------------------------------------------------
-@st.cache_resource
-def get_map_dict_cached(mapping_path: str):
-    return build_map_dict(Path(mapping_path))
-
-@st.cache_data(show_spinner="추가검토 고객 분류 중...")
-def classify_review_rows(df: pd.DataFrame, mapping_path: str) -> pd.DataFrame:
-    map_dict = get_map_dict_cached(mapping_path)
-
-    rows = []
-    for _, r in df.iterrows():
-        row_series = r  # pd.Series
-
-        # payload: SHAP bundle + group contribution까지 포함
-        payload = build_payload_from_team_row(
-            row=row_series,
-            map_dict=map_dict,
-            id_col=ID_COL,
-            t_low=T_LOW,
-            t_high=T_HIGH,
-            offset=OFFSET,
-            factor=FACTOR,
-            top_n_use=TOP_N,
-            top_features_col="shap_features",
-            top_values_col="shap_values",
-        )
-
-        rt_key, dbg = classify_review_payload(payload)
-
-        # UI용 top reasons (간단 문장 10개)
-        reasons_txt = get_top_reason_items_from_shap_row(
-            row_series,
-            map_dict,
-            top_k=TOP_N,
-            top_features_col="shap_features",
-            top_values_col="shap_values",
-            only_risk_positive=True,
-        )
-
-        rows.append(
-            {
-                "sk_id_curr": str(row_series.get(ID_COL)),
-                "hcis_score": float(payload.get("hcis_score", np.nan)),
-                "margin_score": float(payload.get("policy", {}).get("margin_score", np.nan)),
-                "pd_hat": float(payload.get("pd_hat", np.nan)),
-                "risk_type_key": rt_key,
-                "risk_type": risk_type_display(rt_key),
-                "dominant_group": dbg.get("dominant_group"),
-                "credit_pct": dbg.get("credit_pct"),
-                "docs_pct": dbg.get("docs_pct"),
-                "capacity_pct": dbg.get("capacity_pct"),
-                "emp_pct": dbg.get("emp_pct"),
-                "top_reasons": " / ".join([it["text"] for it in reasons_txt]) if reasons_txt else "",
-            }
-        )
-
-    out = pd.DataFrame(rows)
-
-    # 정렬: 마진 큰 순(승인에 더 가까운 추가검토) 우선
-    if "margin_score" in out.columns:
-        out = out.sort_values("margin_score", ascending=False, na_position="last")
-
-    return out
-
-
-df_classified = classify_review_rows(df_review[[c for c in df_review.columns]].copy(), MAPPING_PATH)
+with st.expander("⚙️ 리스크 타입 분류 기준(임계값)", expanded=False):
+    t1, t2, t3, t4 = st.columns(4)
+    with t1:
+        credit_th = st.number_input("신용 우세(%)", min_value=0.0, max_value=100.0, value=45.0, step=1.0)
+    with t2:
+        docs_th = st.number_input("서류 우세(%)", min_value=0.0, max_value=100.0, value=30.0, step=1.0)
+    with t3:
+        cap_th = st.number_input("상환여력 우세(%)", min_value=0.0, max_value=100.0, value=35.0, step=1.0)
+    with t4:
+        emp_th = st.number_input("고용 우세(%)", min_value=0.0, max_value=100.0, value=25.0, step=1.0)
+
+review_thresholds = dict(
+    credit_dom_threshold=credit_th,
+    docs_dom_threshold=docs_th,
+    emp_dom_threshold=emp_th,
+    capacity_dom_threshold=cap_th,
+)
+# 임계값 기준 재분류 (벡터 연산, 행 순서 = 사이드카 행 순서)
+review_result = classify_review_batch(review_signals, **review_thresholds)
 
 st.markdown("---")
 st.subheader("📈 추가검토 승인 전환 시뮬레이션 (Risk Type 기반)")
 
-# df_classified에는 risk_type_key가 있고, pd_hat / (있으면 target) 도 있음
+# df_for_sim에는 risk_type_key가 있고, pd_hat / (있으면 target) 도 있음
 # 후보 타입 기본값: Type2/Type3/Type4
 default_types = ["TYPE2_DOCS_UNCERTAINTY", "TYPE3_SPENDING_IMBALANCE", "TYPE4_EMPLOYMENT_LIFECYCLE"]
 
@@ -187,6 +186,12 @@ with st.expander("설정 / 가정", expanded=True):
     with c5:
         review_cost = st.number_input("추가검토 운영비용(후보 1건당, 원)", min_value=0, value=10_000, step=1_000)
 
+    if not has_customer_ead(review_base.columns):
+        st.caption(
+            "ℹ️ 현재 데이터에 amt_credit(또는 amt_annuity·app_payment_rate) 컬럼이 없어 "
+            "고객 단위 계산도 모든 고객에 위 EAD를 동일하게 사용합니다. (업로드 처리 결과에는 포함)"
+        )
+
     type_options = list(RISK_TYPES.keys())
     include_types = st.multiselect(
         "승인 전환 후보 타입(확인으로 해소 가능한 유형을 선택)",
@@ -200,31 +205,64 @@ with st.expander("설정 / 가정", expanded=True):
         default=[0.3, 0.5, 0.7],
     )
 
+    c6, c7 = st.columns(2)
+    with c6:
+        apr_grid = st.multiselect(
+            "APR 시나리오(고객 단위 그리드)",
+            options=[0.06, 0.08, 0.10, 0.12, 0.14, 0.16],
+            default=[0.08, 0.10, 0.12],
+        )
+    with c7:
+        lgd_grid = st.multiselect(
+            "LGD 시나리오(고객 단위 그리드)",
+            options=[0.45, 0.60, 0.75],
+            default=[0.60],
+        )
+
+    c8, c9 = st.columns(2)
+    with c8:
+        use_mc = st.checkbox("Monte Carlo 신뢰구간 계산", value=False)
+    with c9:
+        mc_reps = st.number_input("반복 횟수", min_value=100, max_value=50_000, value=2_000, step=500)
+
 params = SimParams(
     ead=float(ead),
     apr=float(apr),
     tenor_months=int(tenor),
     lgd=float(lgd),
     review_cost_per_case=float(review_cost),
-    target_col="target" if "target" in df_review.columns else None
+    target_col="target" if "target" in review_base.columns else None
 )
 
+# 사이드카 기본 컬럼(pd_hat/margin/target/금액) + 현재 임계값 기준 risk_type_key (테이블 행 순서)
+df_for_sim = review_base.assign(risk_type_key=review_result.keys)
+
 # 타입별 후보 현황 요약
 st.markdown("#### 후보 타입 현황(추가검토 내)")
-cand_summary = summarize_candidates_by_type(df_review.merge(
-    df_classified[[ID_COL, "risk_type_key"]], on=ID_COL, how="left"
-), type_col="risk_type_key", pd_col="pd_hat")
+cand_summary = summarize_candidates_by_type(df_for_sim, type_col="risk_type_key", pd_col="pd_hat")
 st.dataframe(cand_summary, use_container_width=True, hide_index=True)
 
-# 시뮬레이션 실행
-if st.button("시뮬레이션 실행", type="primary"):
-    # df_review(원본) + risk_type_key 조인
-    df_for_sim = df_review.merge(
-        df_classified[[ID_COL, "risk_type_key"]],
-        on=ID_COL,
-        how="left"
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def run_monte_carlo(
+    data_version: str, thresholds: tuple, params: SimParams, include_types: tuple, conv_rates: tuple,
+    n_reps: int, _df_for_sim: pd.DataFrame,
+) -> pd.DataFrame:
+    # 같은 (데이터, 임계값, 가정, 반복 횟수)로 다시 누르면 추출을 반복하지 않음
+    return simulate_conversion_monte_carlo(
+        _df_for_sim,
+        include_types=list(include_types),
+        conv_rates=list(conv_rates),
+        params=params,
+        n_reps=n_reps,
+        pd_col="pd_hat",
+        type_col="risk_type_key",
     )
 
+
+# 시뮬레이션 실행
+if st.button("시뮬레이션 실행", type="primary"):
     res = simulate_type_based_conversion(
         df_for_sim,
         include_types=include_types,
@@ -245,14 +283,115 @@ if st.button("시뮬레이션 실행", type="primary"):
         f"순이익 {best['net_profit']:,.0f}원"
     )
 
+    # 고객별 PD/EAD 기반 그리드 (전환율 × 타입 × APR × LGD)
+    grid = simulate_profit_grid(
+        df_for_sim,
+        include_types=include_types,
+        conv_rates=sorted(conv_rates),
+        params=params,
+        aprs=sorted(apr_grid) or None,
+        lgds=sorted(lgd_grid) or None,
+        pd_col="pd_hat",
+        type_col="risk_type_key",
+    )
+
+    st.markdown("#### 고객 단위 손익 그리드 (선택 타입 합계)")
+    grid_all = grid[grid["risk_type_key"] == "ALL"]
+    st.dataframe(
+        grid_all.pivot_table(index=["conv_rate", "lgd"], columns="apr", values="net_profit"),
+        use_container_width=True,
+    )
+    with st.expander("타입별 상세 그리드"):
+        st.dataframe(grid[grid["risk_type_key"] != "ALL"], use_container_width=True, hide_index=True)
+
+    if use_mc:
+        with st.spinner("Monte Carlo 시뮬레이션 중..."):
+            mc = run_monte_carlo(
+                CACHE_VERSION.data_version,
+                tuple(sorted(review_thresholds.items())),
+                params,
+                tuple(include_types),
+                tuple(sorted(conv_rates)),
+                int(mc_reps),
+                df_for_sim,
+            )
+        st.markdown("#### Monte Carlo 결과 (순이익 / 전환 고객 부도율 구간)")
+        st.dataframe(mc, use_container_width=True, hide_index=True)
+
+# -----------------------------------------------------------
+# 검토 처리용량 최적화
+# -----------------------------------------------------------
+st.markdown("---")
+st.subheader("🧮 검토 처리용량 최적화")
+st.caption("고객별 기대 한계이익 = 타입별 확인 성공률 × (이자수익 − 기대손실) − 건당 검토비용. 처리 가능 건수 내에서 이익이 큰 순서로 선택합니다.")
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def build_capacity_plan(
+    data_version: str, thresholds: tuple, params: SimParams, conv_rate_items: tuple, _df_for_sim: pd.DataFrame
+) -> ReviewCapacityPlan:
+    # 키는 (data_version, 분류 임계값, 가정) → 매 rerun마다 df_for_sim을 해시하지 않음
+    profit = expected_review_profit(
+        _df_for_sim,
+        params=params,
+        conv_rate_by_type=dict(conv_rate_items),
+        pd_col="pd_hat",
+        type_col="risk_type_key",
+    )
+    return ReviewCapacityPlan.build(profit)
+
+
+with st.expander("타입별 확인 성공률 가정", expanded=False):
+    rate_cols = st.columns(len(DEFAULT_CONV_RATE_BY_TYPE))
+    conv_rate_by_type = {}
+    for col, (tkey, default_rate) in zip(rate_cols, DEFAULT_CONV_RATE_BY_TYPE.items()):
+        with col:
+            conv_rate_by_type[tkey] = st.number_input(
+                RISK_TYPES[tkey].name if tkey in RISK_TYPES else tkey, min_value=0.0, max_value=1.0,
+                value=float(default_rate), step=0.05, format="%.2f", key=f"cap_rate_{tkey}",
+            )
+
+plan = build_capacity_plan(
+    CACHE_VERSION.data_version,
+    tuple(sorted(review_thresholds.items())),
+    params,
+    tuple(sorted(conv_rate_by_type.items())),
+    df_for_sim,
+)
+
+if len(plan.order) == 0:
+    st.info("기대 한계이익이 양(+)인 후보가 없습니다. 확인 성공률/비용 가정을 조정해 보세요.")
+else:
+    # 이익(+) 후보 수를 넘는 예산은 추가 선택이 없으므로 상한은 len(plan.order)
+    if len(plan.order) <= 1:
+        st.info(f"이익(+) 후보가 {len(plan.order)}건뿐이라 처리 가능 건수 조정 없이 모두 선택합니다.")
+        capacity = len(plan.order)
+    else:
+        capacity = st.slider(
+            "일일 검토 가능 건수",
+            min_value=1,
+            max_value=int(len(plan.order)),
+            value=int(min(len(plan.order), max(1, len(df_for_sim) // 2))),
+        )
+    selected_idx = plan.select(capacity)
+    k1, k2, k3 = st.columns(3)
+    k1.metric("선택 건수", f"{len(selected_idx):,} / {len(df_for_sim):,}")
+    k2.metric("기대 이익 합계", f"{plan.total_profit(capacity):,.0f}원")
+    k3.metric("이익(+) 후보 수", f"{len(plan.order):,}")
+
+    selected = df_for_sim.iloc[selected_idx][[ID_COL, "risk_type_key", "pd_hat", "margin_score"]].copy()
+    selected.insert(0, "priority", np.arange(1, len(selected) + 1))
+    selected["expected_profit"] = plan.profit[: len(selected)]
+    st.dataframe(selected, use_container_width=True, hide_index=True)
+
 # -----------------------------------------------------------
 # Type 분포
 # -----------------------------------------------------------
 st.markdown("---")
 st.subheader("📌 추가검토 리스크 타입 분포")
 
-counts = df_classified["risk_type"].value_counts().reset_index()
-counts.columns = ["risk_type", "n"]
+type_keys, type_n = np.unique(review_result.keys.astype(str), return_counts=True)
+counts = pd.DataFrame({"risk_type": [risk_type_display(k) for k in type_keys], "n": type_n})
 
 # bar chart
 import altair as alt
@@ -292,11 +431,10 @@ st.subheader("🔎 타입별 후보 조회")
 
 col_f1, col_f2, col_f3 = st.columns([2, 2, 2])
 with col_f1:
-    type_options = ["전체"] + sorted(df_classified["risk_type"].dropna().unique().tolist())
-    sel_type = st.selectbox("Risk Type", type_options, index=0)
+    type_options = ["전체"] + sorted(type_keys.tolist(), key=risk_type_display)
+    sel_type = st.selectbox("Risk Type", type_options, index=0, format_func=lambda k: k if k == "전체" else risk_type_display(k))
 with col_f2:
-    min_hcis = float(df_classified["hcis_score"].min())
-    max_hcis = float(df_classified["hcis_score"].max())
+    min_hcis, max_hcis = review_pager.value_range("hcis_score")
 
     if np.isclose(min_hcis, max_hcis):
         st.info(f"HCIS가 단일 값입니다: {min_hcis:.2f}")
@@ -311,9 +449,7 @@ with col_f2:
 
 with col_f3:
     # 마진은 음수~양수 섞임
-    ms = pd.to_numeric(df_classified["margin_score"], errors="coerce")
-    min_m = float(np.nanmin(ms))
-    max_m = float(np.nanmax(ms))
+    min_m, max_m = review_pager.value_range("margin_score")
 
     # ms가 전부 NaN이거나, 단일 값이면 slider 대신 고정
     if (not np.isfinite(min_m)) or (not np.isfinite(max_m)):
@@ -330,17 +466,38 @@ with col_f3:
             value=(min_m, max_m),
         )
 
+SORT_LABELS = {"margin_score": "마진", "pd_hat": "PD_hat", "hcis_score": "HCIS", "risk_type": "Risk Type"}
+col_s1, col_s2, col_s3 = st.columns([2, 1, 1])
+with col_s1:
+    sort_by = st.selectbox("정렬 기준", REVIEW_SORT_COLUMNS, format_func=SORT_LABELS.get)
+with col_s2:
+    sort_desc = st.toggle("내림차순", value=True)
+with col_s3:
+    page_size = st.selectbox("페이지당 행 수", [25, 50, 100, 200], index=1)
+
+
+review_idx = review_pager.select(
+    review_result.keys,
+    types=None if sel_type == "전체" else [sel_type],
+    hcis_range=hcis_range,
+    margin_range=margin_range,
+    sort_by=sort_by,
+    descending=sort_desc,
+)
+n_pages = max(1, -(-len(review_idx) // page_size))
+page_no = st.number_input(f"페이지 (총 {n_pages:,})", min_value=1, max_value=n_pages, value=1, step=1)
+review_page = review_pager.page(
+    review_idx,
+    review_result.keys,
+    page=int(page_no) - 1,
+    page_size=page_size,
+    dominant_group=review_result.dominant_group(),
+)
 
-filtered = df_classified.copy()
-if sel_type != "전체":
-    filtered = filtered[filtered["risk_type"] == sel_type]
-filtered = filtered[(filtered["hcis_score"] >= hcis_range[0]) & (filtered["hcis_score"] <= hcis_range[1])]
-filtered = filtered[(filtered["margin_score"] >= margin_range[0]) & (filtered["margin_score"] <= margin_range[1])]
-
-st.caption(f"필터 결과: {len(filtered):,}명")
+st.caption(f"필터 결과: {review_page.total:,}명 · {review_page.page + 1}/{review_page.n_pages} 페이지")
 
 # -----------------------------------------------------------
-# Candidate table + drilldown
+# Candidate table + drilldown (현재 페이지 행만 브라우저로 전달)
 # -----------------------------------------------------------
 show_cols = [
     ID_COL,
@@ -353,7 +510,7 @@ show_cols = [
 ]
 
 st.dataframe(
-    filtered[show_cols],
+    review_page.rows[show_cols],
     use_container_width=True,
     hide_index=True,
 )
@@ -361,13 +518,13 @@ st.dataframe(
 st.markdown("<div class='small-muted'>Tip: 아래에서 고객 ID를 선택하면, 개인 심사 페이지에서 해당 ID로 바로 조회할 수 있습니다.</div>", unsafe_allow_html=True)
 
 # -----------------------------------------------------------
-# Drilldown: select one customer
+# Drilldown: select one customer (현재 페이지 안에서)
 # -----------------------------------------------------------
 left, right = st.columns([2, 3])
 
 with left:
     st.markdown("#### 👤 고객 선택")
-    ids = filtered[ID_COL].astype(str).unique().tolist()
+    ids = review_page.rows[ID_COL].astype(str).unique().tolist()
     sel_id = st.selectbox("고객 ID", ids) if ids else None
 
     if sel_id:
@@ -379,7 +536,8 @@ with right:
     if not sel_id:
         st.info("왼쪽에서 고객을 선택해주세요")
     else:
-        row_sel = filtered[filtered[ID_COL] == str(sel_id)].iloc[0]
+        rows_page = review_page.rows
+        row_sel = rows_page[rows_page[ID_COL].astype(str) == str(sel_id)].iloc[0]
         rt_key = row_sel["risk_type_key"]
         spec = RISK_TYPES.get(rt_key)
         guide = risk_type_guidance(rt_key)
@@ -416,3 +574,6 @@ with right:
             for i, t in enumerate(str(row_sel["top_reasons"]).split(" / "), 1):
                 st.write(f"{i}. {t}")
 
+        with st.expander("🔧 분류 근거(디버깅)", expanded=False):
+            st.json(review_result.debug(int(row_sel.name)))
+
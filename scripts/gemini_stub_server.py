@@ -0,0 +1,204 @@
+# scripts/gemini_stub_server.py
+# -----------------------------------------------------------
+# 로컬 Gemini 대역 서버 (배치 생성/재시도/레이트리밋 점검용)
+# - POST /{api_version}/models/{model}:generateContent 만 흉내
+# - 요청 본문의 <INPUT_JSON> payload로 mock_underwriter_response와 같은 형태의 JSON 응답
+# - POST ...:streamGenerateContent?alt=sse 는 같은 응답 JSON을 잘게 나눠 SSE로 전송 (지연은 조각에 분산)
+# - GET .../models/{model} 은 모델 정보(헬스체크용), 그 외 GET은 요청 통계
+# - 묶음 요청({"cases": [{"case_id", "payload"}]})이면 {"reports": [... + case_id]} 로 응답
+# - 지연(평균/표준편차)과 503 비율을 옵션으로 조절 (--fail-first N: 처음 N개 요청은 무조건 503 → 재시도 점검용)
+# - tests/에서 임시 포트로 띄워 재시도/캐시 적중/연결 재사용을 자동 점검
+#
+# 사용 예:
+#   python scripts/gemini_stub_server.py --port 8765 --latency-ms 1500 --error-rate 0.1
+#   GEMINI_API_KEY=dummy GEMINI_BASE_URL=http://127.0.0.1:8765 \
+#     python scripts/generate_review_reports.py --limit 100
+# -----------------------------------------------------------
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from utils.llm_gemini import mock_underwriter_response  # noqa: E402
+
+INPUT_RE = re.compile(r"<INPUT_JSON>\s*(.*?)\s*</INPUT_JSON>", re.S)
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--host", type=str, default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--latency-ms", type=float, default=1200.0, help="mean response latency")
+    p.add_argument("--jitter-ms", type=float, default=400.0, help="latency std-dev")
+    p.add_argument("--error-rate", type=float, default=0.05, help="fraction of 503 responses")
+    p.add_argument("--fail-first", type=int, default=0, help="always return 503 for the first N requests")
+    p.add_argument("--seed", type=int, default=0)
+    return p.parse_args()
+
+
+def _mock_report(payload: dict) -> dict:
+    report = mock_underwriter_response(payload)
+    report.pop("_mode", None)
+    report["summary"] = report["summary"].replace("🧪 데모 모드: ", "").replace(" (API Key 미설정)", "")
+    return report
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = 0    # TCP 연결 수 (keep-alive 재사용 확인용)
+        self.model_gets = 0     # 모델 조회(헬스체크) 요청 수
+
+
+def make_handler(args, stats: Stats, rng: random.Random):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *a):  # 요청마다 로그 출력하지 않음
+            return
+
+        def setup(self):
+            super().setup()
+            with stats.lock:
+                stats.connections += 1
+
+        def _send(self, code: int, body: dict):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_stream(self, text: str, total_delay: float, n_chunks: int = 12):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            step = max(1, -(-len(text) // n_chunks))
+            pieces = [text[i:i + step] for i in range(0, len(text), step)]
+            for k, piece in enumerate(pieces):
+                if k:
+                    time.sleep(total_delay / max(1, len(pieces) - 1))
+                event = {"candidates": [{
+                    "content": {"role": "model", "parts": [{"text": piece}]},
+                    "index": 0,
+                    **({"finishReason": "STOP"} if k == len(pieces) - 1 else {}),
+                }]}
+                data = ("data: " + json.dumps(event, ensure_ascii=False) + "\r\n\r\n").encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+
+        def do_GET(self):
+            # 모델 조회(클라이언트 헬스체크): GET /{api_version}/models/{model}
+            m = re.search(r"/models/([^/?:]+)$", self.path.split("?")[0])
+            if m:
+                with stats.lock:
+                    stats.model_gets += 1
+                self._send(200, {"name": f"models/{m.group(1)}", "displayName": m.group(1)})
+                return
+            # 상태 확인용
+            with stats.lock:
+                self._send(200, {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "max_in_flight": stats.max_in_flight,
+                    "connections": stats.connections,
+                    "model_gets": stats.model_gets,
+                })
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b"{}"
+
+            with stats.lock:
+                stats.requests += 1
+                stats.in_flight += 1
+                stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+                fail = stats.requests <= args.fail_first or rng.random() < args.error_rate
+                delay = max(0.0, rng.gauss(args.latency_ms, args.jitter_ms)) / 1000.0
+            stream = ":streamGenerateContent" in self.path
+            try:
+                # 스트리밍은 첫 조각 전 지연을 짧게, 나머지는 조각 사이에 나눠 보냄
+                time.sleep(delay * (0.15 if stream else 1.0))
+                if not (stream or self.path.endswith(":generateContent")):
+                    self._send(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+                    return
+                if fail:
+                    with stats.lock:
+                        stats.errors += 1
+                    self._send(503, {"error": {
+                        "code": 503,
+                        "message": "The model is overloaded. Please try again later.",
+                        "status": "UNAVAILABLE",
+                    }})
+                    return
+
+                body = json.loads(raw.decode("utf-8") or "{}")
+                text = "".join(
+                    part.get("text", "")
+                    for c in body.get("contents", [])
+                    for part in c.get("parts", [])
+                )
+                m = INPUT_RE.search(text)
+                payload = json.loads(m.group(1)) if m else {}
+                if isinstance(payload.get("cases"), list):
+                    report = {"reports": [
+                        {**_mock_report(c.get("payload") or {}), "case_id": str(c.get("case_id", ""))}
+                        for c in payload["cases"]
+                    ]}
+                else:
+                    report = _mock_report(payload)
+
+                if stream:
+                    self._send_stream(json.dumps(report, ensure_ascii=False), delay * 0.85)
+                    return
+
+                self._send(200, {
+                    "candidates": [{
+                        "content": {"role": "model", "parts": [{"text": json.dumps(report, ensure_ascii=False)}]},
+                        "finishReason": "STOP",
+                        "index": 0,
+                    }],
+                    "usageMetadata": {
+                        "promptTokenCount": len(text) // 3,
+                        "candidatesTokenCount": len(json.dumps(report, ensure_ascii=False)) // 3,
+                    },
+                })
+            finally:
+                with stats.lock:
+                    stats.in_flight -= 1
+
+    return Handler
+
+
+def main():
+    args = parse_args()
+    stats = Stats()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args, stats, random.Random(args.seed)))
+    print(f"[stub] Gemini stand-in listening on http://{args.host}:{args.port} "
+          f"(latency {args.latency_ms:.0f}±{args.jitter_ms:.0f}ms, 503 rate {args.error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"[stub] requests={stats.requests} errors={stats.errors} "
+              f"max_in_flight={stats.max_in_flight} connections={stats.connections}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# scripts/generate_review_reports.py
+# -----------------------------------------------------------
+# 추가검토(기본) band 고객의 심사 리포트를 일괄 생성해 LLM 캐시에 저장
+# - 대출 심사 페이지와 같은 payload(build_underwriter_payload) → 같은 캐시 키
+# - 동시 호출 수 / 분당 요청 한도는 config(LLM_BATCH_WORKERS, LLM_BATCH_RPM) 기본값
+# - --packed: 같은 band 고객을 요청 1건에 묶어 호출 (config LLM_PACK_* 토큰 예산 기준)
+# -----------------------------------------------------------
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd  # noqa: E402
+
+from config import (  # noqa: E402
+    ID_COL, MODEL_DF_PARQUET, DEFAULT_SAMPLE_PARQUET, MAPPING_PATH, REF_INDEX_PATH,
+    LLM_BATCH_WORKERS, LLM_BATCH_RPM,
+)
+from utils.hcis_core import build_map_dict, build_underwriter_payload, compute_hcis_columns  # noqa: E402
+from utils.reference_index import load_or_build_reference_index  # noqa: E402
+from utils.data_loader import data_version_of  # noqa: E402
+from utils.llm_batch import generate_underwriter_reports, summarize_batch  # noqa: E402
+
+
+def parse_args():
+    p = argparse.ArgumentParser()
+    p.add_argument("--data-path", type=str, default="", help="model_df parquet (default: st_data model_df → sample)")
+    p.add_argument("--band", type=str, default="추가검토", help="target band ('all' for every customer)")
+    p.add_argument("--limit", type=int, default=0, help="limit number of customers (margin order)")
+    p.add_argument("--workers", type=int, default=LLM_BATCH_WORKERS)
+    p.add_argument("--rpm", type=float, default=LLM_BATCH_RPM, help="requests per minute")
+    p.add_argument("--no-skip-cached", action="store_true", help="regenerate even if cached")
+    p.add_argument("--packed", action="store_true", help="pack several customers into one request")
+    return p.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.data_path:
+        data_path = Path(args.data_path)
+    else:
+        data_path = MODEL_DF_PARQUET if MODEL_DF_PARQUET.exists() else DEFAULT_SAMPLE_PARQUET
+
+    df = pd.read_parquet(data_path)
+    df[ID_COL] = df[ID_COL].astype(str)
+    if ("hcis_score" not in df.columns) or ("band" not in df.columns):
+        df = compute_hcis_columns(df, pd_col="pd_hat")
+
+    target = df if args.band == "all" else df[df["band"] == args.band]
+    # 경계(컷오프)에 가까운 고객부터
+    target = target.sort_values("margin_score", ascending=False)
+    if args.limit > 0:
+        target = target.head(args.limit)
+
+    map_dict = build_map_dict(MAPPING_PATH)
+    ref_index = load_or_build_reference_index(df, REF_INDEX_PATH, data_version_of(data_path))
+    payloads = [build_underwriter_payload(row, map_dict, ref_index=ref_index) for _, row in target.iterrows()]
+    print(f"[batch] {len(payloads):,} payloads from {data_path} (band={args.band})")
+
+    done = {"n": 0}
+    t0 = time.perf_counter()
+
+    def _progress(res):
+        done["n"] += 1
+        if done["n"] % 10 == 0 or done["n"] == len(payloads):
+            rate = done["n"] / max(time.perf_counter() - t0, 1e-9)
+            print(f"[batch] {done['n']:,}/{len(payloads):,} ({rate:.2f}/s)")
+
+    results = generate_underwriter_reports(
+        payloads,
+        max_workers=args.workers,
+        requests_per_minute=args.rpm,
+        skip_cached=not args.no_skip_cached,
+        on_result=_progress,
+        packed=args.packed,
+    )
+    summary = summarize_batch(results)
+    summary["wall_sec"] = round(time.perf_counter() - t0, 2)
+    print(f"[batch] {summary}")
+    for r in results:
+        if r.status == "error":
+            print(f"[batch] error #{r.index}: {r.error}")
+
+
+if __name__ == "__main__":
+    main()
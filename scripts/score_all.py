@@ -8,8 +8,8 @@ import joblib
 from datetime import datetime
 from modules.inference import predict_pd_only
 from utils.hcis_core import compute_hcis_columns
-
-pd_hat = predict_pd_only(model, calibrator, model_type, df_feat)
+from utils.quantile_sketch import FeatureSketches
+from utils.data_loader import data_version_of
 
 # ✅ 너 프로젝트 모듈에 맞게 바꿔야 하는 import 3개
 # 1) feature mart에서 feat_all 읽기
@@ -31,6 +31,7 @@ def parse_args():
     p.add_argument("--limit", type=int, default=0, help="limit rows for quick test")
     p.add_argument("--chunk-size", type=int, default=50000, help="chunk size for full scoring")
     p.add_argument("--out-path", type=str, default="outputs/score_result.parquet")
+    p.add_argument("--sketch-path", type=str, default="", help="write per-feature quantile sketches (npz) of this run, tagged with the output data_version")
     return p.parse_args()
 
 def ensure_dir(path: str):
@@ -95,6 +96,9 @@ def main():
     out_chunks = []
     seen = 0
 
+    # 행태 해석 분위 스케치: 이번 실행의 chunk만 증분 반영 (기존 파일과 합치면 다른 포트폴리오가 섞임)
+    sketches = FeatureSketches() if args.sketch_path else None
+
     for chunk in it:
         # ✅ 필수 컬럼명: pk
         if "sk_id_curr" not in chunk.columns:
@@ -133,6 +137,9 @@ def main():
         out_chunks.append(res)
         seen += len(chunk)
 
+        if sketches is not None:
+            sketches.update_from_frame(chunk)
+
     if not out_chunks:
         raise RuntimeError("No rows were scored. Check ids filter / input source.")
 
@@ -140,5 +147,11 @@ def main():
     out.to_parquet(args.out_path, index=False)
     print(f"✅ saved: {args.out_path}  rows={len(out):,}")
 
+    if sketches is not None:
+        # 저장된 결과 파일의 data_version을 기록 → 이 파일이 model_df일 때만 심사 화면이 사용
+        sketches.data_version = data_version_of(args.out_path)
+        sketches.save(Path(args.sketch_path))
+        print(f"✅ sketches: {args.sketch_path}  features={len(sketches.sketches)}")
+
 if __name__ == "__main__":
     main()
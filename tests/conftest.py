@@ -0,0 +1,66 @@
+"""
+공용 fixture
+- Gemini 클라이언트는 GEMINI_API_KEY가 있을 때만 만들어지므로 utils.llm_gemini import 전에 더미 키 설정
+- stub_server: scripts/gemini_stub_server.py를 임시 포트로 띄움 (지연/503 비율/처음 N개 503 조절)
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+
+import gemini_stub_server  # noqa: E402
+
+
+class StubServer:
+    def __init__(self, *, latency_ms: float = 5.0, error_rate: float = 0.0, fail_first: int = 0):
+        self.args = argparse.Namespace(latency_ms=latency_ms, jitter_ms=0.0, error_rate=error_rate, fail_first=fail_first)
+        self.stats = gemini_stub_server.Stats()
+        handler = gemini_stub_server.make_handler(self.args, self.stats, random.Random(0))
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    """stub_server(**옵션) → StubServer. 테스트가 끝나면 모두 종료"""
+    servers = []
+
+    def _start(**kwargs) -> StubServer:
+        srv = StubServer(**kwargs)
+        servers.append(srv)
+        return srv
+
+    yield _start
+    for srv in servers:
+        srv.close()
+
+
+@pytest.fixture
+def underwriter_payload():
+    """기본 샘플 첫 추가검토 고객의 심사 payload (대출 심사 화면과 같은 생성 경로)"""
+    import pandas as pd
+    from config import DEFAULT_SAMPLE_PARQUET, MAPPING_PATH
+    from utils.hcis_core import build_map_dict, build_underwriter_payload, compute_hcis_columns
+
+    df = compute_hcis_columns(pd.read_parquet(DEFAULT_SAMPLE_PARQUET), pd_col="pd_hat")
+    row = df[df["band"] == "추가검토"].iloc[0]
+    return build_underwriter_payload(row, build_map_dict(MAPPING_PATH))
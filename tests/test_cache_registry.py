@@ -0,0 +1,49 @@
+"""
+CacheRegistry.cached 키 잠금 정리 (성공/실패/대기 후 히트 모두)
+"""
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from utils.cache_registry import CacheRegistry, CacheVersion
+
+V = CacheVersion("test:1")
+
+
+def test_failing_key_does_not_leak_lock():
+    reg = CacheRegistry()
+
+    @reg.cached("boom")
+    def boom(version, x):
+        raise ValueError(x)
+
+    for i in range(5):
+        with pytest.raises(ValueError):
+            boom(V, i)
+    assert reg._key_locks == {}
+
+
+def test_concurrent_same_key_computes_once_and_cleans_up():
+    reg = CacheRegistry()
+    calls = []
+    gate = threading.Event()
+
+    @reg.cached("slow")
+    def slow(version, x):
+        calls.append(x)
+        gate.wait(5)
+        return x * 2
+
+    out = []
+    threads = [threading.Thread(target=lambda: out.append(slow(V, 3))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    gate.set()
+    for t in threads:
+        t.join(5)
+
+    assert out == [6, 6, 6, 6]
+    assert calls == [3]
+    assert reg._key_locks == {}
@@ -0,0 +1,69 @@
+"""
+CircuitBreaker 시험 호출(half-open) 반납 / 실패 집계 규칙
+"""
+from __future__ import annotations
+
+import pytest
+
+from utils import llm_gemini
+from utils.llm_gemini import CircuitBreaker, CircuitOpenError, LLMResponseError, call_with_breaker
+
+
+def _half_open() -> CircuitBreaker:
+    br = CircuitBreaker(failure_threshold=1, reset_timeout_sec=0.0)
+    br.record_failure()
+    assert br.state == "half_open"
+    return br
+
+
+def test_non_retryable_error_releases_trial_without_tripping():
+    br = _half_open()
+    with pytest.raises(LLMResponseError):
+        call_with_breaker(lambda: (_ for _ in ()).throw(LLMResponseError("parse")), br)
+    assert br.allow()
+
+
+def test_code_bug_is_reraised():
+    br = CircuitBreaker(failure_threshold=1)
+    with pytest.raises(KeyError):
+        call_with_breaker(lambda: {}["missing"], br)
+    assert br.state == "closed"
+
+
+def test_retryable_error_trips():
+    br = CircuitBreaker(failure_threshold=1, reset_timeout_sec=60)
+    with pytest.raises(RuntimeError):
+        call_with_breaker(lambda: (_ for _ in ()).throw(RuntimeError("503 UNAVAILABLE")), br)
+    assert br.state == "open"
+    with pytest.raises(CircuitOpenError):
+        call_with_breaker(lambda: "never", br)
+
+
+def test_stale_ticket_does_not_release_newer_trial():
+    br = _half_open()
+    old = br.acquire()
+    br.release_trial(old)
+    new = br.acquire()
+    br.release_trial(old)
+    assert br.acquire() is None
+    br.release_trial(new)
+    assert br.allow()
+
+
+def test_abandoned_stream_releases_trial(monkeypatch, underwriter_payload):
+    br = _half_open()
+    monkeypatch.setattr(llm_gemini, "_BREAKER", br)
+    monkeypatch.setattr(llm_gemini, "_cache_or_none", lambda: None)
+    monkeypatch.setattr(llm_gemini, "get_gemini_client", lambda: (None, "stub-model"))
+
+    def fake_stream(**kwargs):
+        yield {"summary": "…"}, {"summary"}, False
+        yield {"summary": "done"}, {"summary"}, True
+
+    monkeypatch.setattr(llm_gemini, "stream_gemini_structured", fake_stream)
+
+    gen = llm_gemini.ask_underwriter_stream(underwriter_payload, use_cache=False)
+    next(gen)
+    gen.close()   # Streamlit rerun/중지로 소비가 끊긴 경우
+    assert br.state == "half_open"
+    assert br.allow()
@@ -0,0 +1,94 @@
+"""
+GeminiClientPool ↔ 로컬 Gemini 대역 서버
+- 같은 (api_key, base_url)이면 클라이언트 1개 + keep-alive 연결 재사용
+- GEMINI_BASE_URL / GEMINI_API_KEY가 바뀌면 클라이언트 재생성, 이전 클라이언트는 진행 중 호출이 끝난 뒤 close
+"""
+from __future__ import annotations
+
+from utils.llm_gemini import GeminiClientPool, generate_underwriter_report, normalize_payload_for_llm
+
+
+def _closed(client) -> bool:
+    return client._api_client._httpx_client.is_closed
+
+
+def _call(pool: GeminiClientPool, payload_llm) -> dict:
+    client, model = pool.get()
+    return generate_underwriter_report(payload_llm, client=client, model_name=model)
+
+
+def test_sequential_calls_reuse_one_connection(stub_server, monkeypatch, underwriter_payload):
+    srv = stub_server()
+    monkeypatch.setenv("GEMINI_BASE_URL", srv.url)
+    pool = GeminiClientPool(max_concurrency=4)
+    payload_llm = normalize_payload_for_llm(underwriter_payload)
+
+    first_client, _ = pool.get()
+    for _ in range(10):
+        assert _call(pool, payload_llm)["summary"]
+
+    assert pool.get()[0] is first_client
+    assert pool.stats()["clients_created"] == 1
+    assert srv.stats.requests == 10
+    assert srv.stats.connections == 1
+
+
+def test_client_rebuilt_when_endpoint_or_key_changes(stub_server, monkeypatch, underwriter_payload):
+    srv_a, srv_b = stub_server(), stub_server()
+    pool = GeminiClientPool(max_concurrency=4)
+    payload_llm = normalize_payload_for_llm(underwriter_payload)
+
+    monkeypatch.setenv("GEMINI_BASE_URL", srv_a.url)
+    client_a, _ = pool.get()
+    _call(pool, payload_llm)
+
+    monkeypatch.setenv("GEMINI_BASE_URL", srv_b.url)
+    client_b, _ = pool.get()
+    _call(pool, payload_llm)
+
+    assert client_b is not client_a
+    assert (srv_a.stats.requests, srv_b.stats.requests) == (1, 1)
+
+    monkeypatch.setenv("GEMINI_API_KEY", "rotated-key")
+    client_c, _ = pool.get()
+    assert client_c is not client_b
+    assert pool.stats()["clients_created"] == 3
+
+
+def test_replaced_client_closed_after_in_flight_calls_drain(stub_server, monkeypatch, underwriter_payload):
+    srv_a, srv_b = stub_server(), stub_server()
+    pool = GeminiClientPool(max_concurrency=4)
+    payload_llm = normalize_payload_for_llm(underwriter_payload)
+
+    monkeypatch.setenv("GEMINI_BASE_URL", srv_a.url)
+    client_a, _ = pool.get()
+    with pool.slot():
+        # 호출 중에 엔드포인트가 바뀌어도 진행 중인 클라이언트는 닫지 않음
+        monkeypatch.setenv("GEMINI_BASE_URL", srv_b.url)
+        client_b, _ = pool.get()
+        assert not _closed(client_a)
+        assert pool.stats()["retired_pending"] == 1
+    assert _closed(client_a)
+    assert not _closed(client_b)
+
+    _call(pool, payload_llm)
+    pool.reset()
+    assert not _closed(client_b)
+    # reset 후 다음 호출(slot)이 끝나면 이전 클라이언트를 닫음
+    assert pool.health_check(force=True) == (True, "ok")
+    client_c, _ = pool.get()
+    assert _closed(client_b) and not _closed(client_c)
+    assert pool.stats()["retired_pending"] == 0
+
+
+def test_health_check_cached_within_ttl(stub_server, monkeypatch):
+    srv = stub_server()
+    monkeypatch.setenv("GEMINI_BASE_URL", srv.url)
+    pool = GeminiClientPool(max_concurrency=2, health_ttl_sec=60)
+
+    assert pool.health_check() == (True, "ok")
+    # TTL 안에서는 이전 결과 재사용 (rerun마다 호출하지 않음), force면 다시 조회
+    assert pool.health_check() == (True, "ok")
+    assert srv.stats.model_gets == 1
+    assert pool.health_check(force=True) == (True, "ok")
+    assert srv.stats.model_gets == 2
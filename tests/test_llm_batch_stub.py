@@ -0,0 +1,87 @@
+"""
+배치 리포트 생성 ↔ 로컬 Gemini 대역 서버 (scripts/gemini_stub_server.py)
+- 503 재시도 후 성공, 캐시 적중 시 호출 없음, 취소 시 호출 없음
+"""
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from utils import llm_gemini
+from utils.llm_batch import TokenBucket, generate_underwriter_reports
+from utils.llm_cache import ReportCache
+
+
+@pytest.fixture(autouse=True)
+def _closed_breaker():
+    llm_gemini.get_circuit_breaker().record_success()
+    yield
+    llm_gemini.get_circuit_breaker().record_success()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ReportCache(path=tmp_path / "llm_cache.sqlite")
+
+
+def _run(payloads, cache, **kwargs):
+    return generate_underwriter_reports(
+        payloads,
+        cache=cache,
+        max_workers=2,
+        bucket=TokenBucket(rate_per_sec=1000.0, capacity=1000.0),
+        base_delay=0.01,
+        **kwargs,
+    )
+
+
+def test_retries_503_then_caches(stub_server, monkeypatch, cache, underwriter_payload):
+    srv = stub_server(fail_first=2)
+    monkeypatch.setenv("GEMINI_BASE_URL", srv.url)
+
+    [res] = _run([underwriter_payload], cache)
+
+    assert res.status == "ok", res.error
+    assert srv.stats.requests == 3 and srv.stats.errors == 2
+    assert cache.get(res.key) == res.report
+    assert llm_gemini.get_circuit_breaker().state == "closed"
+
+
+def test_cache_hit_skips_request(stub_server, monkeypatch, cache, underwriter_payload):
+    srv = stub_server()
+    monkeypatch.setenv("GEMINI_BASE_URL", srv.url)
+
+    [first] = _run([underwriter_payload], cache)
+    [second] = _run([underwriter_payload], cache)
+
+    assert first.status == "ok" and second.status == "cached"
+    assert second.report == first.report
+    assert srv.stats.requests == 1
+
+
+def test_cancelled_batch_sends_nothing(stub_server, monkeypatch, cache, underwriter_payload):
+    srv = stub_server()
+    monkeypatch.setenv("GEMINI_BASE_URL", srv.url)
+    cancel = threading.Event()
+    cancel.set()
+
+    results = _run([underwriter_payload] * 3, cache, cancel=cancel)
+
+    assert [r.status for r in results] == ["cancelled"] * 3
+    assert srv.stats.requests == 0
+
+
+
+def test_open_breaker_short_circuits(stub_server, monkeypatch, cache, underwriter_payload):
+    srv = stub_server(error_rate=1.0)
+    monkeypatch.setenv("GEMINI_BASE_URL", srv.url)
+
+    results = _run([underwriter_payload], cache, max_retries=llm_gemini.LLM_BREAKER_FAILURES)
+    assert results[0].status == "error"
+    assert llm_gemini.get_circuit_breaker().state == "open"
+
+    sent = srv.stats.requests
+    results = _run([underwriter_payload] * 2, cache)
+    assert [r.status for r in results] == ["error", "error"]
+    assert srv.stats.requests == sent
@@ -1,9 +1,11 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 import numpy as np
 import pandas as pd
 
 from .feature_semantic_map import FEATURE_SEMANTIC_MAP
+from .reference_index import ReferencePercentileIndex
+from .quantile_sketch import FeatureSketches
 
 def _safe_float(x) -> Optional[float]:
     try:
@@ -54,13 +56,15 @@ def generate_behavioral_insights(
     shap_values: Optional[List[float]] = None,
     shap_top_10: Optional[List[Dict[str, Any]]] = None,
     ref_df: Optional[pd.DataFrame] = None,
+    ref_index: Optional[Union[ReferencePercentileIndex, FeatureSketches]] = None,
     top_k: int = 5,
 ) -> List[str]:
     """
     결과: '행태/맥락' 문장 리스트 (최대 top_k)
     - 판단 기준:
-      1) ref_df가 있으면 분위(상/하)를 사용해 high/low 템플릿 선택
-      2) ref_df가 없거나 mid면, SHAP 부호를 보조로 사용(위험↑면 high쪽, 위험↓면 low쪽)하는 fallback
+      1) ref_index(사전 정렬 인덱스/분위 스케치) 또는 ref_df가 있으면 분위(상/하)를 사용해 high/low 템플릿 선택
+         (ref_index가 있으면 우선 사용: 데이터 건수와 무관한 조회 비용)
+      2) 참조 분포가 없거나 mid면, SHAP 부호를 보조로 사용(위험↑면 high쪽, 위험↓면 low쪽)하는 fallback
     """
     # 입력 정리: shap_top_10 우선
     feats: List[str] = []
@@ -102,7 +106,10 @@ def generate_behavioral_insights(
         # 분위 기반 high/low 판정
         v = _safe_float(row.get(f))
         hl: Optional[str] = None
-        if ref_df is not None and v is not None and f in ref_df.columns:
+        if ref_index is not None and v is not None and f in ref_index:
+            p = ref_index.percentile(f, v)
+            hl = _highlow_from_percentile(p)
+        elif ref_df is not None and v is not None and f in ref_df.columns:
             p = _percentile_of_value(ref_df[f], v)
             hl = _highlow_from_percentile(p)
 
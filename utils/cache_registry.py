@@ -0,0 +1,200 @@
+"""
+버전 기반 공용 캐시 + 파생 데이터 의존성 추적
+
+- 항목 키: CacheVersion(data_version, artifact_version, policy_hash) + 함수 인자
+  (data_version은 파일 기준 data_version_of → 세션마다 다른 카운터가 아니라 모든 세션이 같은 값)
+- 데이터셋(노드)끼리 depends_on으로 연결 → invalidate("model_df")는 model_df에서 파생된 노드만 비움
+  (아티팩트/매핑에만 의존하는 항목, 다른 버전으로 이미 계산된 항목은 유지)
+- st.cache_data.clear()처럼 모든 세션의 모든 캐시를 지우지 않음
+"""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from config import MODEL_DF_PARQUET, DEFAULT_SAMPLE_PARQUET
+from utils.data_loader import data_version_of
+
+# 루트 데이터셋 → CacheVersion 필드
+ROOT_FIELDS = {
+    "model_df": "data_version",
+    "artifact": "artifact_version",
+    "policy": "policy_hash",
+}
+
+
+@dataclass(frozen=True)
+class CacheVersion:
+    data_version: str
+    artifact_version: str = ""
+    policy_hash: str = ""
+
+    def of(self, root: str) -> Optional[str]:
+        field = ROOT_FIELDS.get(root)
+        return getattr(self, field) if field else None
+
+
+def active_data_path():
+    """개요/대출 심사와 같은 우선순위: 운영 결과 파일 → 기본 샘플"""
+    if MODEL_DF_PARQUET.exists():
+        return MODEL_DF_PARQUET
+    if DEFAULT_SAMPLE_PARQUET.exists():
+        return DEFAULT_SAMPLE_PARQUET
+    return None
+
+
+def current_cache_version() -> CacheVersion:
+    """지금 디스크 상태 기준 버전 (파일이 바뀌면 값이 바뀜)"""
+    from utils.hcis_core import policy_hash
+    from modules.model_loader import artifact_version
+
+    path = active_data_path()
+    return CacheVersion(
+        data_version=data_version_of(path) if path is not None else "",
+        artifact_version=artifact_version(),
+        policy_hash=policy_hash(),
+    )
+
+
+class CacheRegistry:
+    """프로세스 공용(모든 세션 공유) 버전 캐시. 노드별 LRU(max_entries)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._deps: Dict[str, Set[str]] = {root: set() for root in ROOT_FIELDS}
+        self._entries: Dict[str, "OrderedDict[Tuple, Any]"] = {}
+        self._max_entries: Dict[str, int] = {}
+        self._key_locks: Dict[Tuple, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    # ---------------------------------------------------------
+    # 의존성 그래프
+    # ---------------------------------------------------------
+    def declare(self, name: str, depends_on: Iterable[str] = ("model_df",), *, max_entries: int = 8) -> None:
+        deps = set(depends_on)
+        unknown = deps - set(self._deps)
+        if unknown:
+            raise KeyError(f"선언되지 않은 의존 데이터셋: {sorted(unknown)} (먼저 declare 하세요)")
+        with self._lock:
+            self._deps[name] = deps
+            self._entries.setdefault(name, OrderedDict())
+            self._max_entries[name] = int(max_entries)
+
+    def roots_of(self, name: str) -> Set[str]:
+        """name이 (간접적으로) 의존하는 루트 데이터셋"""
+        out, stack = set(), [name]
+        while stack:
+            n = stack.pop()
+            deps = self._deps.get(n, set())
+            if not deps and n in ROOT_FIELDS:
+                out.add(n)
+            stack.extend(deps)
+        return out
+
+    def dependents(self, dataset: str) -> List[str]:
+        """dataset에서 (간접적으로) 파생된 노드들"""
+        out: List[str] = []
+        frontier = [dataset]
+        while frontier:
+            cur = frontier.pop()
+            for n, deps in self._deps.items():
+                if cur in deps and n not in out:
+                    out.append(n)
+                    frontier.append(n)
+        return out
+
+    # ---------------------------------------------------------
+    # 캐시
+    # ---------------------------------------------------------
+    def cached(self, name: str, depends_on: Iterable[str] = ("model_df",), *, max_entries: int = 8):
+        """
+        fn(version: CacheVersion, *args) 형태 함수를 버전 캐시로 감쌈.
+        args는 해시 가능해야 함(str/bool/tuple 등). 같은 키 동시 요청은 한 번만 계산.
+        """
+        self.declare(name, depends_on, max_entries=max_entries)
+
+        def deco(fn: Callable):
+            @wraps(fn)
+            def wrapper(version: CacheVersion, *args, **kwargs):
+                key = (version, args, tuple(sorted(kwargs.items())))
+                found, value = self._get(name, key)
+                if found:
+                    return value
+                with self._lock:
+                    klock = self._key_locks.setdefault((name, key), threading.Lock())
+                try:
+                    with klock:
+                        found, value = self._get(name, key, count=False)
+                        if found:
+                            return value
+                        value = fn(version, *args, **kwargs)
+                        self._put(name, key, value)
+                    return value
+                finally:
+                    # fn이 예외를 내도 키 잠금은 정리 (실패 키마다 잠금이 쌓이지 않게)
+                    with self._lock:
+                        self._key_locks.pop((name, key), None)
+
+            wrapper.cache_name = name
+            return wrapper
+
+        return deco
+
+    def _get(self, name: str, key: Tuple, count: bool = True):
+        with self._lock:
+            entries = self._entries[name]
+            if key in entries:
+                entries.move_to_end(key)
+                self.hits += count
+                return True, entries[key]
+            self.misses += count
+            return False, None
+
+    def _put(self, name: str, key: Tuple, value: Any) -> None:
+        with self._lock:
+            entries = self._entries[name]
+            entries[key] = value
+            entries.move_to_end(key)
+            while len(entries) > self._max_entries.get(name, 8):
+                entries.popitem(last=False)
+
+    def invalidate(self, dataset: str, *, keep_version: Optional[str] = None) -> Dict[str, int]:
+        """
+        dataset(루트 또는 파생 노드)에서 파생된 노드의 항목 삭제.
+        keep_version을 주면 그 버전(루트 기준)으로 계산된 항목은 남김. 반환: 노드별 삭제 수
+        """
+        removed: Dict[str, int] = {}
+        with self._lock:
+            targets = ([dataset] if dataset in self._entries else []) + self.dependents(dataset)
+            for n in targets:
+                entries = self._entries.get(n)
+                if not entries:
+                    continue
+                drop = [
+                    k for k in entries
+                    if keep_version is None or dataset not in ROOT_FIELDS or k[0].of(dataset) != keep_version
+                ]
+                for k in drop:
+                    del entries[k]
+                if drop:
+                    removed[n] = len(drop)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": {n: len(e) for n, e in self._entries.items()},
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+_REGISTRY = CacheRegistry()
+
+
+def get_cache_registry() -> CacheRegistry:
+    return _REGISTRY
@@ -0,0 +1,176 @@
+"""
+고객 ID 검색 인덱스 (대출 심사 페이지 사이드바 typeahead)
+
+- sk_id_curr를 정수 정렬 배열로 보관 → 앞자리(prefix)/범위 검색은 searchsorted (O(log n))
+- band / 리스크 타입 / HCIS 점수 필터는 후보 구간에만 벡터 마스크
+- 결과는 페이지 단위로 잘라서 반환 → 위젯에는 한 페이지(수십 개)만 전달
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import ID_COL, T_LOW, T_HIGH
+from utils.stress_test import band_codes
+
+BAND_LABELS = ("거절", "추가검토", "승인")   # band_codes 순서 (0/1/2)
+
+
+@dataclass
+class SearchPage:
+    ids: List[str]           # 이번 페이지 고객 ID (오름차순)
+    positions: np.ndarray    # 원본 df 행 위치 (iloc)
+    total: int               # 조건에 맞는 전체 고객 수
+    page: int                # 0부터
+    n_pages: int
+
+
+@dataclass
+class CustomerSearchIndex:
+    ids: np.ndarray          # (n,) int64, 오름차순
+    positions: np.ndarray    # (n,) 원본 df 행 위치
+    band: np.ndarray         # (n,) int8 (BAND_LABELS 인덱스)
+    score: np.ndarray        # (n,) float
+    risk_type: np.ndarray    # (n,) int16 (risk_labels 인덱스, -1 = 없음)
+    risk_labels: Tuple[str, ...]
+    max_digits: int
+
+    @classmethod
+    def build(
+        cls,
+        df: pd.DataFrame,
+        *,
+        id_col: str = ID_COL,
+        score_col: str = "hcis_score",
+        band_col: str = "band",
+        risk_type_keys: Optional[Sequence] = None,
+    ) -> "CustomerSearchIndex":
+        """
+        df(hcis_score/band 포함) → 검색 인덱스.
+        - risk_type_keys: df 행 순서와 같은 길이의 리스크 타입 키 (추가검토 외 고객은 None)
+        - 숫자로 바꿀 수 없는 ID는 제외, 중복 ID는 첫 행만
+        """
+        num = pd.to_numeric(df[id_col], errors="coerce").to_numpy(dtype=float)
+        ok = np.isfinite(num)
+        pos = np.flatnonzero(ok)
+        ids = num[ok].astype(np.int64)
+
+        order = np.argsort(ids, kind="stable")
+        ids, pos = ids[order], pos[order]
+        first = np.ones(len(ids), dtype=bool)
+        first[1:] = ids[1:] != ids[:-1]
+        ids, pos = ids[first], pos[first]
+
+        score = df[score_col].to_numpy(dtype=float)[pos]
+        if band_col in df.columns:
+            codes = pd.Categorical(df[band_col].to_numpy()[pos], categories=BAND_LABELS).codes
+            band = np.where(codes < 0, 2, codes).astype(np.int8)   # 알 수 없는 값은 승인(band_codes와 동일)
+        else:
+            band = band_codes(score, T_LOW, T_HIGH)
+
+        if risk_type_keys is not None:
+            keys = np.asarray(risk_type_keys, dtype=object)[pos]
+            labels = tuple(sorted({k for k in keys if isinstance(k, str) and k}))
+            lut_rt = {k: i for i, k in enumerate(labels)}
+            risk = np.array([lut_rt.get(k, -1) for k in keys], dtype=np.int16)
+        else:
+            labels = ()
+            risk = np.full(len(ids), -1, dtype=np.int16)
+
+        max_digits = len(str(int(ids.max()))) if len(ids) else 0
+        return cls(ids=ids, positions=pos, band=band, score=score, risk_type=risk,
+                   risk_labels=labels, max_digits=max_digits)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # ---------------------------------------------------------
+    # ID 구간
+    # ---------------------------------------------------------
+    def range_slice(self, id_min: Optional[int] = None, id_max: Optional[int] = None) -> slice:
+        """id_min <= id <= id_max 인 정렬 배열 구간"""
+        lo = 0 if id_min is None else int(np.searchsorted(self.ids, int(id_min), side="left"))
+        hi = len(self.ids) if id_max is None else int(np.searchsorted(self.ids, int(id_max), side="right"))
+        return slice(lo, max(lo, hi))
+
+    def prefix_slices(self, prefix: str) -> List[slice]:
+        """
+        10진 문자열 앞자리 검색. 자릿수 L별로 [p·10^(L-d), (p+1)·10^(L-d)) 구간 → 서로 겹치지 않는 slice들
+        (예: "12" → 12, 120~129, 1200~1299, ...)
+        """
+        prefix = (prefix or "").strip()
+        if not prefix:
+            return [slice(0, len(self.ids))]
+        if not prefix.isdigit() or prefix[0] == "0":   # ID는 0으로 시작하지 않음
+            return []
+        p, d = int(prefix), len(prefix)
+        out = []
+        for L in range(d, max(d, self.max_digits) + 1):
+            scale = 10 ** (L - d)
+            lo = int(np.searchsorted(self.ids, p * scale, side="left"))
+            hi = int(np.searchsorted(self.ids, (p + 1) * scale, side="left"))
+            if hi > lo:
+                out.append(slice(lo, hi))
+        return sorted(out, key=lambda s: s.start)
+
+    def contains(self, cid) -> bool:
+        try:
+            v = int(cid)
+        except (TypeError, ValueError):
+            return False
+        i = int(np.searchsorted(self.ids, v))
+        return i < len(self.ids) and int(self.ids[i]) == v
+
+    # ---------------------------------------------------------
+    # 검색
+    # ---------------------------------------------------------
+    def search(
+        self,
+        *,
+        prefix: str = "",
+        id_min: Optional[int] = None,
+        id_max: Optional[int] = None,
+        bands: Optional[Sequence[str]] = None,
+        risk_types: Optional[Sequence[str]] = None,
+        score_min: Optional[float] = None,
+        score_max: Optional[float] = None,
+        page: int = 0,
+        page_size: int = 30,
+    ) -> SearchPage:
+        """조건에 맞는 고객을 ID 오름차순으로 page_size개씩. page가 범위를 넘으면 마지막 페이지"""
+        rng = self.range_slice(id_min, id_max)
+        parts = []
+        for s in self.prefix_slices(prefix):
+            lo, hi = max(s.start, rng.start), min(s.stop, rng.stop)
+            if hi > lo:
+                parts.append(np.arange(lo, hi))
+        cand = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+        mask = np.ones(len(cand), dtype=bool)
+        if bands:
+            codes = [BAND_LABELS.index(b) for b in bands if b in BAND_LABELS]
+            mask &= np.isin(self.band[cand], codes)
+        if risk_types:
+            codes = [self.risk_labels.index(k) for k in risk_types if k in self.risk_labels]
+            mask &= np.isin(self.risk_type[cand], codes)
+        if score_min is not None:
+            mask &= self.score[cand] >= float(score_min)
+        if score_max is not None:
+            mask &= self.score[cand] <= float(score_max)
+        hits = cand[mask]
+
+        page_size = max(1, int(page_size))
+        total = len(hits)
+        n_pages = max(1, -(-total // page_size))
+        page = min(max(0, int(page)), n_pages - 1)
+        sel = hits[page * page_size:(page + 1) * page_size]
+        return SearchPage(
+            ids=[str(v) for v in self.ids[sel].tolist()],
+            positions=self.positions[sel],
+            total=total,
+            page=page,
+            n_pages=n_pages,
+        )
@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
+from pathlib import Path
 from config import PD_COL_CANDIDATES, ID_COL, MODEL_DF_PARQUET, DEFAULT_SAMPLE_PARQUET
 
 # def _try_read_parquet(path: str):
@@ -9,9 +11,9 @@ from config import PD_COL_CANDIDATES, ID_COL, MODEL_DF_PARQUET, DEFAULT_SAMPLE_P
 #         return pd.read_parquet(path)
 #     return None
 
-@st.cache_data(show_spinner=False)
-def load_base_df(data_version: int = 0):
-    """운영용 베이스 데이터 로더.
+@st.cache_data(show_spinner=False, max_entries=2)
+def load_base_df(data_version: str = ""):
+    """운영용 베이스 데이터 로더. data_version(파일 기준)은 캐시 키로만 사용.
     우선순위:
       1) config.DATA_CANDIDATES 중 존재하는 첫 파일
     """
@@ -27,6 +29,22 @@ def load_base_df(data_version: int = 0):
     # 3) 둘 다 없으면 로드 실패
     return None, None
 
+def data_version_of(path) -> str:
+    """파일 기준 데이터 버전 문자열 (이름 + 수정시각 + 크기).
+    업로드/샘플 로드로 파일이 바뀌면 값이 달라지므로 파생 산출물의 캐시 키로 사용.
+    """
+    p = Path(path)
+    if not p.exists():
+        return ""
+    st_ = p.stat()
+    return f"{p.name}:{st_.st_mtime_ns}:{st_.st_size}"
+
+def build_customer_index(df: pd.DataFrame, id_col: str = ID_COL) -> dict:
+    """고객 ID(str) → 행 위치(iloc). 중복 ID는 첫 행 기준. 데이터 버전당 1회 생성해 재사용"""
+    ids = df[id_col].astype(str).to_numpy()
+    first = ~pd.Index(ids).duplicated(keep="first")
+    return dict(zip(ids[first].tolist(), np.flatnonzero(first).tolist()))
+
 def ensure_id(df: pd.DataFrame):
     if df is None:
         return df
@@ -0,0 +1,225 @@
+"""
+개요 화면용 분포 요약 (사전 집계 히스토그램)
+
+- 점수 산출 시점(업로드 처리)에 고정 점수 구간/PD 구간 히스토그램과 밴드별 고객 수를
+  np.histogram / np.bincount로 한 번만 계산해 st_data/dist_summary/에 작은 JSON으로 저장
+- 개요 화면은 고객 단위 Series 대신 이 요약(수 KB)만 읽음 → 포트폴리오 크기와 무관한 payload
+- 점수 구간 경계는 DIST_SCORE_BIN_WIDTH 배수 → 컷(T_LOW/T_HIGH)이 경계에 맞으면 누적합으로 정확한 인원 산출
+- 키: data_version + policy_hash + 스키마 버전 (kpi_engine/review_table과 같은 방식)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from config import (
+    PD_COL_CANDIDATES,
+    SCORE_MIN,
+    SCORE_MAX,
+    T_LOW,
+    T_HIGH,
+    DIST_SUMMARY_DIR,
+    DIST_SUMMARY_KEEP,
+    DIST_SCORE_BIN_WIDTH,
+    DIST_PD_BINS,
+)
+from utils.hcis_core import hcis_score_array, policy_hash
+
+DIST_SUMMARY_SCHEMA = 1
+BANDS = ["승인", "추가검토", "거절"]
+
+
+@dataclass
+class DistributionSummary:
+    score_edges: List[float]          # 길이 = score_counts + 1
+    score_counts: List[int]
+    pd_edges: List[float]
+    pd_counts: List[int]
+    band_counts: Dict[str, int]       # '승인'/'추가검토'/'거절'
+    stats: Dict[str, float] = field(default_factory=dict)   # total_customers, score_min/max/mean, pd_mean
+    meta: Dict[str, object] = field(default_factory=dict)   # data_version, policy, schema, t_low, t_high
+
+    @property
+    def total(self) -> int:
+        return int(self.stats.get("total_customers", 0))
+
+    def count_at_least(self, cut: float) -> int:
+        """score >= cut 인원 (cut이 구간 경계가 아니면 해당 구간 전체를 포함)"""
+        edges = np.asarray(self.score_edges, dtype=float)
+        counts = np.asarray(self.score_counts, dtype=np.int64)
+        i = int(np.searchsorted(edges[:-1], float(cut), side="left"))
+        return int(counts[i:].sum())
+
+    def band_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            "Band": BANDS,
+            "Count": [int(self.band_counts.get(b, 0)) for b in BANDS],
+        })
+
+    def score_hist_frame(self, t_low: float = T_LOW, t_high: float = T_HIGH) -> pd.DataFrame:
+        """차트용 구간 테이블 (bin_start, bin_end, Count, zone). 앞뒤의 빈 구간은 잘라냄"""
+        edges = np.asarray(self.score_edges, dtype=float)
+        counts = np.asarray(self.score_counts, dtype=np.int64)
+        nz = np.flatnonzero(counts)
+        if len(nz) == 0:
+            return pd.DataFrame(columns=["bin_start", "bin_end", "Count", "zone"])
+        lo, hi = nz[0], nz[-1] + 1
+        start = edges[lo:hi]
+        zone = np.select([start >= t_high, start >= t_low], ["승인", "추가검토"], default="거절")
+        return pd.DataFrame({
+            "bin_start": start,
+            "bin_end": edges[lo + 1:hi + 1],
+            "Count": counts[lo:hi],
+            "zone": zone,
+        })
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "DistributionSummary":
+        return cls(**{k: d[k] for k in cls.__dataclass_fields__ if k in d})
+
+
+def score_bin_edges(width: float = DIST_SCORE_BIN_WIDTH) -> np.ndarray:
+    return np.arange(SCORE_MIN, SCORE_MAX + width, width, dtype=float)
+
+
+def pd_bin_edges(n_bins: int = DIST_PD_BINS) -> np.ndarray:
+    return np.linspace(0.0, 1.0, int(n_bins) + 1)
+
+
+def compute_distribution_summary(
+    pd_hat,
+    *,
+    t_low: float = T_LOW,
+    t_high: float = T_HIGH,
+) -> DistributionSummary:
+    """PD 배열 → 점수/PD 히스토그램 + 밴드 수 + 기본 통계 (NaN PD는 제외, 개요 화면과 같은 규칙)"""
+    p = np.asarray(pd_hat, dtype=float)
+    p = p[np.isfinite(p)]
+    score = hcis_score_array(p)
+
+    s_edges = score_bin_edges()
+    s_counts, _ = np.histogram(score, bins=s_edges)
+    p_edges = pd_bin_edges()
+    p_counts, _ = np.histogram(np.clip(p, 0.0, 1.0), bins=p_edges)
+
+    # 0=거절, 1=추가검토, 2=승인 (hcis_band_array와 같은 경계)
+    band_idx = (score >= t_low).astype(np.int64) + (score >= t_high).astype(np.int64)
+    b = np.bincount(band_idx, minlength=3)
+
+    n = int(len(score))
+    stats = {
+        "total_customers": n,
+        "score_min": float(score.min()) if n else float("nan"),
+        "score_max": float(score.max()) if n else float("nan"),
+        "score_mean": float(score.mean()) if n else float("nan"),
+        "pd_mean": float(p.mean()) if n else float("nan"),
+    }
+    return DistributionSummary(
+        score_edges=s_edges.tolist(),
+        score_counts=s_counts.astype(int).tolist(),
+        pd_edges=p_edges.tolist(),
+        pd_counts=p_counts.astype(int).tolist(),
+        band_counts={"거절": int(b[0]), "추가검토": int(b[1]), "승인": int(b[2])},
+        stats=stats,
+        meta={"t_low": float(t_low), "t_high": float(t_high)},
+    )
+
+
+# -----------------------------------------------------------
+# 저장 / 조회
+# -----------------------------------------------------------
+def dist_summary_key(data_version: str, policy: Optional[str] = None) -> str:
+    raw = json.dumps(
+        {"data_version": data_version, "policy": policy or policy_hash(), "schema": DIST_SUMMARY_SCHEMA},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def dist_summary_path(data_version: str, policy: Optional[str] = None, *, summary_dir: Path = DIST_SUMMARY_DIR) -> Path:
+    return Path(summary_dir) / f"dist_{dist_summary_key(data_version, policy)}.json"
+
+
+def write_distribution_summary(
+    pd_hat,
+    data_version: str,
+    *,
+    source: str = "",
+    policy: Optional[str] = None,
+    summary_dir: Path = DIST_SUMMARY_DIR,
+) -> Path:
+    """compute_distribution_summary 결과를 (data_version, policy) 키 JSON으로 저장. 오래된 파일은 DIST_SUMMARY_KEEP개만 유지"""
+    summary = compute_distribution_summary(pd_hat)
+    summary.meta.update({
+        "data_version": data_version,
+        "policy": policy or policy_hash(),
+        "schema": DIST_SUMMARY_SCHEMA,
+        "source": str(source),
+    })
+    path = dist_summary_path(data_version, policy, summary_dir=summary_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(summary.to_dict(), ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+    _prune(Path(summary_dir), keep=path)
+    return path
+
+
+def _prune(summary_dir: Path, keep: Path) -> None:
+    try:
+        files = sorted(summary_dir.glob("dist_*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for p in files[DIST_SUMMARY_KEEP:]:
+            if p != keep:
+                p.unlink()
+    except Exception:
+        pass  # 정리 실패는 무시 (다음 저장 때 다시 시도)
+
+
+def load_distribution_summary(path: Path) -> DistributionSummary:
+    return DistributionSummary.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def read_pd_column(data_path: Path) -> Optional[np.ndarray]:
+    """원본 parquet에서 PD 컬럼 하나만 읽음 (PD_COL_CANDIDATES 우선순위)"""
+    names = set(pq.read_schema(data_path).names)
+    pd_col = next((c for c in PD_COL_CANDIDATES if c in names), None)
+    if pd_col is None:
+        return None
+    col = pq.read_table(data_path, columns=[pd_col]).column(0)
+    return pd.to_numeric(col.to_pandas(), errors="coerce").to_numpy(dtype=float)
+
+
+def ensure_distribution_summary(
+    data_path: Path,
+    data_version: str,
+    *,
+    policy: Optional[str] = None,
+    summary_dir: Path = DIST_SUMMARY_DIR,
+) -> Optional[DistributionSummary]:
+    """요약 파일이 있으면 읽기만, 없으면(기본 샘플/이전 버전 파일) PD 컬럼만 읽어 한 번 생성. PD 컬럼이 없으면 None"""
+    path = dist_summary_path(data_version, policy, summary_dir=summary_dir)
+    if path.exists():
+        try:
+            summary = load_distribution_summary(path)
+            if summary.meta.get("schema") == DIST_SUMMARY_SCHEMA:
+                return summary
+        except Exception:
+            pass  # 손상 파일은 다시 생성
+    pd_arr = read_pd_column(data_path)
+    if pd_arr is None:
+        return None
+    path = write_distribution_summary(
+        pd_arr, data_version, source=str(data_path), policy=policy, summary_dir=summary_dir
+    )
+    return load_distribution_summary(path)
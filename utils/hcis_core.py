@@ -1,10 +1,12 @@
 import numpy as np
 import pandas as pd
 import ast
+import hashlib
+import json
 
 from pathlib import Path
-from typing import Dict, Any
-from config import OFFSET, FACTOR, T_LOW, T_HIGH, PD_CEIL, PD_FLOOR, TOP_N, SCORE_MAX, SCORE_MIN
+from typing import Dict, Any, List, Optional, Sequence
+from config import OFFSET, FACTOR, T_LOW, T_HIGH, PD_CEIL, PD_FLOOR, TOP_N, SCORE_MAX, SCORE_MIN, GROUP_PCT_PREFIX
 
 # supergroup 선언
 SUPER_GROUP_MAP = {
@@ -34,6 +36,9 @@ SUPER_GROUP_MAP = {
     "기타":"서류/운영",
 }
 
+# super_group 고정 순서 (기여도 테이블 컬럼 순서)
+SUPER_GROUPS: List[str] = list(dict.fromkeys(SUPER_GROUP_MAP.values()))
+
 # supergroup 매핑 함수
 def load_mapping_enriched(mapping_path: Path) -> pd.DataFrame:
     if mapping_path.suffix.lower() == ".parquet":
@@ -70,6 +75,70 @@ def build_map_dict(mapping_path: Path) -> Dict[str, Dict[str, str]]:
     df = load_mapping_enriched(mapping_path)
     return df.set_index("feature")[["reason_label","super_group"]].to_dict("index")
 
+# feature -> super_group one-hot 행렬 (F, G)
+def build_group_onehot(
+    feature_names: Sequence[str],
+    map_dict: Dict[str, Dict[str, str]],
+    groups: Sequence[str] = SUPER_GROUPS,
+) -> np.ndarray:
+    """모델 feature 순서대로 super_group one-hot 행렬을 만든다.
+    매핑에 없는 feature는 build_top10_shap_bundle과 동일하게 '서류/운영'으로 보낸다.
+    """
+    g_idx = {g: i for i, g in enumerate(groups)}
+    fallback = g_idx.get("서류/운영", len(groups) - 1)
+
+    onehot = np.zeros((len(feature_names), len(groups)), dtype=np.float32)
+    for i, f in enumerate(feature_names):
+        g = map_dict.get(str(f), {}).get("super_group", "서류/운영")
+        onehot[i, g_idx.get(g, fallback)] = 1.0
+    return onehot
+
+# 전체 SHAP 벡터 기반 그룹 기여도 (n, G)
+def compute_group_contributions(
+    shap_matrix: np.ndarray,
+    group_onehot: np.ndarray,
+    groups: Sequence[str] = SUPER_GROUPS,
+) -> pd.DataFrame:
+    """|SHAP| (n, F) @ one-hot (F, G) -> 그룹별 기여도(%) 테이블.
+
+    - 각 행은 고객 1명, 합은 100 (SHAP 전부 0이면 0)
+    - float32로 저장해 model_df 옆에 붙여도 부담이 작도록 함
+    """
+    abs_sv = np.abs(np.asarray(shap_matrix, dtype=np.float32))
+    contrib = abs_sv @ np.asarray(group_onehot, dtype=np.float32)
+
+    total = contrib.sum(axis=1, keepdims=True)
+    total[total == 0] = 1.0
+    pct = (contrib / total * 100).astype(np.float32)
+
+    return pd.DataFrame(pct, columns=[f"{GROUP_PCT_PREFIX}{g}" for g in groups])
+
+def group_pct_columns(df_or_row) -> List[str]:
+    """df(또는 row)에 저장된 그룹 기여도 컬럼 목록"""
+    cols = df_or_row.columns if isinstance(df_or_row, pd.DataFrame) else df_or_row.index
+    return [c for c in cols if str(c).startswith(GROUP_PCT_PREFIX)]
+
+def _group_summary_from_row(row: pd.Series) -> Optional[List[Dict[str, Any]]]:
+    """row에 전체 기여도 컬럼이 있으면 group_contribution_summary 형태로 변환, 없으면 None"""
+    cols = group_pct_columns(row)
+    if not cols:
+        return None
+
+    items = []
+    for c in cols:
+        v = row.get(c)
+        try:
+            v = float(v)
+        except Exception:
+            continue
+        if not np.isfinite(v) or v <= 0:
+            continue
+        items.append({"super_group": c[len(GROUP_PCT_PREFIX):], "risk_pct_of_top10": round(v, 2)})
+
+    if not items:
+        return None
+    return sorted(items, key=lambda x: x["risk_pct_of_top10"], reverse=True)
+
 # pd_hat -> hcis 점수 계산
 def pd_to_hcis(pd_hat: float, offset: float, factor: float) -> float:
     pd_hat = float(pd_hat)
@@ -83,6 +152,47 @@ def hcis_band(score: float, t_low: float, t_high: float) -> str:
     if score < t_high: return "추가검토"
     return "승인"
 
+# 배열 버전 (전체 포트폴리오/시나리오 계산용) - 위 스칼라 함수와 동일한 규칙
+def hcis_score_array(
+    pd_hat,
+    *,
+    offset: float = OFFSET,
+    factor: float = FACTOR,
+    pd_floor: float = PD_FLOOR,
+    pd_ceil: float = PD_CEIL,
+    score_min: float = SCORE_MIN,
+    score_max: float = SCORE_MAX,
+) -> np.ndarray:
+    """PD 클리핑 → log-odds 점수 → 점수 클리핑. NaN은 NaN으로 유지."""
+    p = np.asarray(pd_hat, dtype=float)
+    p = np.clip(np.clip(p, pd_floor, pd_ceil), 1e-6, 1 - 1e-6)
+    score = offset + factor * np.log((1 - p) / p)
+    return np.clip(score, score_min, score_max)
+
+def hcis_band_array(score, t_low: float = T_LOW, t_high: float = T_HIGH) -> np.ndarray:
+    """점수 배열 → band 배열(object). 비교가 모두 False인 NaN은 스칼라 버전과 같이 '승인'."""
+    s = np.asarray(score, dtype=float)
+    return np.select([s < t_low, s < t_high], ["거절", "추가검토"], default="승인").astype(object)
+
+def policy_hash(**overrides) -> str:
+    """
+    점수/컷오프/등급 정책 파라미터의 해시.
+    파생 산출물(KPI 등) 캐시 키에 data_version과 함께 사용 → config 정책이 바뀌면 자동 무효화.
+    overrides로 시나리오별 파라미터(t_low 등)를 덮어쓸 수 있음.
+    """
+    from config import PD_GRADE_CUTS
+
+    policy = {
+        "offset": float(OFFSET), "factor": float(FACTOR),
+        "t_low": float(T_LOW), "t_high": float(T_HIGH),
+        "pd_floor": float(PD_FLOOR), "pd_ceil": float(PD_CEIL),
+        "score_min": float(SCORE_MIN), "score_max": float(SCORE_MAX),
+        "pd_grade_cuts": {k: float(v) for k, v in PD_GRADE_CUTS.items()},
+    }
+    policy.update(overrides)
+    raw = json.dumps(policy, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
 # 혹시나 shap이 정상적이지 않더라도 정상작동하도록 안전장치
 
 def compute_hcis_columns(
@@ -115,22 +225,18 @@ def compute_hcis_columns(
         raise KeyError(f"'{pd_col}' 컬럼이 없습니다.")
 
     out = df.copy()
-    pd_series = out[pd_col].astype(float).copy()
-
-    # 정책 클리핑
-    pd_series = pd_series.clip(lower=pd_floor, upper=pd_ceil)
+    pd_arr = out[pd_col].astype(float).to_numpy()
 
-    # 점수 계산
-    out[out_score_col] = pd_series.apply(lambda p: pd_to_hcis(p, offset, factor)).astype(float)
-    
-    # 점수 클리핑
-    out[out_score_col] = out[out_score_col].clip(
-        lower=score_min,
-        upper=score_max
+    # 정책 클리핑 + 점수 계산 + 점수 클리핑
+    out[out_score_col] = hcis_score_array(
+        pd_arr, offset=offset, factor=factor, pd_floor=pd_floor, pd_ceil=pd_ceil,
+        score_min=score_min, score_max=score_max,
     )
+
     # band/컷/마진
-    out[out_band_col] = out[out_score_col].apply(lambda s: hcis_band(float(s), t_low, t_high))
-    out[out_cutoff_col] = out[out_band_col].apply(lambda b: float(t_high) if b == "승인" else float(t_low))
+    band = hcis_band_array(out[out_score_col].to_numpy(), t_low, t_high)
+    out[out_band_col] = band
+    out[out_cutoff_col] = np.where(band == "승인", float(t_high), float(t_low))
     out[out_margin_col] = (out[out_score_col] - out[out_cutoff_col]).round(2)
 
     return out
@@ -282,19 +388,25 @@ def build_top10_shap_bundle(
 
     # ===========================
     # shap top 10 요약 (기존 로직 유지)
+    # - 업로드 시 전체 SHAP 기반 기여도 테이블이 저장되어 있으면 그대로 사용 (행 단위 groupby 생략)
     # ===========================
-    g = df_top.groupby("super_group")["shap_abs"].sum().reset_index()
-    g["risk_pct_of_top10"] = g["shap_abs"] / float(df_top["shap_abs"].sum() or 1.0) * 100
-    g = g.sort_values("risk_pct_of_top10", ascending=False)
-    g["risk_pct_of_top10"] = g["risk_pct_of_top10"].map(lambda x: round(float(x), 2))
-    group_summary = g[["super_group", "risk_pct_of_top10"]].to_dict("records")
+    group_summary = _group_summary_from_row(row)
+    if group_summary is not None:
+        other_note = "group_contribution_summary는 전체 SHAP 벡터 절대값 합 기준(키 이름은 호환을 위해 유지)"
+    else:
+        g = df_top.groupby("super_group")["shap_abs"].sum().reset_index()
+        g["risk_pct_of_top10"] = g["shap_abs"] / float(df_top["shap_abs"].sum() or 1.0) * 100
+        g = g.sort_values("risk_pct_of_top10", ascending=False)
+        g["risk_pct_of_top10"] = g["risk_pct_of_top10"].map(lambda x: round(float(x), 2))
+        group_summary = g[["super_group", "risk_pct_of_top10"]].to_dict("records")
+        other_note = "group_contribution_summary는 SHAP Top10 범위 내 절대값 합 기준"
 
     return {
         "top_reasons": top_reasons,                 # 기존 유지
         "group_contribution_summary": group_summary,
         "shap_top_10": shap_top_10,                 # 심사용 (값 + SHAP + %)
         "top_reasons_public": top_reasons_public,   # 고객용 (수치 제거)
-        "other_note": "group_contribution_summary는 SHAP Top10 범위 내 절대값 합 기준"
+        "other_note": other_note
     }
 
 
@@ -371,3 +483,26 @@ def build_payload_from_team_row(
     }
 
     return payload
+
+# 심사 리포트(LLM)용 payload: 팀 row payload + 행태 해석
+# - 대출 심사 페이지 / 배치 리포트 생성이 같은 함수를 써야 LLM 캐시 키가 일치함
+def attach_behavioral_insights(payload: Dict[str, Any], row: pd.Series, *, ref_index=None, top_k: int = 5) -> Dict[str, Any]:
+    from utils.behavioral_insights import generate_behavioral_insights
+
+    payload["behavioral_insights"] = generate_behavioral_insights(
+        row,
+        shap_top_10=payload.get("shap_top_10"),
+        ref_index=ref_index,
+        top_k=top_k,
+    )
+    return payload
+
+def build_underwriter_payload(
+    row: pd.Series,
+    map_dict: Dict[str, Dict[str, str]],
+    *,
+    ref_index=None,
+    top_k_insights: int = 5,
+) -> Dict[str, Any]:
+    payload = build_payload_from_team_row(row=row, map_dict=map_dict)
+    return attach_behavioral_insights(payload, row, ref_index=ref_index, top_k=top_k_insights)
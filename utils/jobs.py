@@ -0,0 +1,329 @@
+"""
+백그라운드 작업 실행기 (프로세스 풀 + SQLite 작업 테이블)
+
+- 무거운 처리(업로드 추론 등)를 Streamlit 스크립트 밖 워커 프로세스에서 실행 → 화면이 멈추지 않음
+- 작업 상태(단계/진행률/결과/오류)는 디스크 테이블에 기록 → 브라우저 새로고침 후에도 job_id로 다시 조회
+- 여러 사용자의 작업이 JOB_WORKERS개까지 동시에 처리, 나머지는 대기열(queued)
+- 워커는 target("모듈:함수")을 import해서 target(progress=JobProgress, **kwargs)로 호출
+- 서버가 재시작되면 이전 프로세스가 맡았던 미완료 작업은 "error"(중단)로 정리
+"""
+from __future__ import annotations
+
+import importlib
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import JOBS_DB_PATH, JOBS_DIR, JOB_WORKERS, JOB_KEEP_DAYS
+from utils.llm_cache import canonical_json
+
+JOB_DONE_STATUSES = ("done", "error")
+
+
+@dataclass
+class JobInfo:
+    job_id: str
+    kind: str
+    status: str                  # "queued" | "running" | "done" | "error"
+    stage: str = ""
+    stage_label: str = ""
+    progress: float = 0.0        # 0~1 (단계 가중치 반영)
+    message: str = ""
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    updated_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in JOB_DONE_STATUSES
+
+    @property
+    def elapsed_sec(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return max(0.0, end - self.started_at)
+
+    @property
+    def eta_sec(self) -> Optional[float]:
+        """경과 시간 / 진행률로 남은 시간 추정 (진행률이 너무 작으면 None)"""
+        if self.status != "running" or self.progress < 0.02:
+            return None
+        return self.elapsed_sec * (1.0 - self.progress) / self.progress
+
+
+class JobStore:
+    """SQLite 작업 테이블. Streamlit 프로세스와 워커 프로세스가 같은 파일을 공유"""
+
+    def __init__(self, path: Path = JOBS_DB_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id       TEXT PRIMARY KEY,
+                kind         TEXT NOT NULL,
+                status       TEXT NOT NULL,
+                owner_pid    INTEGER NOT NULL,
+                params       TEXT NOT NULL,
+                stage        TEXT NOT NULL DEFAULT '',
+                stage_label  TEXT NOT NULL DEFAULT '',
+                progress     REAL NOT NULL DEFAULT 0,
+                message      TEXT NOT NULL DEFAULT '',
+                created_at   REAL NOT NULL,
+                started_at   REAL,
+                updated_at   REAL,
+                finished_at  REAL,
+                result       TEXT,
+                error        TEXT
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_jobs_created ON jobs(created_at)")
+
+    def _exec(self, sql: str, args: tuple = ()):
+        with self._lock:
+            return self._conn.execute(sql, args)
+
+    def create(self, kind: str, params: Dict[str, Any], *, job_id: Optional[str] = None) -> str:
+        job_id = job_id or uuid.uuid4().hex[:12]
+        self._exec(
+            "INSERT INTO jobs(job_id, kind, status, owner_pid, params, created_at) VALUES (?, ?, 'queued', ?, ?, ?)",
+            (job_id, kind, os.getpid(), canonical_json(params), time.time()),
+        )
+        return job_id
+
+    def mark_running(self, job_id: str) -> None:
+        now = time.time()
+        self._exec(
+            "UPDATE jobs SET status = 'running', started_at = ?, updated_at = ? WHERE job_id = ? AND status = 'queued'",
+            (now, now, job_id),
+        )
+
+    def update_progress(self, job_id: str, stage: str, stage_label: str, progress: float, message: str = "") -> None:
+        self._exec(
+            "UPDATE jobs SET stage = ?, stage_label = ?, progress = ?, message = ?, updated_at = ? "
+            "WHERE job_id = ? AND status = 'running'",
+            (stage, stage_label, float(min(max(progress, 0.0), 1.0)), message, time.time(), job_id),
+        )
+
+    def finish(self, job_id: str, result: Dict[str, Any]) -> None:
+        now = time.time()
+        self._exec(
+            "UPDATE jobs SET status = 'done', progress = 1, result = ?, error = NULL, updated_at = ?, finished_at = ? "
+            "WHERE job_id = ?",
+            (canonical_json(result), now, now, job_id),
+        )
+
+    def fail(self, job_id: str, error: str) -> None:
+        now = time.time()
+        self._exec(
+            "UPDATE jobs SET status = 'error', error = ?, updated_at = ?, finished_at = ? WHERE job_id = ?",
+            (error, now, now, job_id),
+        )
+
+    def get(self, job_id: str) -> Optional[JobInfo]:
+        row = self._exec(
+            "SELECT job_id, kind, status, stage, stage_label, progress, message, created_at, started_at, "
+            "updated_at, finished_at, result, error FROM jobs WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()
+        return self._to_info(row) if row is not None else None
+
+    def list_recent(self, limit: int = 10, kind: Optional[str] = None) -> List[JobInfo]:
+        sql = (
+            "SELECT job_id, kind, status, stage, stage_label, progress, message, created_at, started_at, "
+            "updated_at, finished_at, result, error FROM jobs"
+        )
+        args: tuple = ()
+        if kind is not None:
+            sql += " WHERE kind = ?"
+            args = (kind,)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        return [self._to_info(r) for r in self._exec(sql, args + (int(limit),)).fetchall()]
+
+    def fail_orphans(self, owner_pid: int) -> int:
+        """owner_pid가 아닌(이전 서버 프로세스가 맡았던) 미완료 작업을 중단 처리"""
+        now = time.time()
+        cur = self._exec(
+            "UPDATE jobs SET status = 'error', error = '서버 재시작으로 작업이 중단되었습니다.', "
+            "updated_at = ?, finished_at = ? WHERE status IN ('queued', 'running') AND owner_pid != ?",
+            (now, now, int(owner_pid)),
+        )
+        return cur.rowcount
+
+    def purge(self, older_than_sec: float) -> List[str]:
+        """오래된 완료 작업 삭제. 삭제된 job_id 반환(작업 폴더 정리용)"""
+        cutoff = time.time() - float(older_than_sec)
+        rows = self._exec(
+            "SELECT job_id FROM jobs WHERE status IN ('done', 'error') AND created_at < ?", (cutoff,)
+        ).fetchall()
+        ids = [r[0] for r in rows]
+        if ids:
+            self._exec(
+                f"DELETE FROM jobs WHERE job_id IN ({','.join('?' * len(ids))})", tuple(ids)
+            )
+        return ids
+
+    @staticmethod
+    def _to_info(row) -> JobInfo:
+        (job_id, kind, status, stage, stage_label, progress, message,
+         created_at, started_at, updated_at, finished_at, result, error) = row
+        return JobInfo(
+            job_id=job_id, kind=kind, status=status, stage=stage, stage_label=stage_label,
+            progress=float(progress), message=message, created_at=created_at, started_at=started_at,
+            updated_at=updated_at, finished_at=finished_at,
+            result=json.loads(result) if result else None, error=error,
+        )
+
+
+class JobProgress:
+    """
+    워커에서 target에 넘겨주는 진행률 보고기.
+    stages: [(단계 키, 표시 이름, 가중치)] → 단계 내 진행률(0~1)을 전체 진행률로 환산.
+    DB 쓰기는 min_interval_sec 간격으로 제한(단계가 바뀌면 바로 기록)
+    """
+
+    def __init__(self, store: JobStore, job_id: str, stages, *, min_interval_sec: float = 0.3):
+        self.store = store
+        self.job_id = job_id
+        self.stages = list(stages)
+        total = sum(float(w) for _, _, w in self.stages) or 1.0
+        self._start: Dict[str, float] = {}
+        self._weight: Dict[str, float] = {}
+        acc = 0.0
+        for key, _, w in self.stages:
+            self._start[key] = acc / total
+            self._weight[key] = float(w) / total
+            acc += float(w)
+        self._labels = {key: label for key, label, _ in self.stages}
+        self.min_interval_sec = float(min_interval_sec)
+        self._last_stage = None
+        self._last_write = 0.0
+
+    def __call__(self, stage: str, fraction: float = 0.0, message: str = "") -> None:
+        now = time.monotonic()
+        if stage == self._last_stage and now - self._last_write < self.min_interval_sec and fraction < 1.0:
+            return
+        overall = self._start.get(stage, 0.0) + self._weight.get(stage, 0.0) * min(max(fraction, 0.0), 1.0)
+        self.store.update_progress(self.job_id, stage, self._labels.get(stage, stage), overall, message)
+        self._last_stage = stage
+        self._last_write = now
+
+
+def _resolve_target(target: str):
+    module_name, _, func_name = target.partition(":")
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def _run_job(db_path: str, job_id: str, target: str, kwargs: Dict[str, Any]) -> None:
+    """워커 프로세스 진입점 (pickle 가능하도록 모듈 최상위 함수)"""
+    store = JobStore(Path(db_path))
+    store.mark_running(job_id)
+    try:
+        fn = _resolve_target(target)
+        stages = getattr(fn, "job_stages", [("run", "처리", 1.0)])
+        result = fn(progress=JobProgress(store, job_id, stages), **kwargs)
+        store.finish(job_id, result or {})
+    except Exception as e:
+        store.fail(job_id, f"{type(e).__name__}: {e}\n{traceback.format_exc(limit=5)}")
+
+
+class JobRunner:
+    """
+    프로세스 공용 작업 실행기. 워커는 spawn 방식(Streamlit 서버 스레드/락을 fork로 복제하지 않음)
+    - submit: 작업 행 생성 후 풀에 제출 → job_id 즉시 반환
+    - get / recent: 진행 상황 조회 (DB 기준이라 어느 세션에서든 같은 결과)
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, *, max_workers: int = JOB_WORKERS, jobs_dir: Path = JOBS_DIR):
+        self.store = store if store is not None else JobStore()
+        self.max_workers = max(1, int(max_workers))
+        self.jobs_dir = Path(jobs_dir)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.store.fail_orphans(os.getpid())
+        self._purge_old()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def job_dir(self, job_id: str) -> Path:
+        d = self.jobs_dir / job_id
+        d.mkdir(parents=True, exist_ok=True)
+        return d
+
+    def new_job_id(self) -> str:
+        return uuid.uuid4().hex[:12]
+
+    def submit(self, kind: str, target: str, *, job_id: Optional[str] = None, **kwargs) -> str:
+        """target: "패키지.모듈:함수" (워커에서 import). kwargs는 pickle 가능한 값만"""
+        job_id = self.store.create(kind, {"target": target, **kwargs}, job_id=job_id)
+        try:
+            fut = self._get_pool().submit(_run_job, str(self.store.path), job_id, target, kwargs)
+        except Exception as e:
+            self.store.fail(job_id, f"작업 제출 실패: {e}")
+            return job_id
+
+        def _on_done(f):
+            # 워커 프로세스 자체가 죽은 경우(BrokenProcessPool 등) DB에 남은 상태 정리
+            err = f.exception()
+            if err is not None:
+                info = self.store.get(job_id)
+                if info is not None and not info.done:
+                    self.store.fail(job_id, f"워커 프로세스 오류: {err}")
+                with self._lock:
+                    if getattr(self._pool, "_broken", False):
+                        self._pool = None
+
+        fut.add_done_callback(_on_done)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[JobInfo]:
+        return self.store.get(job_id)
+
+    def recent(self, limit: int = 10, kind: Optional[str] = None) -> List[JobInfo]:
+        return self.store.list_recent(limit, kind)
+
+    def _purge_old(self) -> None:
+        try:
+            for job_id in self.store.purge(JOB_KEEP_DAYS * 24 * 3600):
+                shutil.rmtree(self.jobs_dir / job_id, ignore_errors=True)
+        except Exception:
+            pass
+
+
+_RUNNER: Optional[JobRunner] = None
+_RUNNER_LOCK = threading.Lock()
+
+
+def get_job_runner() -> JobRunner:
+    """프로세스 공용 JobRunner (첫 호출 때 생성 → 이전 서버의 미완료 작업 정리)"""
+    global _RUNNER
+    with _RUNNER_LOCK:
+        if _RUNNER is None:
+            _RUNNER = JobRunner()
+        return _RUNNER
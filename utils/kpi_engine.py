@@ -0,0 +1,202 @@
+"""
+기존 PD 등급 컷 vs HCIS 듀얼 컷 KPI 비교 (TODO.md)
+
+KPI
+- 기대 손실 = PD x LGD x EAD
+- 기대 수익 = (1-PD) x r x EAD - 기대 손실   (r: 0.08~0.12 시나리오)
+- 승인군 평균 PD
+
+계산 방식
+- 정책(컷) 하나 = 고객별 승인 가중치 벡터 한 줄 → (정책 수 P, 고객 수 n) 가중치 행렬 W
+  (기존 등급 컷/HCIS 승인은 0/1, 추가검토 전환 시나리오는 전환율 r_conv)
+- 고객별 기초량 V(n, k)와 W @ V 한 번으로 모든 정책의 합계 산출 → 이자율 시나리오는 broadcast
+- 결과는 data_version + policy_hash 키로 st_data/kpi_cache에 저장해 재계산 방지
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import (
+    PD_GRADE_CUTS,
+    GRADE_ORDER,
+    T_LOW,
+    T_HIGH,
+    TARGET_COL,
+    KPI_RATE_SCENARIOS,
+    KPI_LGD,
+    KPI_DEFAULT_EAD,
+    KPI_REVIEW_CONV_RATES,
+    KPI_CACHE_DIR,
+)
+from utils.hcis_core import hcis_score_array, policy_hash
+from utils.data_loader import pick_pd_column
+from utils.review_simulation import estimate_ead_array
+
+
+def build_policy_weights(
+    pd_hat: np.ndarray,
+    score: np.ndarray,
+    *,
+    grade_cuts: Optional[dict] = None,
+    grade_order: Optional[Sequence[str]] = None,
+    t_low: float = T_LOW,
+    t_high: float = T_HIGH,
+    review_conv_rates: Sequence[float] = KPI_REVIEW_CONV_RATES,
+) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    정책별 승인 가중치 행렬 생성.
+    - 기존 PD 체계: 등급 g 이하 승인 (PD <= PD_GRADE_CUTS[g])
+    - HCIS 체계: 승인(score >= t_high), 승인 + 추가검토 구간 전환율 r_conv
+    반환: (meta[scheme, policy], W (P, n) float32). PD가 NaN인 고객은 모든 정책에서 0.
+    """
+    grade_cuts = grade_cuts or PD_GRADE_CUTS
+    grade_order = list(grade_order or GRADE_ORDER)
+
+    pd_hat = np.asarray(pd_hat, dtype=float)
+    score = np.asarray(score, dtype=float)
+    valid = np.isfinite(pd_hat)
+
+    meta, rows = [], []
+    for g in grade_order:
+        cut = float(grade_cuts[g])
+        meta.append({"scheme": "기존 PD 등급", "policy": f"{g}등급 이하 승인 (PD≤{cut:.0%})"})
+        rows.append(valid & (pd_hat <= cut))
+
+    approve = valid & (score >= t_high)
+    review = valid & (score >= t_low) & (score < t_high)
+    meta.append({"scheme": "HCIS 듀얼 컷", "policy": f"승인만 (≥{t_high:g})"})
+    rows.append(approve)
+    for r in review_conv_rates:
+        meta.append({"scheme": "HCIS 듀얼 컷", "policy": f"승인 + 추가검토 전환 {float(r):.0%}"})
+        rows.append(approve + float(r) * review)
+
+    W = np.vstack(rows).astype(np.float32) if rows else np.zeros((0, len(pd_hat)), dtype=np.float32)
+    return pd.DataFrame(meta), W
+
+
+def compute_policy_kpis(
+    df: pd.DataFrame,
+    *,
+    pd_col: Optional[str] = None,
+    rates: Sequence[float] = KPI_RATE_SCENARIOS,
+    lgd: float = KPI_LGD,
+    default_ead: float = KPI_DEFAULT_EAD,
+    review_conv_rates: Sequence[float] = KPI_REVIEW_CONV_RATES,
+    t_low: float = T_LOW,
+    t_high: float = T_HIGH,
+) -> pd.DataFrame:
+    """
+    전체 고객 대상 정책 x 이자율 KPI 테이블 (단일 벡터화 패스).
+    컬럼: scheme, policy, rate, approved_n, approve_rate, expected_revenue, expected_loss,
+         approved_mean_pd, (target이 있으면) approved_default_rate
+    """
+    pd_col = pd_col or pick_pd_column(df)
+    if pd_col is None or pd_col not in df.columns:
+        raise KeyError("PD 컬럼을 찾지 못했습니다.")
+
+    pd_hat = pd.to_numeric(df[pd_col], errors="coerce").to_numpy(dtype=float)
+    score = hcis_score_array(pd_hat)
+    meta, W = build_policy_weights(
+        pd_hat, score, t_low=t_low, t_high=t_high, review_conv_rates=review_conv_rates
+    )
+
+    valid = np.isfinite(pd_hat)
+    p = np.where(valid, pd_hat, 0.0)
+    ead = estimate_ead_array(df, default_ead)
+
+    has_target = TARGET_COL in df.columns
+    tgt = pd.to_numeric(df[TARGET_COL], errors="coerce").to_numpy(dtype=float) if has_target else np.zeros_like(p)
+    tgt_ok = np.isfinite(tgt) & valid
+
+    # 고객별 기초량 (n, 6)
+    V = np.stack([
+        np.ones_like(p),          # 0: 승인 수
+        p,                        # 1: PD 합
+        (1.0 - p) * ead,          # 2: 이자 기반
+        p * ead,                  # 3: 손실 기반
+        np.where(tgt_ok, tgt, 0), # 4: 실제 부도 수
+        tgt_ok.astype(float),     # 5: target 관측 수
+    ], axis=1)
+    S = W.astype(float) @ V        # (P, 6)
+
+    rates = np.asarray(list(rates), dtype=float)
+    el = S[:, 3] * lgd                                     # (P,)
+    revenue = S[:, 2][:, None] * rates[None, :] - el[:, None]   # (P, A)
+
+    n_valid = max(int(valid.sum()), 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_pd = np.where(S[:, 0] > 0, S[:, 1] / S[:, 0], np.nan)
+        dr = np.where(S[:, 5] > 0, S[:, 4] / S[:, 5], np.nan)
+
+    P, A = revenue.shape
+    ip, ia = np.repeat(np.arange(P), A), np.tile(np.arange(A), P)
+    out = pd.DataFrame({
+        "scheme": meta["scheme"].to_numpy()[ip],
+        "policy": meta["policy"].to_numpy()[ip],
+        "rate": rates[ia],
+        "approved_n": S[ip, 0],
+        "approve_rate": S[ip, 0] / n_valid,
+        "expected_revenue": revenue.ravel(),
+        "expected_loss": el[ip],
+        "approved_mean_pd": mean_pd[ip],
+    })
+    if has_target:
+        out["approved_default_rate"] = dr[ip]
+    return out
+
+
+def kpi_cache_key(data_version: str, **params) -> str:
+    """data_version + 정책 해시 + KPI 파라미터 → 캐시 파일 키"""
+    raw = json.dumps(
+        {"data_version": data_version, "policy": policy_hash(), "params": params},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def load_or_compute_policy_kpis(
+    df: pd.DataFrame,
+    data_version: str,
+    *,
+    cache_dir: Path = KPI_CACHE_DIR,
+    rates: Sequence[float] = KPI_RATE_SCENARIOS,
+    lgd: float = KPI_LGD,
+    default_ead: float = KPI_DEFAULT_EAD,
+    review_conv_rates: Sequence[float] = KPI_REVIEW_CONV_RATES,
+) -> pd.DataFrame:
+    """
+    디스크 캐시 우선 로드, 없으면 계산 후 저장.
+    data_version이 비어 있으면(파일 기준 버전을 알 수 없음) 캐시 없이 계산만.
+    """
+    params = dict(
+        rates=[float(r) for r in rates],
+        lgd=float(lgd),
+        default_ead=float(default_ead),
+        review_conv_rates=[float(r) for r in review_conv_rates],
+    )
+    path: Optional[Path] = None
+    if data_version:
+        path = Path(cache_dir) / f"policy_kpis_{kpi_cache_key(data_version, **params)}.parquet"
+        if path.exists():
+            try:
+                return pd.read_parquet(path)
+            except Exception:
+                pass  # 손상된 캐시는 재계산으로 덮어씀
+
+    out = compute_policy_kpis(df, **params)
+
+    if path is not None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            out.to_parquet(tmp, index=False)
+            tmp.replace(path)
+        except Exception:
+            pass  # 캐시 저장 실패는 화면 표시에 영향 없음
+    return out
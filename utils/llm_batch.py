@@ -0,0 +1,262 @@
+"""
+심사 리포트 배치 생성 (추가검토 대상 등 다건)
+
+- 제한된 스레드 풀로 동시 호출 → 전체 소요시간은 직렬 지연이 아니라 요청 한도(RPM)에 의해 결정
+- 토큰 버킷으로 분당 요청 수 제한 (503 재시도 호출도 토큰을 소모)
+- 결과는 ask_underwriter와 같은 키로 리포트 캐시에 저장 → 심사 화면에서 즉시 조회
+- packed=True: 같은 band 고객 N명을 요청 1건으로 묶어 호출 오버헤드/RPM 소모를 줄임
+  (N은 입력/출력 토큰 예산으로 결정, 응답은 고객별 캐시 항목으로 분할, 누락 고객은 단건 재호출)
+- 화면과 같은 차단기(circuit breaker)를 공유 → 장애 중에는 호출 없이 바로 "error"
+"""
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from config import LLM_BATCH_WORKERS, LLM_BATCH_RPM, LLM_PAYLOAD_COMPACT
+from utils import llm_gemini
+from utils.llm_cache import ReportCache, get_report_cache
+
+
+class TokenBucket:
+    """스레드 안전 토큰 버킷. rate_per_sec 속도로 채워지고 최대 capacity개까지 저장"""
+
+    def __init__(self, rate_per_sec: float, capacity: Optional[float] = None):
+        self.rate = float(rate_per_sec)
+        self.capacity = float(capacity if capacity is not None else max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, rpm: float, burst: Optional[float] = None) -> "TokenBucket":
+        return cls(rpm / 60.0, capacity=burst if burst is not None else max(1.0, rpm / 60.0))
+
+    def _refill_locked(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self, tokens: float = 1.0, cancel: Optional[threading.Event] = None) -> float:
+        """토큰을 얻을 때까지 대기. 대기한 시간(초) 반환. cancel이 set되면 중단(RuntimeError)"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill_locked()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                need = (tokens - self._tokens) / self.rate if self.rate > 0 else 1.0
+            if cancel is not None and cancel.wait(need):
+                raise RuntimeError("배치 생성이 취소되었습니다.")
+            if cancel is None:
+                time.sleep(need)
+            waited += need
+
+
+@dataclass
+class BatchReportResult:
+    index: int                         # 입력 payload 순서
+    key: str                           # 리포트 캐시 키
+    status: str                        # "cached" | "ok" | "error" | "cancelled"
+    report: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    elapsed_sec: float = 0.0
+
+
+def generate_underwriter_reports(
+    payloads: Sequence[Dict[str, Any]],
+    *,
+    max_workers: int = LLM_BATCH_WORKERS,
+    requests_per_minute: float = LLM_BATCH_RPM,
+    cache: Optional[ReportCache] = None,
+    skip_cached: bool = True,
+    call_fn: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    on_result: Optional[Callable[[BatchReportResult], None]] = None,
+    cancel: Optional[threading.Event] = None,
+    bucket: Optional[TokenBucket] = None,
+    max_retries: int = 4,
+    base_delay: float = 1.2,
+    packed: bool = False,
+    pack_call_fn: Optional[Callable[[List[Dict[str, Any]]], List[Optional[Dict[str, Any]]]]] = None,
+    breaker: Optional[llm_gemini.CircuitBreaker] = None,
+) -> List[BatchReportResult]:
+    """
+    payload(build_underwriter_payload 결과) 목록 → 심사 리포트 일괄 생성 후 캐시에 저장.
+    - call_fn: payload_llm → 응답 dict (기본: Gemini generate_underwriter_report, 클라이언트 1개 공유)
+    - on_result: 건별 완료 콜백(진행률 표시용, 워커 스레드에서 호출됨)
+    - cancel: set되면 아직 시작 안 한 건은 "cancelled"로 건너뜀
+    - bucket: 여러 배치가 한도를 공유해야 할 때 외부 토큰 버킷 전달
+    - packed / pack_call_fn: 묶음 요청 모드와 그 호출 함수(payload_llm 리스트 → 응답 리스트, 누락은 None)
+    - breaker: 호출 차단기 (기본: 화면과 공유하는 프로세스 공용 차단기)
+    반환: 입력 순서의 BatchReportResult 리스트
+    """
+    if call_fn is None or (packed and pack_call_fn is None):
+        if not llm_gemini.USE_LLM:
+            raise RuntimeError("GEMINI_API_KEY가 설정되지 않아 배치 생성을 할 수 없습니다.")
+        client, model = llm_gemini.get_gemini_client()
+
+        if call_fn is None:
+            def call_fn(payload_llm: Dict[str, Any]) -> Dict[str, Any]:
+                return llm_gemini.generate_underwriter_report(payload_llm, client=client, model_name=model)
+
+        if packed and pack_call_fn is None:
+            def pack_call_fn(payloads_llm: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+                return llm_gemini.generate_underwriter_reports_packed(payloads_llm, client=client, model_name=model)
+
+    cache = cache if cache is not None else get_report_cache()
+    bucket = bucket if bucket is not None else TokenBucket.per_minute(requests_per_minute)
+    breaker = breaker if breaker is not None else llm_gemini.get_circuit_breaker()
+
+    def _one(i: int, payload: Dict[str, Any]) -> BatchReportResult:
+        t0 = time.perf_counter()
+        payload_llm = llm_gemini.normalize_payload_for_llm(payload, compact=LLM_PAYLOAD_COMPACT)
+        key = llm_gemini.underwriter_cache_key(payload_llm)
+        if cancel is not None and cancel.is_set():
+            return BatchReportResult(i, key, "cancelled")
+        try:
+            if skip_cached:
+                hit = cache.get(key)
+                if hit is not None:
+                    return BatchReportResult(i, key, "cached", hit, elapsed_sec=time.perf_counter() - t0)
+            if not payload_llm.get("shap_top_10"):
+                raise RuntimeError("SHAP(top10) 정보가 payload에 없습니다.")
+
+            def _limited():
+                def _call():
+                    bucket.acquire(cancel=cancel)
+                    return call_fn(payload_llm)
+                return llm_gemini.call_with_breaker(_call, breaker)
+
+            report = llm_gemini.run_with_retry(_limited, max_retries=max_retries, base_delay=base_delay)
+            cache.put(key, report)
+            return BatchReportResult(i, key, "ok", report, elapsed_sec=time.perf_counter() - t0)
+        except Exception as e:
+            status = "cancelled" if (cancel is not None and cancel.is_set()) else "error"
+            return BatchReportResult(i, key, status, error=str(e), elapsed_sec=time.perf_counter() - t0)
+
+    if packed:
+        return _generate_packed(
+            payloads, one_fn=_one, pack_call_fn=pack_call_fn, max_workers=max_workers,
+            cache=cache, skip_cached=skip_cached, on_result=on_result, cancel=cancel,
+            bucket=bucket, breaker=breaker, max_retries=max_retries, base_delay=base_delay,
+        )
+
+    results: List[Optional[BatchReportResult]] = [None] * len(payloads)
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="llm-batch") as ex:
+        futures = [ex.submit(_one, i, p) for i, p in enumerate(payloads)]
+        for fut in as_completed(futures):
+            res = fut.result()
+            results[res.index] = res
+            if on_result is not None:
+                on_result(res)
+    return [r for r in results if r is not None]
+
+
+def _generate_packed(
+    payloads: Sequence[Dict[str, Any]],
+    *,
+    one_fn: Callable[[int, Dict[str, Any]], BatchReportResult],
+    pack_call_fn: Callable[[List[Dict[str, Any]]], List[Optional[Dict[str, Any]]]],
+    max_workers: int,
+    cache: ReportCache,
+    skip_cached: bool,
+    on_result: Optional[Callable[[BatchReportResult], None]],
+    cancel: Optional[threading.Event],
+    bucket: TokenBucket,
+    breaker: llm_gemini.CircuitBreaker,
+    max_retries: int,
+    base_delay: float,
+) -> List[BatchReportResult]:
+    """
+    묶음 요청 모드.
+    1) 캐시 적중은 바로 결과 처리 2) 미적중만 plan_underwriter_packs로 묶음 계획
+    3) 묶음 1건 = 토큰 1개, 응답은 고객별 단건 키로 캐시 저장 4) 응답에서 빠진 고객은 단건(one_fn)으로 재호출
+    """
+    results: List[Optional[BatchReportResult]] = [None] * len(payloads)
+    results_lock = threading.Lock()
+
+    def _emit(res: BatchReportResult) -> None:
+        with results_lock:
+            results[res.index] = res
+        if on_result is not None:
+            on_result(res)
+
+    pending: List[int] = []
+    payloads_llm: List[Dict[str, Any]] = []
+    keys: List[str] = []
+    for i, payload in enumerate(payloads):
+        payload_llm = llm_gemini.normalize_payload_for_llm(payload, compact=LLM_PAYLOAD_COMPACT)
+        key = llm_gemini.underwriter_cache_key(payload_llm)
+        payloads_llm.append(payload_llm)
+        keys.append(key)
+        hit = cache.get(key) if skip_cached else None
+        if hit is not None:
+            _emit(BatchReportResult(i, key, "cached", hit))
+        elif not payload_llm.get("shap_top_10"):
+            _emit(BatchReportResult(i, key, "error", error="SHAP(top10) 정보가 payload에 없습니다."))
+        else:
+            pending.append(i)
+
+    packs = llm_gemini.plan_underwriter_packs([payloads_llm[i] for i in pending])
+
+    def _pack(local_idxs: List[int]) -> List[int]:
+        """묶음 1건 처리 → 응답에서 빠져 단건 재호출이 필요한 입력 인덱스 반환"""
+        idxs = [pending[j] for j in local_idxs]
+        if cancel is not None and cancel.is_set():
+            for i in idxs:
+                _emit(BatchReportResult(i, keys[i], "cancelled"))
+            return []
+        t0 = time.perf_counter()
+
+        def _limited():
+            def _call():
+                bucket.acquire(cancel=cancel)
+                return pack_call_fn([payloads_llm[i] for i in idxs])
+            return llm_gemini.call_with_breaker(_call, breaker)
+
+        try:
+            reports = llm_gemini.run_with_retry(_limited, max_retries=max_retries, base_delay=base_delay)
+        except Exception as e:
+            if cancel is not None and cancel.is_set():
+                for i in idxs:
+                    _emit(BatchReportResult(i, keys[i], "cancelled"))
+                return []
+            if isinstance(e, llm_gemini.CircuitOpenError):
+                # 차단 중 → 단건 재호출도 막히므로 바로 오류 처리
+                for i in idxs:
+                    _emit(BatchReportResult(i, keys[i], "error", error=str(e)))
+                return []
+            return idxs  # 묶음 실패 → 단건으로 다시 시도
+
+        elapsed = (time.perf_counter() - t0) / max(1, len(idxs))
+        missing: List[int] = []
+        for i, report in zip(idxs, reports):
+            if report is None:
+                missing.append(i)
+                continue
+            cache.put(keys[i], report)
+            _emit(BatchReportResult(i, keys[i], "ok", report, elapsed_sec=elapsed))
+        return missing
+
+    retry: List[int] = []
+    with ThreadPoolExecutor(max_workers=max(1, int(max_workers)), thread_name_prefix="llm-pack") as ex:
+        for fut in as_completed([ex.submit(_pack, p) for p in packs]):
+            retry.extend(fut.result())
+        for fut in as_completed([ex.submit(one_fn, i, payloads[i]) for i in sorted(retry)]):
+            _emit(fut.result())
+
+    return [r for r in results if r is not None]
+
+
+def summarize_batch(results: Sequence[BatchReportResult]) -> Dict[str, Any]:
+    """상태별 건수 + 생성 건 평균 소요시간"""
+    out: Dict[str, Any] = {"total": len(results), "cached": 0, "ok": 0, "error": 0, "cancelled": 0}
+    for r in results:
+        out[r.status] = out.get(r.status, 0) + 1
+    gen = [r.elapsed_sec for r in results if r.status == "ok"]
+    out["avg_generate_sec"] = (sum(gen) / len(gen)) if gen else 0.0
+    return out
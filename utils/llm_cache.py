@@ -0,0 +1,161 @@
+"""
+LLM 응답 영구 캐시 (SQLite)
+
+- 키: 정규화된 LLM payload + 프롬프트 변형 + 모델명 + 생성 설정의 canonical JSON → sha256
+  (프롬프트/스키마 문구가 바뀌면 prompt_variant 해시가 달라져 자동으로 새 키)
+- TTL 만료 항목은 조회 시 무시/삭제, 항목 수가 max_entries를 넘으면 오래 안 쓴 것부터 삭제
+- 프로세스 내 동일 파일은 하나의 ReportCache 인스턴스를 공유(get_report_cache)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import LLM_CACHE_PATH, LLM_CACHE_TTL_SEC, LLM_CACHE_MAX_ENTRIES
+
+
+def _json_default(o: Any):
+    # numpy 스칼라/배열 등 → 파이썬 기본형
+    if hasattr(o, "item"):
+        try:
+            return o.item()
+        except Exception:
+            pass
+    if hasattr(o, "tolist"):
+        return o.tolist()
+    return str(o)
+
+
+def canonical_json(obj: Any) -> str:
+    """키 정렬 + 공백 제거 + numpy 정규화된 JSON 문자열"""
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+
+
+def text_fingerprint(*texts: str) -> str:
+    """프롬프트/시스템 지시문 묶음의 짧은 해시 (prompt_variant 용)"""
+    h = hashlib.sha256()
+    for t in texts:
+        h.update((t or "").encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()[:16]
+
+
+def make_cache_key(
+    payload_llm: Dict[str, Any],
+    *,
+    prompt_variant: str,
+    model: str,
+    generation: Optional[Dict[str, Any]] = None,
+) -> str:
+    raw = canonical_json({
+        "payload": payload_llm,
+        "prompt": prompt_variant,
+        "model": model,
+        "generation": generation or {},
+    })
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ReportCache:
+    """SQLite 기반 key → JSON dict 캐시 (스레드 안전)"""
+
+    def __init__(
+        self,
+        path: Path = LLM_CACHE_PATH,
+        *,
+        ttl_seconds: float = LLM_CACHE_TTL_SEC,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ):
+        self.path = Path(path)
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = int(max_entries)
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key         TEXT PRIMARY KEY,
+                value       TEXT NOT NULL,
+                created_at  REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_access ON llm_cache(last_access)")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self.ttl_seconds > 0 and now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        data = canonical_json(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache(key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, data, now, now),
+            )
+            self._evict_locked(now)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        return row is not None and (self.ttl_seconds <= 0 or time.time() - row[0] <= self.ttl_seconds)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+
+    def _evict_locked(self, now: float) -> None:
+        if self.ttl_seconds > 0:
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        if self.max_entries > 0:
+            n = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            if n > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    "SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                    (n - self.max_entries,),
+                )
+
+
+_CACHES: Dict[str, ReportCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_report_cache(path: Path = LLM_CACHE_PATH) -> ReportCache:
+    """경로별 공유 인스턴스 (Streamlit rerun/스레드 간 재사용)"""
+    key = str(Path(path).resolve())
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = ReportCache(path)
+            _CACHES[key] = cache
+        return cache
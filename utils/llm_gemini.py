@@ -1,11 +1,22 @@
 from __future__ import annotations
-import os, json, time
+import os, json, time, random, threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dotenv import load_dotenv
 
-from typing import Any, Dict, List, Optional, Callable, Tuple, Type
+from typing import Any, Dict, Iterator, List, Optional, Callable, Set, Tuple, Type
 from pathlib import Path
 from pydantic import BaseModel, Field
 
+from config import LLM_PACK_INPUT_TOKENS, LLM_PACK_MAX_OUTPUT_TOKENS, LLM_PACK_MAX_CASES
+from config import LLM_PAYLOAD_COMPACT, LLM_PAYLOAD_TOKEN_BUDGET
+from config import LLM_CLIENT_MAX_CONCURRENCY, LLM_CLIENT_TIMEOUT_SEC, LLM_CLIENT_HEALTH_TTL_SEC
+from config import (
+    LLM_BREAKER_FAILURES, LLM_BREAKER_RESET_SEC, LLM_RETRY_DEADLINE_SEC, LLM_RETRY_MAX_DELAY_SEC,
+    LLM_HEDGE_ENABLED, LLM_HEDGE_PERCENTILE, LLM_HEDGE_MIN_SAMPLES, LLM_HEDGE_DEFAULT_SEC,
+)
+from utils.llm_cache import ReportCache, get_report_cache, make_cache_key, text_fingerprint
+
 # .env 로딩
 _CURRENT = Path(__file__).resolve()
 ENV_PATH = _CURRENT.parent.parent / ".env" 
@@ -103,6 +114,17 @@ class UnderwriterResponse(BaseModel):
     )
 
 
+# 다건 묶음 요청(packed)용: 고객별 응답 + case_id, 그 리스트
+class UnderwriterCaseResponse(UnderwriterResponse):
+    case_id: str = Field(description="입력 cases[].case_id 값을 그대로 복사")
+
+
+class UnderwriterBatchResponse(BaseModel):
+    reports: List[UnderwriterCaseResponse] = Field(
+        description="입력 cases 순서대로, case마다 정확히 1개의 UnderwriterResponse(+case_id)",
+    )
+
+
 # class CustomerResponse(BaseModel):
 #     summary: str = Field(
 #         description="현재 상태를 쉬운 말로 1문장(확정 표현 금지)",
@@ -258,6 +280,14 @@ UNDERWRITER_PROMPT_REJECT = """
 - customer_message_draft에는 내부 용어/feature/SHAP 노출 금지.
 """.strip()
 
+UNDERWRITER_PACKED_PROMPT = """
+[다건 처리]
+- 입력 JSON은 {"cases": [{"case_id": ..., "payload": {...}}, ...]} 형태로 여러 고객을 담고 있습니다.
+- 각 case의 payload를 단건 payload와 동일하게 취급해, 위 규칙대로 고객마다 독립적으로 작성하세요.
+- 고객 간 정보를 섞거나 비교하지 마세요.
+- 출력은 UnderwriterBatchResponse 스키마(JSON)만 반환하며, reports에 case마다 정확히 1개씩, case_id를 그대로 넣으세요.
+""".strip()
+
 UNDERWRITER_PROMPT_BY_BAND = {
     "승인": UNDERWRITER_PROMPT_APPROVE,
     "추가검토": UNDERWRITER_PROMPT_REVIEW,
@@ -290,12 +320,143 @@ UNDERWRITER_PROMPT_BY_BAND = {
 
 
 # Gemini client
+def get_gemini_model_name() -> str:
+    return os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
+
+def _new_gemini_client(api_key: str, base_url: Optional[str], max_connections: int) -> genai.Client:
+    # GEMINI_BASE_URL: 로컬 대역 서버(scripts/gemini_stub_server.py) 등으로 엔드포인트 교체
+    opts: Dict[str, Any] = {"timeout": int(LLM_CLIENT_TIMEOUT_SEC * 1000)}
+    if base_url:
+        opts["base_url"] = base_url
+    try:
+        import httpx
+        # 동시 호출 수만큼 keep-alive 연결 유지 → 호출마다 연결/TLS 설정 없음
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        http_options = types.HttpOptions(client_args={"limits": limits}, **opts)
+    except Exception:
+        http_options = types.HttpOptions(**opts)
+    return genai.Client(api_key=api_key, http_options=http_options)
+
+
+class GeminiClientPool:
+    """
+    프로세스 공용 Gemini 클라이언트
+    - (api_key, base_url)이 같으면 클라이언트 1개를 재사용 (내부 HTTP 연결 풀 keep-alive)
+    - slot(): 동시 호출 수 제한 (Streamlit 세션/배치/선생성 전체 합산)
+    - health_check(): 모델 조회 1회로 엔드포인트/키 확인, 결과는 health_ttl_sec 동안 재사용
+    - 교체/reset된 클라이언트는 진행 중 호출(slot)이 모두 끝난 뒤 close() → 연결 풀 누수 없음
+    """
+
+    def __init__(self, max_concurrency: int = LLM_CLIENT_MAX_CONCURRENCY, health_ttl_sec: float = LLM_CLIENT_HEALTH_TTL_SEC):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.health_ttl_sec = float(health_ttl_sec)
+        self._lock = threading.Lock()
+        self._sem = threading.BoundedSemaphore(self.max_concurrency)
+        self._client: Optional[genai.Client] = None
+        self._client_key: Optional[Tuple[str, str]] = None
+        self._retired: List[genai.Client] = []
+        self._created = 0
+        self._in_flight = 0
+        self._health: Optional[Tuple[float, bool, str]] = None
+
+    def get(self) -> Tuple[Optional[genai.Client], str]:
+        api_key = os.getenv("GEMINI_API_KEY")
+        model = get_gemini_model_name()
+        if not api_key:
+            return None, model
+        key = (api_key, os.getenv("GEMINI_BASE_URL") or "")
+        with self._lock:
+            if self._client is None or self._client_key != key:
+                self._retire_locked()
+                self._client = _new_gemini_client(api_key, key[1] or None, self.max_concurrency)
+                self._client_key = key
+                self._created += 1
+                self._health = None
+            return self._client, model
+
+    def reset(self) -> None:
+        """다음 get()에서 클라이언트 재생성 (연결 오류가 계속될 때 등)"""
+        with self._lock:
+            self._retire_locked()
+            self._client_key = None
+            self._health = None
+
+    def _retire_locked(self) -> None:
+        # 이미 받아 간 호출이 있을 수 있으므로 바로 닫지 않고 in_flight가 0이 될 때 닫음
+        if self._client is not None:
+            self._retired.append(self._client)
+            self._client = None
+
+    def _take_retired_locked(self) -> List[genai.Client]:
+        if self._in_flight > 0:
+            return []
+        retired, self._retired = self._retired, []
+        return retired
+
+    def slot(self) -> "_PoolSlot":
+        return _PoolSlot(self)
+
+    def health_check(self, *, force: bool = False) -> Tuple[bool, str]:
+        with self._lock:
+            cached = self._health
+        if not force and cached is not None and time.monotonic() - cached[0] < self.health_ttl_sec:
+            return cached[1], cached[2]
+        client, model = self.get()
+        if client is None:
+            ok, msg = False, "GEMINI_API_KEY 미설정"
+        else:
+            try:
+                with self.slot():
+                    client.models.get(model=model)
+                ok, msg = True, "ok"
+            except Exception as e:
+                ok, msg = False, str(e)[:200]
+        with self._lock:
+            self._health = (time.monotonic(), ok, msg)
+        return ok, msg
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "clients_created": self._created,
+                "in_flight": self._in_flight,
+                "retired_pending": len(self._retired),
+                "max_concurrency": self.max_concurrency,
+                "healthy": None if self._health is None else self._health[1],
+            }
+
+
+class _PoolSlot:
+    def __init__(self, pool: GeminiClientPool):
+        self.pool = pool
+
+    def __enter__(self):
+        self.pool._sem.acquire()
+        with self.pool._lock:
+            self.pool._in_flight += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self.pool._lock:
+            self.pool._in_flight -= 1
+            retired = self.pool._take_retired_locked()
+        self.pool._sem.release()
+        for client in retired:
+            try:
+                client.close()
+            except Exception:
+                pass  # 닫기 실패는 무시 (참조가 사라지면 GC가 정리)
+        return False
+
+
+_CLIENT_POOL = GeminiClientPool()
+
+def get_client_pool() -> GeminiClientPool:
+    return _CLIENT_POOL
+
 def get_gemini_client() -> Tuple[genai.Client, str]:
-    api_key = os.getenv("GEMINI_API_KEY")
-    model = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-lite")
-    if not api_key:
-        return None, model
-    return genai.Client(api_key=api_key), model
+    """공용 풀의 클라이언트 (매 호출 새로 만들지 않음)"""
+    return _CLIENT_POOL.get()
 
 # 기본값으로 사용될 MOCK 데모모드
 def mock_underwriter_response(payload_llm: dict) -> dict:
@@ -361,6 +522,17 @@ def mock_underwriter_response(payload_llm: dict) -> dict:
     }
 
 
+# Gemini 장애 시 대체 리포트 (mock 형식 + 장애 표시)
+def fallback_underwriter_response(payload_llm: dict, reason: str = "") -> dict:
+    out = mock_underwriter_response(payload_llm)
+    out["_mode"] = "fallback"
+    out["_error"] = reason
+    out["summary"] = out["summary"].replace("🧪 데모 모드: ", "⚠️ 임시 요약: ").replace(" (API Key 미설정)", "")
+    out["customer_message_draft"] = "AI 서비스 응답 지연으로 간략 안내만 표시됩니다."
+    out["disclaimer"] = "AI 서비스 장애로 규칙 기반 임시 요약을 표시합니다. 복구 후 다시 생성하세요."
+    return out
+
+
 # core runner
 def run_gemini_structured(
     case_payload: Dict[str, Any],
@@ -388,29 +560,49 @@ def run_gemini_structured(
     contents = f"""{prompt}
 
 <INPUT_JSON>
-{json.dumps(case_payload, ensure_ascii=False)}
+{payload_json(case_payload)}
 </INPUT_JSON>
 """
 
-    resp = client.models.generate_content(
-        model=model_name,
-        contents=contents,
-        config=generation_config,
-    )
+    with _CLIENT_POOL.slot():
+        resp = client.models.generate_content(
+            model=model_name,
+            contents=contents,
+            config=generation_config,
+        )
 
     parsed = resp.parsed
     if parsed is None:
-        raise RuntimeError("Gemini 응답 파싱 실패: response.parsed is None")
+        raise LLMResponseError("Gemini 응답 파싱 실패: response.parsed is None")
     return parsed.model_dump()
 
 # llm을 위한 shap_bundle 정규화
-def normalize_payload_for_llm(payload: dict) -> dict:
+def normalize_payload_for_llm(
+    payload: dict,
+    *,
+    compact: bool = False,
+    token_budget: Optional[int] = None,
+    stats: Optional[Dict[str, Any]] = None,
+) -> dict:
     """
     hcis_core payload(**shap_bundle 포함)을 LLM이 쓰기 쉬운 형태로 표준화
 
     표준 shap_top_10 형식:
       [{feature, shap, value, reason_label, reason_group, risk_pct_of_top10}]
+
+    compact=True면 compact_payload_for_llm까지 적용 (token_budget 기본: LLM_PAYLOAD_TOKEN_BUDGET,
+    stats에 압축 전/후 크기 기록)
     """
+    p = _normalize_payload(payload)
+    if compact:
+        p = compact_payload_for_llm(
+            p,
+            token_budget=LLM_PAYLOAD_TOKEN_BUDGET if token_budget is None else token_budget,
+            stats=stats,
+        )
+    return p
+
+def _normalize_payload(payload: dict) -> dict:
     p = dict(payload)
     top10 = None  # ✅ NameError 방지
 
@@ -484,29 +676,625 @@ def normalize_payload_for_llm(payload: dict) -> dict:
 
 
 
-# 503 retry wrapper
+# ---------------------------------------------------------
+# LLM 입력 압축
+# - 프롬프트가 읽는 키만 유지: policy / shap_top_10 / group_contribution_summary / behavioral_insights
+# - top_reasons(=shap_top_10 원본), top_reasons_public(고객용), reason_contribution_summary(alias) 제거
+# - 실수 반올림, None 값 제거, 예산 초과 시 뒤쪽 근거부터 축소 (shap_top_10은 상위 3개까지 보존)
+# ---------------------------------------------------------
+_COMPACT_KEEP_KEYS = (
+    "sk_id_curr", "pd_hat", "hcis_score", "policy",
+    "shap_top_10", "group_contribution_summary", "behavioral_insights", "other_note",
+)
+_COMPACT_FLOAT_DIGITS = {"pd_hat": 4, "hcis_score": 1, "shap": 4, "value": 4, "risk_pct_of_top10": 2, "margin_score": 2}
+
+def _round_floats(obj: Any, digits: int = 4, key: Optional[str] = None) -> Any:
+    if isinstance(obj, dict):
+        out = {k: _round_floats(v, digits, k) for k, v in obj.items()}
+        return {k: v for k, v in out.items() if v is not None}
+    if isinstance(obj, (list, tuple)):
+        return [_round_floats(v, digits, key) for v in obj]
+    if isinstance(obj, bool) or obj is None:
+        return obj
+    if hasattr(obj, "item") and not isinstance(obj, (str, bytes)):  # numpy 스칼라
+        try:
+            obj = obj.item()
+        except Exception:
+            return obj
+    if isinstance(obj, float):
+        if obj != obj:  # NaN
+            return None
+        r = round(obj, _COMPACT_FLOAT_DIGITS.get(key or "", digits))
+        return int(r) if r.is_integer() and abs(r) < 1e15 else r
+    return obj
+
+def payload_json(payload_llm: dict) -> str:
+    """LLM 입력용 JSON 직렬화 (공백 없는 구분자)"""
+    return json.dumps(payload_llm, ensure_ascii=False, separators=(",", ":"), default=str)
+
+def compact_payload_for_llm(
+    payload_llm: dict,
+    *,
+    token_budget: int = LLM_PAYLOAD_TOKEN_BUDGET,
+    stats: Optional[Dict[str, Any]] = None,
+) -> dict:
+    """정규화 payload → 중복 제거/반올림/예산 적용된 payload (stats에 chars/tokens before·after 기록)"""
+    before = json.dumps(payload_llm, ensure_ascii=False, default=str)
+
+    p = {k: payload_llm[k] for k in _COMPACT_KEEP_KEYS if k in payload_llm}
+    if "group_contribution_summary" not in p and isinstance(payload_llm.get("reason_contribution_summary"), list):
+        p["group_contribution_summary"] = payload_llm["reason_contribution_summary"]
+    p = _round_floats(p)
+
+    # 예산 초과 시: behavioral_insights → shap_top_10(최소 3) → group_contribution_summary(최소 3) 순으로 축소
+    trimmed = 0
+    if token_budget and token_budget > 0:
+        floors = (("behavioral_insights", 0), ("shap_top_10", 3), ("group_contribution_summary", 3))
+        for k, floor in floors:
+            while (
+                isinstance(p.get(k), list)
+                and len(p[k]) > floor
+                and estimate_tokens(payload_json(p)) > token_budget
+            ):
+                p[k] = p[k][:-1]
+                trimmed += 1
+            if isinstance(p.get(k), list) and not p[k]:
+                p.pop(k)
+
+    if stats is not None:
+        after = payload_json(p)
+        stats.update({
+            "chars_before": len(before),
+            "chars_after": len(after),
+            "tokens_before": estimate_tokens(before),
+            "tokens_after": estimate_tokens(after),
+            "dropped_keys": sorted(set(payload_llm) - set(p)),
+            "trimmed_items": trimmed,
+        })
+    return p
+
+
+# ---------------------------------------------------------
+# 장애 대응: circuit breaker / 재시도(지터+총 대기 상한) / hedge
+# ---------------------------------------------------------
+class CircuitOpenError(RuntimeError):
+    """차단 중이라 호출하지 않음 (재시도 대상 아님)"""
+
+
+class LLMResponseError(RuntimeError):
+    """응답은 받았지만 스키마 파싱 실패 (서비스 장애 아님 → 차단 집계 제외, 대체 리포트 대상)"""
+
+
+class CircuitBreaker:
+    """
+    연속 실패 failure_threshold회 → open(호출 차단), reset_timeout_sec 후 half-open(시험 호출 1건)
+    시험 호출 성공 → closed, 실패 → 다시 open
+    시험 호출이 결과 없이 끝나면(스트림 중단, 재시도 불가 오류) release_trial로 반납
+    """
+
+    def __init__(self, failure_threshold: int = LLM_BREAKER_FAILURES, reset_timeout_sec: float = LLM_BREAKER_RESET_SEC):
+        self.failure_threshold = int(failure_threshold)
+        self.reset_timeout_sec = float(reset_timeout_sec)
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._trial_seq = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state_locked(time.monotonic())
+
+    def _state_locked(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at >= self.reset_timeout_sec:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        return self.acquire() is not None
+
+    def acquire(self) -> Optional[int]:
+        """allow()와 같되 허용 시 티켓 반환: closed면 0, half-open 시험 호출이면 시험 번호(>0), 차단이면 None"""
+        with self._lock:
+            st = self._state_locked(time.monotonic())
+            if st == "closed":
+                return 0
+            if st == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial_seq += 1
+                return self._trial_seq
+            return None
+
+    def release_trial(self, ticket: Optional[int]) -> None:
+        """성공/실패 기록 없이 시험 호출 반납 (그 시험을 맡은 티켓일 때만)"""
+        if not ticket:
+            return
+        with self._lock:
+            if self._trial_in_flight and ticket == self._trial_seq:
+                self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = now
+            self._trial_in_flight = False
+
+    def retry_after_sec(self) -> float:
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_timeout_sec - (time.monotonic() - self._opened_at))
+
+
+class LatencyTracker:
+    """최근 성공 호출 지연(초) → 분위수 (hedge 기준 시간)"""
+
+    def __init__(self, maxlen: int = 200):
+        self._lock = threading.Lock()
+        self._samples: deque = deque(maxlen=maxlen)
+
+    def record(self, sec: float) -> None:
+        with self._lock:
+            self._samples.append(float(sec))
+
+    def percentile(self, q: float, *, min_samples: int = LLM_HEDGE_MIN_SAMPLES, default: float = LLM_HEDGE_DEFAULT_SEC) -> float:
+        with self._lock:
+            xs = sorted(self._samples)
+        if len(xs) < max(1, min_samples):
+            return float(default)
+        pos = min(len(xs) - 1, max(0, int(round(q / 100.0 * (len(xs) - 1)))))
+        return xs[pos]
+
+
+_BREAKER = CircuitBreaker()
+_LATENCY = LatencyTracker()
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm-hedge")
+
+def get_circuit_breaker() -> CircuitBreaker:
+    return _BREAKER
+
+def run_hedged(fn: Callable[[], Dict[str, Any]], hedge_after_sec: float) -> Dict[str, Any]:
+    """
+    fn 실행 후 hedge_after_sec 안에 안 끝나면 같은 요청을 한 번 더 보내고 먼저 성공한 결과 사용.
+    (늦게 끝난 쪽은 버림 - HTTP 요청은 취소 불가)
+    """
+    first = _HEDGE_POOL.submit(fn)
+    done, _ = wait([first], timeout=max(0.0, hedge_after_sec))
+    if done:
+        return first.result()
+    futures = {first, _HEDGE_POOL.submit(fn)}
+    last_error: Optional[BaseException] = None
+    while futures:
+        done, futures = wait(futures, return_when=FIRST_COMPLETED)
+        for f in done:
+            if f.exception() is None:
+                return f.result()
+            last_error = f.exception()
+    raise last_error  # 둘 다 실패
+
+_RETRYABLE_MARKERS = (
+    "503", "Service Unavailable", "temporarily unavailable", "UNAVAILABLE",
+    "429", "RESOURCE_EXHAUSTED", "504", "DEADLINE_EXCEEDED", "timed out",
+)
+
+def is_retryable_error(e: BaseException) -> bool:
+    if isinstance(e, (CircuitOpenError, LLMResponseError)):
+        return False
+    if isinstance(e, (TimeoutError, ConnectionError)):
+        return True
+    msg = str(e)
+    return any(k in msg for k in _RETRYABLE_MARKERS)
+
+def is_provider_error(e: BaseException) -> bool:
+    """
+    Gemini 호출/응답 쪽 오류인지 (→ 대체 리포트로 처리). 아니면 코드 오류로 보고 그대로 올림.
+    재시도 소진 RuntimeError는 원인(__cause__)까지 확인
+    """
+    while e is not None:
+        if isinstance(e, (CircuitOpenError, LLMResponseError)) or is_retryable_error(e):
+            return True
+        if USE_LLM:
+            from google.genai import errors as genai_errors
+            if isinstance(e, genai_errors.APIError):
+                return True
+        try:
+            import httpx
+            if isinstance(e, httpx.HTTPError):
+                return True
+        except ImportError:
+            pass
+        e = e.__cause__
+    return False
+
+def call_with_breaker(call: Callable[[], Any], breaker: Optional[CircuitBreaker] = None) -> Any:
+    """
+    차단기 확인 후 호출 1건. 재시도 대상 오류(503/타임아웃 등)만 실패로 집계,
+    그 밖의 오류(4xx/파싱/코드 오류)는 시험 호출만 반납하고 그대로 올림
+    """
+    breaker = breaker or get_circuit_breaker()
+    ticket = breaker.acquire()
+    if ticket is None:
+        raise CircuitOpenError("AI 호출 일시 차단 중 (연속 실패)")
+    try:
+        out = call()
+    except BaseException as e:
+        if isinstance(e, Exception) and is_retryable_error(e):
+            breaker.record_failure()
+        else:
+            breaker.release_trial(ticket)
+        raise
+    breaker.record_success()
+    return out
+
+# 503 retry wrapper (full jitter 지수 backoff + 총 대기 상한)
 def run_with_retry(
     fn: Callable[[], Dict[str, Any]],
     max_retries: int = 5,
     base_delay: float = 1.5,
+    *,
+    deadline_sec: Optional[float] = None,
+    max_delay: float = LLM_RETRY_MAX_DELAY_SEC,
 ) -> Dict[str, Any]:
+    t_end = None if deadline_sec is None else time.monotonic() + float(deadline_sec)
     for attempt in range(1, max_retries + 1):
         try:
             return fn()
         except Exception as e:
-            msg = str(e)
-            if any(k in msg for k in ["503", "Service Unavailable", "temporarily unavailable"]):
-                wait = base_delay * (2 ** (attempt - 1))
-                time.sleep(wait)
+            if not is_retryable_error(e) or attempt == max_retries:
+                raise
+            wait_sec = random.uniform(0.0, min(max_delay, base_delay * (2 ** (attempt - 1))))
+            if t_end is not None:
+                remaining = t_end - time.monotonic()
+                if remaining <= wait_sec:
+                    raise RuntimeError(f"Gemini 호출 실패: 재시도 대기 상한({deadline_sec:.0f}s) 초과 - {e}") from e
+            time.sleep(wait_sec)
+    raise RuntimeError("Gemini 호출 실패: 재시도 횟수 초과")
+
+
+# 심사용 생성 설정 (호출과 캐시 키가 같은 값을 쓰도록 한 곳에서 관리)
+UNDERWRITER_GENERATION = {
+    "temperature": 0.3,        # 보통 0.3까지가 규칙적인 답변
+    "top_p": 0.9,              # 0.3이면 매우 보수적, 같은 단어만 반복. 0.9면 자연스러움 추가
+    "max_output_tokens": 1000, # 단순하게 글자 제한이라 보고 우리가 원하는거 다 출력 가능한 수치로 지정
+}
+
+# 스키마 문구까지 포함한 프롬프트 지문 (band별) → 프롬프트 수정 시 캐시 자동 무효화
+_SCHEMA_FINGERPRINT = json.dumps(UnderwriterResponse.model_json_schema(), sort_keys=True, ensure_ascii=False)
+
+def underwriter_prompt_for(payload_llm: dict) -> Tuple[str, str]:
+    """payload band → (band별 prompt, prompt_variant 지문)"""
+    band = (payload_llm.get("policy", {}) or {}).get("band", "")
+    prompt_band = UNDERWRITER_PROMPT_BY_BAND.get(band, UNDERWRITER_PROMPT_REVIEW)
+    return prompt_band, text_fingerprint(SYSTEM_UNDERWRITER, prompt_band, _SCHEMA_FINGERPRINT)
+
+def underwriter_cache_key(payload_llm: dict) -> str:
+    """정규화된 payload 기준 심사 리포트 캐시 키"""
+    _, variant = underwriter_prompt_for(payload_llm)
+    return make_cache_key(
+        payload_llm,
+        prompt_variant=variant,
+        model=get_gemini_model_name(),
+        generation=UNDERWRITER_GENERATION,
+    )
+
+def _cache_or_none() -> Optional[ReportCache]:
+    # 캐시 파일 문제(권한/손상)로 심사 화면이 멈추지 않게
+    try:
+        return get_report_cache()
+    except Exception:
+        return None
+
+
+# 단건 생성 (캐시/재시도 없음) - ask_underwriter와 배치 생성기가 공유
+def generate_underwriter_report(
+    payload_llm: dict,
+    *,
+    client: Optional[genai.Client] = None,
+    model_name: Optional[str] = None,
+) -> Dict[str, Any]:
+    prompt_band, _ = underwriter_prompt_for(payload_llm)
+    return run_gemini_structured(
+        case_payload=payload_llm,
+        schema=UnderwriterResponse,
+        system_instruction=SYSTEM_UNDERWRITER,
+        prompt=prompt_band,
+        client=client,
+        model_name=model_name,
+        **UNDERWRITER_GENERATION,
+    )
+
+
+# 토큰 수 대략 추정 (한글 등 비ASCII ≈ 1자 1토큰, ASCII ≈ 4자 1토큰)
+def estimate_tokens(text: str) -> int:
+    n_ascii = sum(1 for ch in text if ord(ch) < 128)
+    return int((len(text) - n_ascii) + n_ascii / 4) + 1
+
+
+def plan_underwriter_packs(
+    payloads_llm: List[dict],
+    *,
+    input_token_budget: int = LLM_PACK_INPUT_TOKENS,
+    max_output_tokens: int = LLM_PACK_MAX_OUTPUT_TOKENS,
+    max_cases: int = LLM_PACK_MAX_CASES,
+) -> List[List[int]]:
+    """
+    정규화 payload 목록 → 묶음 요청 계획(인덱스 리스트들).
+    - band별 프롬프트가 다르므로 같은 band끼리만 묶음
+    - 입력(시스템 지시문+프롬프트+case JSON 합) / 출력(건당 max_output_tokens 합) 예산 안에서 N을 정함
+    """
+    per_case_out = int(UNDERWRITER_GENERATION["max_output_tokens"])
+    cap_by_output = max(1, int(max_output_tokens // per_case_out))
+    cap = max(1, min(int(max_cases), cap_by_output))
+
+    by_band: Dict[str, List[int]] = {}
+    for i, p in enumerate(payloads_llm):
+        by_band.setdefault((p.get("policy", {}) or {}).get("band", ""), []).append(i)
+
+    packs: List[List[int]] = []
+    for band, idxs in by_band.items():
+        prompt_band, _ = underwriter_prompt_for(payloads_llm[idxs[0]])
+        overhead = estimate_tokens(SYSTEM_UNDERWRITER + prompt_band + UNDERWRITER_PACKED_PROMPT)
+        cur: List[int] = []
+        used = overhead
+        for i in idxs:
+            t = estimate_tokens(payload_json(payloads_llm[i])) + 16  # case 래퍼 여유
+            if cur and (len(cur) >= cap or used + t > input_token_budget):
+                packs.append(cur)
+                cur, used = [], overhead
+            cur.append(i)
+            used += t
+        if cur:
+            packs.append(cur)
+    return packs
+
+
+def generate_underwriter_reports_packed(
+    payloads_llm: List[dict],
+    *,
+    client: Optional[genai.Client] = None,
+    model_name: Optional[str] = None,
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    같은 band의 정규화 payload 여러 건을 한 번에 생성.
+    반환: 입력 순서의 응답 dict(단건 응답과 같은 키). 응답에서 빠진 case는 None.
+    """
+    prompt_band, _ = underwriter_prompt_for(payloads_llm[0])
+    cases = [{"case_id": str(i), "payload": p} for i, p in enumerate(payloads_llm)]
+    gen = dict(UNDERWRITER_GENERATION)
+    gen["max_output_tokens"] = int(gen["max_output_tokens"]) * len(cases)
+
+    out = run_gemini_structured(
+        case_payload={"cases": cases},
+        schema=UnderwriterBatchResponse,
+        system_instruction=SYSTEM_UNDERWRITER,
+        prompt=f"{prompt_band}\n\n{UNDERWRITER_PACKED_PROMPT}",
+        client=client,
+        model_name=model_name,
+        **gen,
+    )
+    by_id: Dict[str, Dict[str, Any]] = {}
+    for rep in out.get("reports") or []:
+        cid = str(rep.pop("case_id", ""))
+        by_id.setdefault(cid, rep)
+    return [by_id.get(str(i)) for i in range(len(cases))]
+
+
+# ---------------------------------------------------------
+# 스트리밍 생성
+# - 모델이 JSON을 앞에서부터 흘려보내므로, 완성된 필드부터 파싱해 바로 렌더링
+# ---------------------------------------------------------
+_JSON_DECODER = json.JSONDecoder()
+
+def _skip_ws(text: str, i: int) -> int:
+    while i < len(text) and text[i] in " \t\r\n":
+        i += 1
+    return i
+
+def parse_partial_json(text: str) -> Tuple[Dict[str, Any], Set[str]]:
+    """
+    생성 중인 최상위 JSON 객체 텍스트 → (지금까지 읽을 수 있는 필드, 완성된 필드 이름)
+    - 값이 끝까지 온 필드만 complete
+    - 리스트 값이 아직 열려 있으면 완성된 항목까지만 담고 complete에는 넣지 않음
+    """
+    out: Dict[str, Any] = {}
+    complete: Set[str] = set()
+    i = _skip_ws(text, 0)
+    if i >= len(text) or text[i] != "{":
+        return out, complete
+    i += 1
+    while True:
+        i = _skip_ws(text, i)
+        if i < len(text) and text[i] == ",":
+            i = _skip_ws(text, i + 1)
+        if i >= len(text) or text[i] == "}":
+            return out, complete
+        try:
+            key, i = _JSON_DECODER.raw_decode(text, i)
+        except ValueError:
+            return out, complete
+        i = _skip_ws(text, i)
+        if i >= len(text) or text[i] != ":":
+            return out, complete
+        i = _skip_ws(text, i + 1)
+        if i >= len(text):
+            return out, complete
+        try:
+            value, j = _JSON_DECODER.raw_decode(text, i)
+        except ValueError:
+            # 열려 있는 리스트: 완성된 항목만
+            if text[i] == "[":
+                items: List[Any] = []
+                k = _skip_ws(text, i + 1)
+                while k < len(text):
+                    try:
+                        item, k = _JSON_DECODER.raw_decode(text, k)
+                    except ValueError:
+                        break
+                    items.append(item)
+                    k = _skip_ws(text, k)
+                    if k < len(text) and text[k] == ",":
+                        k = _skip_ws(text, k + 1)
+                out[key] = items
+            return out, complete
+        out[key] = value
+        complete.add(key)
+        i = j
+
+def stream_gemini_structured(
+    case_payload: Dict[str, Any],
+    schema: Type[BaseModel],
+    system_instruction: str,
+    prompt: str,
+    client: Optional[genai.Client] = None,
+    model_name: Optional[str] = None,
+    temperature: float = 0.2,
+    top_p: float = 0.9,
+    max_output_tokens: int = 900,
+) -> Iterator[Tuple[Dict[str, Any], Set[str], bool]]:
+    """
+    run_gemini_structured의 스트리밍 버전.
+    yield (부분 필드, 완성된 필드, done). 마지막(done=True)은 스키마 검증을 거친 전체 결과.
+    """
+    if client is None or model_name is None:
+        client, model_name = get_gemini_client()
+
+    generation_config = types.GenerateContentConfig(
+        temperature=temperature,
+        top_p=top_p,
+        max_output_tokens=max_output_tokens,
+        response_mime_type="application/json",
+        response_schema=schema,
+        system_instruction=system_instruction,
+    )
+    contents = f"""{prompt}
+
+<INPUT_JSON>
+{payload_json(case_payload)}
+</INPUT_JSON>
+"""
+
+    text = ""
+    last_sig = None
+    with _CLIENT_POOL.slot():
+        for chunk in client.models.generate_content_stream(
+            model=model_name,
+            contents=contents,
+            config=generation_config,
+        ):
+            piece = chunk.text or ""
+            if not piece:
                 continue
+            text += piece
+            fields, complete = parse_partial_json(text)
+            # 새로 완성된 필드/리스트 항목이 생겼을 때만 yield
+            sig = (len(complete), tuple(len(v) if isinstance(v, list) else 1 for v in fields.values()))
+            if sig != last_sig:
+                last_sig = sig
+                yield fields, complete, False
+
+    try:
+        parsed = schema.model_validate_json(text)
+    except Exception as e:
+        raise LLMResponseError(f"Gemini 응답 파싱 실패(stream): {e}") from e
+    result = parsed.model_dump()
+    yield result, set(result), True
+
+def ask_underwriter_stream(
+    payload: dict,
+    *,
+    use_cache: bool = True,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Iterator[Tuple[Dict[str, Any], Set[str], bool]]:
+    """
+    ask_underwriter의 스트리밍 버전: (부분 필드, 완성된 필드, done) 를 차례로 yield.
+    캐시 적중/데모/대체 리포트는 완성본 1건만 yield. 완성본은 같은 캐시 키로 저장.
+    """
+    payload_llm = normalize_payload_for_llm(payload, compact=LLM_PAYLOAD_COMPACT, stats=stats)
+
+    def _whole(d: Dict[str, Any]):
+        return d, set(d), True
+
+    if not USE_LLM:
+        yield _whole(mock_underwriter_response(payload_llm))
+        return
+    if not payload_llm.get("shap_top_10"):
+        raise RuntimeError("SHAP(top10) 정보가 payload에 없습니다. 업로드/추론 단계에서 shap_features/shap_values 저장 여부를 확인하세요.")
+
+    cache = _cache_or_none() if use_cache else None
+    key = underwriter_cache_key(payload_llm)
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            yield _whole(hit)
+            return
+
+    breaker = get_circuit_breaker()
+    ticket = breaker.acquire()
+    if ticket is None:
+        yield _whole(fallback_underwriter_response(payload_llm, f"AI 호출 일시 차단 중 (약 {breaker.retry_after_sec():.0f}초 후 재시도)"))
+        return
+
+    prompt_band, _ = underwriter_prompt_for(payload_llm)
+    t0 = time.monotonic()
+    started = False
+    settled = False   # 차단기에 성공/실패를 기록했는지 (아니면 finally에서 시험 호출 반납)
+    try:
+        client, model = get_gemini_client()
+        for fields, complete, done in stream_gemini_structured(
+            case_payload=payload_llm,
+            schema=UnderwriterResponse,
+            system_instruction=SYSTEM_UNDERWRITER,
+            prompt=prompt_band,
+            client=client,
+            model_name=model,
+            **UNDERWRITER_GENERATION,
+        ):
+            if done:
+                breaker.record_success()
+                settled = True
+                _LATENCY.record(time.monotonic() - t0)
+                if cache is not None:
+                    try:
+                        cache.put(key, fields)
+                    except Exception:
+                        pass
+            started = True
+            yield fields, complete, done
+    except Exception as e:
+        if is_retryable_error(e):
+            breaker.record_failure()
+        else:
+            breaker.release_trial(ticket)
+        settled = True
+        if not is_provider_error(e):
             raise
-    raise RuntimeError("Gemini 호출 실패: 재시도 횟수 초과")
+        if started:
+            # 일부 렌더링 후 끊김 → 나머지는 대체 리포트로 채움
+            yield _whole(fallback_underwriter_response(payload_llm, str(e)))
+            return
+        # 첫 응답 전 실패 → 재시도/차단 규칙이 있는 일반 경로로
+        yield _whole(ask_underwriter(payload, use_cache=use_cache))
+    finally:
+        # 화면 rerun/중지로 소비가 끊기면(GeneratorExit) 결과 없이 끝남 → 시험 호출 반납
+        if not settled:
+            breaker.release_trial(ticket)
 
 
 # 심사용 실행
-def ask_underwriter(payload: dict) -> dict:
+def ask_underwriter(payload: dict, *, use_cache: bool = True, stats: Optional[Dict[str, Any]] = None) -> dict:
 
-    payload_llm = normalize_payload_for_llm(payload)
+    payload_llm = normalize_payload_for_llm(payload, compact=LLM_PAYLOAD_COMPACT, stats=stats)
     
     # api key 없으면 Mock 실행
     if not USE_LLM:
@@ -515,22 +1303,45 @@ def ask_underwriter(payload: dict) -> dict:
     # shap 확인여부
     if not payload_llm.get("shap_top_10"):
         raise RuntimeError("SHAP(top10) 정보가 payload에 없습니다. 업로드/추론 단계에서 shap_features/shap_values 저장 여부를 확인하세요.")
+
+    # 같은 고객/프롬프트/모델/설정이면 캐시 응답 (rerun마다 API 호출 방지)
+    cache = _cache_or_none() if use_cache else None
+    key = underwriter_cache_key(payload_llm)
+    if cache is not None:
+        hit = cache.get(key)
+        if hit is not None:
+            return hit
     
+    # 차단 중이면 대기 없이 대체 리포트
+    breaker = get_circuit_breaker()
+    if breaker.state == "open":
+        return fallback_underwriter_response(payload_llm, f"AI 호출 일시 차단 중 (약 {breaker.retry_after_sec():.0f}초 후 재시도)")
+
     client, model = get_gemini_client()
-    band = (payload_llm.get("policy", {}) or {}).get("band", "")
-    prompt_band = UNDERWRITER_PROMPT_BY_BAND.get(band, UNDERWRITER_PROMPT_REVIEW)
 
-    def _call():
-        return run_gemini_structured(
-            case_payload=payload_llm,
-            schema=UnderwriterResponse,
-            system_instruction=SYSTEM_UNDERWRITER,
-            prompt=prompt_band,
-            client=client,
-            model_name=model,
-            temperature=0.3,        # 보통 0.3까지가 규칙적인 답변
-            top_p=0.9,              # 0.3이면 매우 보수적, 같은 단어만 반복. 0.9면 자연스러움 추가
-            max_output_tokens=1000, # 단순하게 글자 제한이라 보고 우리가 원하는거 다 출력 가능한 수치로 지정
-        )
-    return run_with_retry(_call, max_retries=4, base_delay=1.2)
+    def _attempt() -> Dict[str, Any]:
+        t0 = time.monotonic()
+        call = lambda: generate_underwriter_report(payload_llm, client=client, model_name=model)
+        if LLM_HEDGE_ENABLED:
+            out = call_with_breaker(lambda: run_hedged(call, _LATENCY.percentile(LLM_HEDGE_PERCENTILE)), breaker)
+        else:
+            out = call_with_breaker(call, breaker)
+        _LATENCY.record(time.monotonic() - t0)
+        return out
+
+    try:
+        result = run_with_retry(_attempt, max_retries=4, base_delay=1.2, deadline_sec=LLM_RETRY_DEADLINE_SEC)
+    except Exception as e:
+        # 장애(재시도 소진/차단/4xx/파싱 실패) → 화면은 대체 리포트로 계속 진행, 캐시에는 저장하지 않음
+        # Gemini 쪽 오류가 아니면(코드 오류) 숨기지 않고 올림
+        if not is_provider_error(e):
+            raise
+        return fallback_underwriter_response(payload_llm, str(e))
+
+    if cache is not None:
+        try:
+            cache.put(key, result)
+        except Exception:
+            pass
+    return result
 
@@ -0,0 +1,112 @@
+"""
+심사 리포트 백그라운드 선생성 (prefetch)
+
+- 심사자가 추가검토 목록을 margin 순서로 넘겨보는 동안, 다음 K명의 리포트를 미리 생성해 캐시에 저장
+- 데몬 스레드에서 실행 → Streamlit rerun을 막지 않음
+- 새 요청(다른 고객으로 이동)이 오면 이전 작업은 취소, 같은 대상이면 그대로 유지
+- 작업 슬롯은 세션(심사자)마다 1개 → 다른 심사자의 선생성을 취소하지 않음
+- 토큰 버킷만 프로세스 전체에서 공유(get_prefetch_bucket) → 심사자가 여럿이어도 분당 한도를 넘지 않음
+"""
+from __future__ import annotations
+
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config import LLM_BATCH_RPM, LLM_PREFETCH_WORKERS
+from utils.llm_batch import TokenBucket, BatchReportResult, generate_underwriter_reports
+
+
+_BUCKET: Optional[TokenBucket] = None
+_BUCKET_LOCK = threading.Lock()
+
+
+def get_prefetch_bucket() -> TokenBucket:
+    """모든 세션의 선생성이 함께 쓰는 토큰 버킷 (프로세스당 1개)"""
+    global _BUCKET
+    with _BUCKET_LOCK:
+        if _BUCKET is None:
+            _BUCKET = TokenBucket.per_minute(LLM_BATCH_RPM)
+        return _BUCKET
+
+
+class ReportPrefetcher:
+    """세션 1개의 선생성 작업 슬롯. bucket을 주지 않으면 프로세스 공용 버킷 사용"""
+
+    def __init__(self, *, max_workers: int = LLM_PREFETCH_WORKERS, bucket: Optional[TokenBucket] = None):
+        self.max_workers = int(max_workers)
+        self.bucket = bucket if bucket is not None else get_prefetch_bucket()
+        self._lock = threading.Lock()
+        self._job_key: Optional[Tuple[str, ...]] = None
+        self._cancel: Optional[threading.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._results: List[BatchReportResult] = []
+        self._total = 0
+
+    def prefetch(self, job_key: Sequence[str], payloads: Sequence[Dict[str, Any]]) -> bool:
+        """
+        job_key(예: 다음 K명 ID 튜플) 기준으로 선생성 시작.
+        같은 job_key가 이미 진행 중/완료면 아무것도 하지 않음(False). 새로 시작하면 True.
+        """
+        job_key = tuple(job_key)
+        with self._lock:
+            if job_key == self._job_key:
+                return False
+            self._cancel_locked()
+            if not payloads:
+                self._job_key = job_key
+                return False
+
+            cancel = threading.Event()
+            self._job_key = job_key
+            self._cancel = cancel
+            self._results = []
+            self._total = len(payloads)
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(list(payloads), cancel),
+                name="llm-prefetch",
+                daemon=True,
+            )
+            self._thread.start()
+            return True
+
+    def has_job(self, job_key: Sequence[str]) -> bool:
+        """같은 대상으로 이미 시작한 작업이 있는지 (payload 생성 전에 확인용)"""
+        with self._lock:
+            return tuple(job_key) == self._job_key
+
+    def _run(self, payloads: List[Dict[str, Any]], cancel: threading.Event) -> None:
+        def _collect(res: BatchReportResult) -> None:
+            with self._lock:
+                if self._cancel is cancel:
+                    self._results.append(res)
+
+        try:
+            generate_underwriter_reports(
+                payloads,
+                max_workers=self.max_workers,
+                cancel=cancel,
+                bucket=self.bucket,
+                on_result=_collect,
+            )
+        except Exception:
+            # 선생성 실패는 화면 동작에 영향 없음 (현재 고객은 ask_underwriter가 직접 처리)
+            pass
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._cancel_locked()
+            self._job_key = None
+
+    def _cancel_locked(self) -> None:
+        if self._cancel is not None:
+            self._cancel.set()
+        self._cancel = None
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            done = {"cached": 0, "ok": 0, "error": 0, "cancelled": 0}
+            for r in self._results:
+                done[r.status] = done.get(r.status, 0) + 1
+            running = self._thread is not None and self._thread.is_alive() and self._cancel is not None
+            return {"total": self._total, "done": len(self._results), "running": running, **done}
@@ -1,6 +1,7 @@
 import streamlit as st
 
-def render_underwriter_report(under: dict, band: str, score: float, margin: float):
+
+def _render_headline(under: dict, band: str, score: float, margin: float):
     # 상단 한 줄 결론
     headline = under.get("headline") or under.get("summary") or ""
     risk_level = under.get("risk_level") or band
@@ -22,6 +23,8 @@ def render_underwriter_report(under: dict, band: str, score: float, margin: floa
         unsafe_allow_html=True
     )
 
+
+def _render_drivers(under: dict):
     # 핵심 드라이버(Top 3~5)
     drivers = (
         under.get("risk_drivers")
@@ -35,6 +38,8 @@ def render_underwriter_report(under: dict, band: str, score: float, margin: floa
         for d in drivers[:5]:
             st.markdown(f"- {d}")
 
+
+def _render_mitigants(under: dict):
     # 리스크 완화 요인(있으면)
     mitigants = under.get("mitigants") or under.get("positive_factors") or []
     if isinstance(mitigants, list) and mitigants:
@@ -42,6 +47,8 @@ def render_underwriter_report(under: dict, band: str, score: float, margin: floa
         for m in mitigants[:3]:
             st.markdown(f"- {m}")
 
+
+def _render_actions(under: dict):
     # 액션 아이템(심사팀이 바로 할 일)
     actions = (
         under.get("suggested_actions_for_review")
@@ -55,9 +62,67 @@ def render_underwriter_report(under: dict, band: str, score: float, margin: floa
         for a in actions[:6]:
             st.checkbox(a, value=False)
 
+
+def _render_questions(under: dict):
     # 확인 질문(필수 확인)
     questions = under.get("verification_questions") or under.get("questions") or []
     if isinstance(questions, list) and questions:
         st.markdown("### ❓ 추가 확인 질문")
         for q in questions[:6]:
             st.markdown(f"- {q}")
+
+
+def render_underwriter_report(under: dict, band: str, score: float, margin: float):
+    _render_headline(under, band, score, margin)
+    _render_drivers(under)
+    _render_mitigants(under)
+    _render_actions(under)
+    _render_questions(under)
+
+
+# 스트리밍: 섹션별 자리(placeholder)를 먼저 잡고, 해당 필드가 도착하는 대로 채움
+# - (섹션, 의존 필드, 완성 전 부분 렌더 허용 여부). 체크박스 섹션은 위젯 중복을 피하려고 완성 후 1회만
+_STREAM_SECTIONS = (
+    ("headline", ("summary",), False),
+    ("drivers", ("risk_drivers", "reason_contributions"), True),
+    ("actions", ("suggested_actions_for_review",), False),
+    ("questions", ("verification_questions",), True),
+)
+
+
+def render_underwriter_report_stream(stream, band: str, score: float, margin: float) -> dict:
+    """
+    ask_underwriter_stream 결과(부분 필드, 완성 필드, done)를 받아 섹션별로 점진 렌더링.
+    반환: 최종 응답 dict
+    """
+    slots = {name: st.empty() for name, _, _ in _STREAM_SECTIONS}
+    shown = {}
+    under = {}
+
+    def _draw(name: str, data: dict):
+        with slots[name].container():
+            if name == "headline":
+                _render_headline(data, band, score, margin)
+            elif name == "drivers":
+                _render_drivers(data)
+            elif name == "actions":
+                _render_actions(data)
+            elif name == "questions":
+                _render_questions(data)
+
+    slots["headline"].caption("⏳ AI 코멘트 생성 중...")
+    for fields, complete, done in stream:
+        under = fields
+        for name, keys, allow_partial in _STREAM_SECTIONS:
+            if shown.get(name) == "final":
+                continue
+            if done or all(k in complete for k in keys):
+                _draw(name, fields)
+                shown[name] = "final"
+            elif allow_partial and fields.get(keys[0]):
+                # 리스트 항목이 늘어날 때마다 다시 그림 (markdown만 있는 섹션)
+                sig = len(fields[keys[0]])
+                if shown.get(name) != sig:
+                    _draw(name, {keys[0]: fields[keys[0]]})
+                    shown[name] = sig
+    return under
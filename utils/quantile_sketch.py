@@ -0,0 +1,210 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+import pandas as pd
+
+from .feature_semantic_map import FEATURE_SEMANTIC_MAP
+
+# ------------------------------------------------------------
+# Mergeable quantile sketch (KLL 방식)
+# - 업로드/스코어링 배치가 들어올 때마다 증분 업데이트 → 전체 포트폴리오 재스캔 없이 분위 유지
+# - 크기는 데이터 건수와 무관하게 k=200이면 수백 개(상한 약 k/(1-c)=600개, float32) → feature당 수 KB 이하
+# - 두 스케치를 merge 가능 (배치별로 만든 뒤 합쳐도 동일한 보장)
+# - 파일에 data_version을 함께 저장 → 업로드/샘플 로드로 model_df가 바뀌면 이전 분포와 섞지 않음
+# ------------------------------------------------------------
+
+class KLLSketch:
+    """KLL quantile sketch.
+
+    level h의 원소 하나는 가중치 2^h를 가진다. level이 용량을 넘으면
+    정렬 후 짝/홀 중 하나(랜덤)만 남겨 위 level로 올린다(compaction).
+    순위 오차는 대략 O(1/k) 수준.
+    """
+
+    def __init__(self, k: int = 200, c: float = 2 / 3, seed: int = 0):
+        self.k = int(k)
+        self.c = float(c)
+        self.n = 0
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float32)]
+        self._rng = np.random.default_rng(seed)
+        self._cdf_cache = None
+
+    def __len__(self) -> int:
+        return self.n
+
+    def _capacity(self, h: int) -> int:
+        depth = len(self.levels) - 1 - h
+        return max(2, int(np.ceil(self.k * self.c ** depth)))
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            if len(self.levels[h]) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float32))
+                buf = np.sort(self.levels[h])
+                keep = buf[:0]
+                if buf.size % 2 == 1:
+                    # 홀수면 1개는 현재 level에 남겨 총 가중치를 정확히 보존
+                    keep, buf = buf[-1:], buf[:-1]
+                offset = int(self._rng.integers(0, 2))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], buf[offset::2]])
+                self.levels[h] = keep
+            h += 1
+        self._cdf_cache = None
+
+    def update(self, values) -> "KLLSketch":
+        v = np.asarray(values, dtype=np.float32).ravel()
+        v = v[np.isfinite(v)]
+        if v.size == 0:
+            return self
+        self.n += int(v.size)
+        self.levels[0] = np.concatenate([self.levels[0], v])
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float32))
+        for h, lv in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], lv])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _cdf(self):
+        if self._cdf_cache is None:
+            vals = np.concatenate(self.levels)
+            w = np.concatenate([np.full(len(lv), 2 ** h, dtype=np.int64) for h, lv in enumerate(self.levels)])
+            order = np.argsort(vals, kind="stable")
+            cw = np.concatenate([[0], np.cumsum(w[order])])
+            self._cdf_cache = (vals[order], cw)
+        return self._cdf_cache
+
+    def rank(self, v: float) -> Optional[float]:
+        """v보다 작은 값의 비율(0~1). 비어있으면 None."""
+        if self.n == 0:
+            return None
+        vals, cw = self._cdf()
+        pos = np.searchsorted(vals, np.float32(v), side="left")
+        return float(cw[pos] / cw[-1])
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.n == 0:
+            return None
+        vals, cw = self._cdf()
+        target = min(max(float(q), 0.0), 1.0) * cw[-1]
+        pos = int(np.searchsorted(cw[1:], target, side="left"))
+        return float(vals[min(pos, len(vals) - 1)])
+
+    # ---------------- serialization ----------------
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "values": np.concatenate(self.levels).astype(np.float32),
+            "level_sizes": np.array([len(lv) for lv in self.levels], dtype=np.int64),
+            "meta": np.array([self.k, self.c, self.n], dtype=np.float64),
+        }
+
+    @classmethod
+    def from_arrays(cls, values: np.ndarray, level_sizes: np.ndarray, meta: np.ndarray) -> "KLLSketch":
+        k, c, n = meta
+        sk = cls(k=int(k), c=float(c), seed=int(n))
+        bounds = np.concatenate([[0], np.cumsum(level_sizes)])
+        sk.levels = [values[bounds[i]:bounds[i + 1]].astype(np.float32) for i in range(len(level_sizes))]
+        sk.n = int(n)
+        return sk
+
+
+class FeatureSketches:
+    """feature별 KLLSketch 모음. ReferencePercentileIndex와 같은 조회 인터페이스(in / percentile)."""
+
+    def __init__(self, sketches: Optional[Dict[str, KLLSketch]] = None, k: int = 200, data_version: str = ""):
+        self.sketches: Dict[str, KLLSketch] = sketches or {}
+        self.k = k
+        self.data_version = data_version
+
+    def __contains__(self, feature: str) -> bool:
+        sk = self.sketches.get(feature)
+        return sk is not None and sk.n > 0
+
+    def update_from_frame(self, df: pd.DataFrame, features: Optional[Iterable[str]] = None) -> "FeatureSketches":
+        """스코어링된 배치 1개 반영 (기본: FEATURE_SEMANTIC_MAP에 있는 컬럼만)"""
+        if features is None:
+            features = FEATURE_SEMANTIC_MAP.keys()
+        for f in features:
+            if f not in df.columns:
+                continue
+            s = pd.to_numeric(df[f], errors="coerce").to_numpy(dtype=np.float32)
+            self.sketches.setdefault(f, KLLSketch(k=self.k)).update(s)
+        return self
+
+    def merge(self, other: "FeatureSketches") -> "FeatureSketches":
+        for f, sk in other.sketches.items():
+            if f in self.sketches:
+                self.sketches[f].merge(sk)
+            else:
+                self.sketches[f] = sk
+        return self
+
+    def percentile(self, feature: str, v: float) -> Optional[float]:
+        sk = self.sketches.get(feature)
+        if sk is None:
+            return None
+        try:
+            return sk.rank(v)
+        except Exception:
+            return None
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        features = list(self.sketches.keys())
+        arrays = {}
+        for i, f in enumerate(features):
+            for name, arr in self.sketches[f].to_arrays().items():
+                arrays[f"s{i}_{name}"] = arr
+        with open(path, "wb") as fh:
+            np.savez_compressed(
+                fh,
+                __features__=np.array(features, dtype=str),
+                __version__=np.array(self.data_version),
+                **arrays,
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "FeatureSketches":
+        with np.load(Path(path), allow_pickle=False) as z:
+            features = [str(f) for f in z["__features__"]]
+            version = str(z["__version__"]) if "__version__" in z.files else ""
+            sketches = {
+                f: KLLSketch.from_arrays(z[f"s{i}_values"], z[f"s{i}_level_sizes"], z[f"s{i}_meta"])
+                for i, f in enumerate(features)
+            }
+        k = next(iter(sketches.values())).k if sketches else 200
+        return cls(sketches, k=k, data_version=version)
+
+
+def update_sketch_file(
+    df: pd.DataFrame,
+    path: Path,
+    features: Optional[Iterable[str]] = None,
+    data_version: str = "",
+) -> FeatureSketches:
+    """
+    디스크의 스케치를 불러와 배치 df를 반영하고 다시 저장.
+    저장된 스케치의 data_version이 다르면(다른 model_df 기준) 합치지 않고 새로 시작
+    """
+    path = Path(path)
+    sketches = FeatureSketches(data_version=data_version)
+    if path.exists():
+        try:
+            loaded = FeatureSketches.load(path)
+            if loaded.data_version == data_version:
+                sketches = loaded
+        except Exception:
+            pass  # 손상 파일이면 새로 시작
+    sketches.update_from_frame(df, features=features)
+    sketches.save(path)
+    return sketches
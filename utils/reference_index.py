@@ -0,0 +1,102 @@
+from __future__ import annotations
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+import numpy as np
+import pandas as pd
+
+from .feature_semantic_map import FEATURE_SEMANTIC_MAP
+
+# ------------------------------------------------------------
+# Reference Percentile Index
+# - behavioral_insights의 분위(높은편/낮은편) 판별용 참조 분포
+# - feature별 정렬된 float32 배열을 데이터 버전당 1회 만들어 디스크에 저장
+# - 조회는 searchsorted(O(log N)) → 고객 1명 열 때 인사이트마다 O(N) 스캔 제거
+# ------------------------------------------------------------
+
+class ReferencePercentileIndex:
+    def __init__(self, sorted_values: Dict[str, np.ndarray], data_version: str = ""):
+        self.sorted_values = sorted_values
+        self.data_version = data_version
+
+    def __contains__(self, feature: str) -> bool:
+        return feature in self.sorted_values
+
+    @classmethod
+    def build(
+        cls,
+        df: pd.DataFrame,
+        features: Optional[Iterable[str]] = None,
+        data_version: str = "",
+    ) -> "ReferencePercentileIndex":
+        """df에서 features(기본: FEATURE_SEMANTIC_MAP에 있는 컬럼) 분포를 정렬해 보관"""
+        if features is None:
+            features = FEATURE_SEMANTIC_MAP.keys()
+
+        sorted_values: Dict[str, np.ndarray] = {}
+        for f in features:
+            if f not in df.columns:
+                continue
+            s = pd.to_numeric(df[f], errors="coerce").dropna()
+            if s.empty:
+                continue
+            sorted_values[f] = np.sort(s.to_numpy(dtype=np.float32))
+        return cls(sorted_values, data_version=data_version)
+
+    def percentile(self, feature: str, v: float) -> Optional[float]:
+        """_percentile_of_value와 같은 정의: 분포 내 v보다 작은 값의 비율(0~1)"""
+        arr = self.sorted_values.get(feature)
+        if arr is None or len(arr) == 0:
+            return None
+        try:
+            pos = np.searchsorted(arr, np.float32(v), side="left")
+        except Exception:
+            return None
+        return float(pos / len(arr))
+
+    # ---------------- persistence ----------------
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        features = list(self.sorted_values.keys())
+        arrays = {f"v{i}": self.sorted_values[f] for i, f in enumerate(features)}
+        # np.savez는 .npz를 자동으로 붙이므로 파일 핸들로 저장
+        with open(path, "wb") as fh:
+            np.savez_compressed(
+                fh,
+                __features__=np.array(features, dtype=str),
+                __version__=np.array(self.data_version),
+                **arrays,
+            )
+
+    @classmethod
+    def load(cls, path: Path) -> "ReferencePercentileIndex":
+        with np.load(Path(path), allow_pickle=False) as z:
+            features = [str(f) for f in z["__features__"]]
+            version = str(z["__version__"])
+            sorted_values = {f: z[f"v{i}"] for i, f in enumerate(features)}
+        return cls(sorted_values, data_version=version)
+
+
+def load_or_build_reference_index(
+    df: pd.DataFrame,
+    path: Path,
+    data_version: str,
+    features: Optional[Iterable[str]] = None,
+) -> ReferencePercentileIndex:
+    """저장된 인덱스가 같은 데이터 버전이면 그대로 로드, 아니면 새로 만들어 저장"""
+    path = Path(path)
+    if path.exists():
+        try:
+            idx = ReferencePercentileIndex.load(path)
+            if idx.data_version == data_version:
+                return idx
+        except Exception:
+            pass  # 손상/구버전 파일이면 재생성
+
+    idx = ReferencePercentileIndex.build(df, features=features, data_version=data_version)
+    try:
+        idx.save(path)
+    except Exception:
+        pass  # 읽기 전용 환경(Cloud 등)이면 메모리에서만 사용
+    return idx
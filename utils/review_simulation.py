@@ -114,3 +114,337 @@ def summarize_candidates_by_type(df_review: pd.DataFrame, type_col: str = "risk_
         avg_pd=(pd_col, "mean"),
     ).reset_index()
     return g.sort_values("n", ascending=False)
+
+
+# ------------------------------------------------------------
+# 고객 단위 벡터화 시뮬레이션
+# - 후보 집단 평균 PD로 뭉개지 않고, 고객별 pd_hat / EAD로 수익·손실 계산
+# - 전환율 × 리스크 타입 × APR × LGD 전체 그리드를 한 번의 broadcast로 계산
+# ------------------------------------------------------------
+
+# estimate_ead_array가 읽는 컬럼 (업로드 파이프라인이 model_df에 함께 저장)
+EAD_COLS = ("amt_credit", "amt_annuity", "app_payment_rate")
+
+
+def has_customer_ead(columns) -> bool:
+    """고객별 EAD를 추정할 컬럼이 있는지 (없으면 estimate_ead_array는 전원 default_ead)"""
+    cols = set(columns)
+    return "amt_credit" in cols or {"amt_annuity", "app_payment_rate"} <= cols
+
+
+def estimate_ead_array(df: pd.DataFrame, default_ead: float) -> np.ndarray:
+    """
+    고객별 EAD(대출원금) 추정 (behavioral_insights.estimate_ead_from_row의 벡터 버전)
+    1) amt_credit가 있으면 그대로
+    2) 없으면 amt_annuity / app_payment_rate 역산
+    3) 둘 다 없거나 비정상이면 default_ead
+    """
+    n = len(df)
+    ead = np.full(n, np.nan, dtype=float)
+
+    if "amt_credit" in df.columns:
+        ead = pd.to_numeric(df["amt_credit"], errors="coerce").to_numpy(dtype=float)
+
+    if "amt_annuity" in df.columns and "app_payment_rate" in df.columns:
+        ann = pd.to_numeric(df["amt_annuity"], errors="coerce").to_numpy(dtype=float)
+        pr = pd.to_numeric(df["app_payment_rate"], errors="coerce").to_numpy(dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            credit = np.where(pr > 0, ann / pr, np.nan)
+        ead = np.where(np.isfinite(ead) & (ead > 0), ead, credit)
+
+    return np.where(np.isfinite(ead) & (ead > 0), ead, float(default_ead))
+
+
+def simulate_profit_grid(
+    df_review: pd.DataFrame,
+    *,
+    conv_rates: List[float],
+    params: SimParams,
+    include_types: Optional[List[str]] = None,
+    aprs: Optional[List[float]] = None,
+    lgds: Optional[List[float]] = None,
+    pd_col: str = "pd_hat",
+    type_col: str = "risk_type_key",
+) -> pd.DataFrame:
+    """
+    고객별 기대 손익을 타입별로 합산해 (전환율, 타입, APR, LGD) 그리드 전체를 계산.
+
+    고객 i가 확인 후 승인 전환될 때(전환은 랜덤, 확률 r):
+      - 이자수익  = (1 - PD_i) * EAD_i * APR * (tenor/12)   (TODO.md KPI 정의: 부도 시 이자 미수취)
+      - 기대손실  = PD_i * LGD * EAD_i
+    운영비용은 전환 여부와 무관하게 후보 전체(검증한 건수) 기준.
+
+    - include_types: None이면 df에 있는 모든 타입
+    - aprs / lgds: None이면 params.apr / params.lgd 단일 값
+    반환: 타입별 행 + 선택 타입 합계(risk_type_key="ALL") 행의 long-form DataFrame
+    """
+    req = {pd_col, type_col}
+    miss = req - set(df_review.columns)
+    if miss:
+        raise ValueError(f"df_review에 필수 컬럼 누락: {sorted(miss)}")
+
+    aprs = np.asarray(aprs if aprs else [params.apr], dtype=float)
+    lgds = np.asarray(lgds if lgds else [params.lgd], dtype=float)
+    rates = np.clip(np.asarray(conv_rates, dtype=float), 0.0, 1.0)
+
+    types_all = df_review[type_col].astype(object).to_numpy()
+    if include_types is None:
+        include_types = sorted({t for t in types_all if t is not None and t == t})
+    types = list(include_types)
+
+    pd_i = pd.to_numeric(df_review[pd_col], errors="coerce").to_numpy(dtype=float)
+    ead_i = estimate_ead_array(df_review, params.ead)
+    ok = np.isfinite(pd_i)
+    pd_i = np.where(ok, pd_i, 0.0)
+
+    # (n, T) one-hot → 타입별 합계는 행렬곱 한 번
+    onehot = (types_all[:, None] == np.asarray(types, dtype=object)[None, :]) & ok[:, None]
+    onehot = onehot.astype(float)
+    per_cust = np.stack([
+        np.ones_like(pd_i),           # 후보 수
+        (1.0 - pd_i) * ead_i,         # 이자 기반(생존 가중 EAD)
+        pd_i * ead_i,                 # 손실 기반(PD x EAD)
+        pd_i,                         # 평균 PD용
+    ], axis=1)
+    S = onehot.T @ per_cust            # (T, 4)
+
+    # 선택 타입 합계 행 추가
+    S = np.vstack([S, S.sum(axis=0, keepdims=True)])
+    type_keys = types + ["ALL"]
+
+    n_cand = S[:, 0]
+    tenor_factor = params.tenor_months / 12
+
+    # broadcast: (R, T, A, L)
+    r = rates[:, None, None, None]
+    income = r * S[None, :, 1, None, None] * aprs[None, None, :, None] * tenor_factor
+    el = r * S[None, :, 2, None, None] * lgds[None, None, None, :]
+    cost = (n_cand * params.review_cost_per_case)[None, :, None, None]
+    net = income - el - cost
+
+    R, T, A, L = net.shape
+    shape = (R, T, A, L)
+    idx_r, idx_t, idx_a, idx_l = np.indices(shape).reshape(4, -1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_pd = np.where(n_cand > 0, S[:, 3] / n_cand, np.nan)
+
+    out = pd.DataFrame({
+        "conv_rate": rates[idx_r],
+        "risk_type_key": np.asarray(type_keys, dtype=object)[idx_t],
+        "apr": aprs[idx_a],
+        "lgd": lgds[idx_l],
+        "n_candidates": n_cand[idx_t].astype(int),
+        "expected_converted": (rates[idx_r] * n_cand[idx_t]),
+        "interest_income": np.broadcast_to(income, shape).ravel(),
+        "expected_loss": np.broadcast_to(el, shape).ravel(),
+        "review_cost": np.broadcast_to(cost, shape).ravel(),
+        "net_profit": net.ravel(),
+        "avg_pd_candidates": avg_pd[idx_t],
+    })
+    return out
+
+
+# ------------------------------------------------------------
+# Monte Carlo 전환 시뮬레이션
+# - "확인 성공은 랜덤" 가정을 그대로 표본추출: 고객마다 균등난수 u 하나로
+#     u < r * PD_i  → 전환 후 부도 (원금 손실, 이자 미수취)
+#     u < r         → 전환 (부도 아니면 이자수익)
+#   (PD_i <= 1 이므로 부도 사건은 전환 사건의 부분집합, 기대값은 simulate_profit_grid와 동일)
+# - 반복(replication) 축을 청크로 나눠 (B, n) 난수 → 타입 one-hot 행렬곱으로 집계
+# - 같은 난수를 모든 전환율 시나리오에 재사용(common random numbers)
+# ------------------------------------------------------------
+
+def simulate_conversion_monte_carlo(
+    df_review: pd.DataFrame,
+    *,
+    conv_rates: List[float],
+    params: SimParams,
+    include_types: Optional[List[str]] = None,
+    n_reps: int = 2_000,
+    seed: int = 42,
+    percentiles: tuple = (5, 50, 95),
+    pd_col: str = "pd_hat",
+    type_col: str = "risk_type_key",
+    chunk_elems: int = 4_000_000,
+) -> pd.DataFrame:
+    """
+    전환/부도 결과를 고객 단위로 n_reps번 추출해 (전환율, 타입)별 분포를 요약.
+
+    반환 컬럼:
+      - net_profit_mean / net_profit_p{q}: 순이익 분포
+      - prob_loss: 순이익 < 0 확률
+      - default_rate_p{q}: 전환 고객 중 부도율(승인 리스크) 구간
+    risk_type_key="ALL" 행은 선택 타입 합계.
+    """
+    req = {pd_col, type_col}
+    miss = req - set(df_review.columns)
+    if miss:
+        raise ValueError(f"df_review에 필수 컬럼 누락: {sorted(miss)}")
+
+    rates = np.clip(np.asarray(sorted(conv_rates), dtype=np.float32), 0.0, 1.0)
+
+    types_all = df_review[type_col].astype(object).to_numpy()
+    if include_types is None:
+        include_types = sorted({t for t in types_all if t is not None and t == t})
+    types = list(include_types)
+
+    pd_i = pd.to_numeric(df_review[pd_col], errors="coerce").to_numpy(dtype=float)
+    keep = np.isfinite(pd_i) & np.isin(types_all, np.asarray(types, dtype=object))
+    pd_i = np.clip(pd_i[keep], 0.0, 1.0).astype(np.float32)
+    ead_i = estimate_ead_array(df_review.loc[keep], params.ead)
+    t_idx = pd.Categorical(types_all[keep], categories=types).codes
+
+    n = int(keep.sum())
+    T = len(types)
+    onehot = np.zeros((n, T), dtype=np.float32)
+    onehot[np.arange(n), t_idx] = 1.0
+
+    inc_i = ead_i * params.apr * (params.tenor_months / 12)   # 정상 상환 시 이자수익
+    loss_i = ead_i * params.lgd                               # 부도 시 손실
+    # 전환 C, 부도 D일 때 손익 = C*inc - D*(inc + loss)
+    W_conv = np.hstack([onehot, onehot * inc_i[:, None].astype(np.float32)])
+    W_def = np.hstack([onehot, onehot * (inc_i + loss_i)[:, None].astype(np.float32)])
+
+    n_cand = onehot.sum(axis=0).astype(float)
+    cost = n_cand * params.review_cost_per_case
+
+    rng = np.random.default_rng(seed)
+    R = len(rates)
+    conv_cnt = np.zeros((R, n_reps, T), dtype=np.float64)
+    def_cnt = np.zeros((R, n_reps, T), dtype=np.float64)
+    gross = np.zeros((R, n_reps, T), dtype=np.float64)
+
+    B = max(1, int(chunk_elems // max(n, 1)))
+    for s in range(0, n_reps, B):
+        e = min(s + B, n_reps)
+        u = rng.random((e - s, n), dtype=np.float32)
+        for k, r in enumerate(rates):
+            C = (u < r).astype(np.float32)
+            D = (u < r * pd_i).astype(np.float32)
+            a = C @ W_conv
+            b = D @ W_def
+            conv_cnt[k, s:e] = a[:, :T]
+            def_cnt[k, s:e] = b[:, :T]
+            gross[k, s:e] = a[:, T:] - b[:, T:]
+
+    # 선택 타입 합계(ALL) 추가
+    conv_cnt = np.concatenate([conv_cnt, conv_cnt.sum(axis=2, keepdims=True)], axis=2)
+    def_cnt = np.concatenate([def_cnt, def_cnt.sum(axis=2, keepdims=True)], axis=2)
+    gross = np.concatenate([gross, gross.sum(axis=2, keepdims=True)], axis=2)
+    cost = np.append(cost, cost.sum())
+    n_cand = np.append(n_cand, n_cand.sum())
+    type_keys = types + ["ALL"]
+
+    net = gross - cost[None, None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dr = np.where(conv_cnt > 0, def_cnt / conv_cnt, np.nan)
+
+    q = np.asarray(percentiles, dtype=float)
+    net_q = np.percentile(net, q, axis=1)          # (Q, R, T+1)
+    dr_q = np.nanpercentile(dr, q, axis=1) if n_reps else net_q * np.nan
+
+    rows = []
+    for k, r in enumerate(rates):
+        for j, key in enumerate(type_keys):
+            row = {
+                "conv_rate": float(r),
+                "risk_type_key": key,
+                "n_candidates": int(n_cand[j]),
+                "n_reps": int(n_reps),
+                "converted_mean": float(conv_cnt[k, :, j].mean()),
+                "net_profit_mean": float(net[k, :, j].mean()),
+            }
+            for qi, qq in enumerate(q):
+                row[f"net_profit_p{int(qq)}"] = float(net_q[qi, k, j])
+            row["prob_loss"] = float((net[k, :, j] < 0).mean())
+            for qi, qq in enumerate(q):
+                row[f"default_rate_p{int(qq)}"] = float(dr_q[qi, k, j])
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+# ------------------------------------------------------------
+# 추가검토 처리용량(capacity) 최적화
+# - 고객별 "검토했을 때의 기대 한계이익"
+#     = conv_rate[type] * ((1-PD)*EAD*APR*tenor/12 - PD*LGD*EAD) - review_cost
+# - 한 번 정렬 + 누적합을 만들어 두면, 예산(검토 건수)이 바뀔 때는 누적합 조회만 다시 수행
+# ------------------------------------------------------------
+
+# 타입별 기본 확인 성공률(가정). 필요 시 페이지에서 덮어씀
+DEFAULT_CONV_RATE_BY_TYPE = {
+    "TYPE1_STRUCTURAL_CREDIT": 0.1,
+    "TYPE2_DOCS_UNCERTAINTY": 0.6,
+    "TYPE3_SPENDING_IMBALANCE": 0.4,
+    "TYPE4_EMPLOYMENT_LIFECYCLE": 0.5,
+    "TYPE5_MIXED": 0.3,
+}
+
+
+def expected_review_profit(
+    df_review: pd.DataFrame,
+    *,
+    params: SimParams,
+    conv_rate_by_type: Optional[dict] = None,
+    pd_col: str = "pd_hat",
+    type_col: str = "risk_type_key",
+) -> np.ndarray:
+    """고객별 검토 기대 한계이익(원). PD가 없으면 -inf(선택 대상 제외)."""
+    rates = dict(DEFAULT_CONV_RATE_BY_TYPE)
+    rates.update(conv_rate_by_type or {})
+
+    pd_i = pd.to_numeric(df_review[pd_col], errors="coerce").to_numpy(dtype=float)
+    ead_i = estimate_ead_array(df_review, params.ead)
+    conv = df_review[type_col].map(rates).fillna(0.0).to_numpy(dtype=float)
+
+    income = (1.0 - pd_i) * ead_i * params.apr * (params.tenor_months / 12)
+    el = pd_i * params.lgd * ead_i
+    profit = conv * (income - el) - params.review_cost_per_case
+    return np.where(np.isfinite(profit), profit, -np.inf)
+
+
+@dataclass
+class ReviewCapacityPlan:
+    """
+    처리용량(검토 건수) 제약 하 이익 최대화 검토 순서.
+    - 건당 effort가 1로 같으므로 이익 내림차순 그리디가 정확한 최적해
+      (건별 소요시간이 다르면 접두 선택이 최적이 아니므로 여기서는 다루지 않음)
+    이익이 0 이하인 고객은 예산이 남아도 선택하지 않음.
+    """
+    order: np.ndarray          # 선택 우선순위(원본 위치 인덱스), 양(+)의 이익만
+    profit: np.ndarray         # order 순서의 고객별 기대 한계이익
+    cum_profit: np.ndarray     # order 순서의 누적 이익
+
+    @classmethod
+    def build(cls, profit: np.ndarray) -> "ReviewCapacityPlan":
+        profit = np.asarray(profit, dtype=float)
+        pos = np.flatnonzero(profit > 0)
+        order = pos[np.argsort(-profit[pos], kind="stable")]
+        return cls(
+            order=order,
+            profit=profit[order],
+            cum_profit=np.cumsum(profit[order]),
+        )
+
+    def _n_for(self, budget) -> np.ndarray:
+        b = np.floor(np.nan_to_num(np.asarray(budget, dtype=float), nan=0.0))
+        return np.clip(b, 0, len(self.order)).astype(np.int64)
+
+    def n_selected(self, budget: float) -> int:
+        """예산(검토 건수) 이내로 선택 가능한 고객 수"""
+        return int(self._n_for(budget))
+
+    def select(self, budget: float) -> np.ndarray:
+        """예산 이내 선택 고객의 원본 위치 인덱스(우선순위 순)"""
+        return self.order[: self.n_selected(budget)]
+
+    def total_profit(self, budget: float) -> float:
+        k = self.n_selected(budget)
+        return float(self.cum_profit[k - 1]) if k > 0 else 0.0
+
+    def frontier(self, budgets) -> pd.DataFrame:
+        """예산 구간별 선택 건수 / 누적 기대이익 (슬라이더용 곡선)"""
+        b = np.asarray(budgets, dtype=float)
+        k = self._n_for(b)
+        cp = np.concatenate([[0.0], self.cum_profit])
+        return pd.DataFrame({"budget": b, "n_selected": k, "expected_profit": cp[k]})
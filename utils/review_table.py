@@ -0,0 +1,340 @@
+"""
+추가검토 분류 테이블 (사이드카 parquet)
+
+- 점수 산출 시점(업로드 처리)에 추가검토 구간 고객의 점수/마진/사유 문구/분류 신호를 한 번만 계산해
+  st_data/review_table/에 저장 → 추가검토 페이지는 매 세션 iterrows/프레임 해시 없이 컬럼만 골라 읽음
+- 키: data_version + policy_hash + 스키마 버전 (kpi_engine과 같은 방식)
+- 분류 신호(grp__*/kw__*/pos_credit_cnt)를 그대로 저장 → 임계값을 바꾼 재분류는 classify_review_batch 벡터 연산만
+- 기본 임계값 분류 결과(risk_type_key 등)도 함께 저장 (정렬/필터용)
+- 파일 메타데이터에 전체 고객 수 기록 → 페이지 상단 KPI를 위해 원본 전체를 읽지 않음
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config import ID_COL, TOP_N, PD_FLOOR, PD_CEIL, REVIEW_TABLE_DIR, REVIEW_TABLE_KEEP
+from utils.hcis_core import compute_hcis_columns, policy_hash
+from utils.shap_reason import get_top_reason_items_from_shap_row
+from utils.risk_types import (
+    KEYWORD_FAMILIES,
+    ReviewSignals,
+    build_review_signals,
+    classify_review_batch,
+    risk_type_display,
+)
+
+REVIEW_TABLE_SCHEMA = 1
+META_KEY = b"hcis_review_table"
+GROUP_COL_PREFIX = "grp__"
+KW_COL_PREFIX = "kw__"
+
+# 화면/시뮬레이션에 필요한 기본 컬럼 (있으면 원본에서 그대로 복사)
+PASSTHROUGH_COLS = ("target", "amt_credit", "amt_annuity", "app_payment_rate")
+BASE_COLS = [ID_COL, "hcis_score", "margin_score", "pd_hat", "top_reasons"]
+DEFAULT_CLASS_COLS = ["risk_type_key", "dominant_group", "credit_pct", "docs_pct", "capacity_pct", "emp_pct"]
+
+
+def review_table_key(data_version: str, policy: Optional[str] = None) -> str:
+    raw = json.dumps(
+        {"data_version": data_version, "policy": policy or policy_hash(), "schema": REVIEW_TABLE_SCHEMA},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def review_table_path(data_version: str, policy: Optional[str] = None, *, table_dir: Path = REVIEW_TABLE_DIR) -> Path:
+    return Path(table_dir) / f"review_{review_table_key(data_version, policy)}.parquet"
+
+
+# -----------------------------------------------------------
+# 생성 (점수 산출 시점)
+# -----------------------------------------------------------
+def _top_reasons_text(df: pd.DataFrame, map_dict) -> List[str]:
+    """UI용 top reasons (간단 문장 10개, ' / '로 연결)"""
+    reasons = []
+    for _, row_series in df.iterrows():
+        items = get_top_reason_items_from_shap_row(
+            row_series,
+            map_dict,
+            top_k=TOP_N,
+            top_features_col="shap_features",
+            top_values_col="shap_values",
+            only_risk_positive=True,
+        )
+        reasons.append(" / ".join([it["text"] for it in items]) if items else "")
+    return reasons
+
+
+def build_review_table(df: pd.DataFrame, map_dict, *, keyword_table=None) -> pd.DataFrame:
+    """
+    전체 결과 df → 추가검토 고객 테이블 (행 순서 = 원본 내 추가검토 행 순서, 0..n-1 인덱스)
+    """
+    if ("hcis_score" not in df.columns) or ("band" not in df.columns):
+        df = compute_hcis_columns(df, pd_col="pd_hat")
+    review = df[df["band"] == "추가검토"].reset_index(drop=True)
+
+    # payload와 동일한 정책(클리핑/컷오프)으로 점수/마진 재계산
+    scored = compute_hcis_columns(review[[ID_COL, "pd_hat"]], pd_col="pd_hat")
+    out = pd.DataFrame({
+        ID_COL: review[ID_COL].astype(str),
+        "hcis_score": scored["hcis_score"].astype(float),
+        "margin_score": scored["margin_score"].astype(float),
+        "pd_hat": scored["pd_hat"].astype(float).clip(lower=PD_FLOOR, upper=PD_CEIL),
+        "top_reasons": _top_reasons_text(review, map_dict),
+    })
+    for c in PASSTHROUGH_COLS:
+        if c in review.columns:
+            out[c] = review[c].to_numpy()
+
+    signals = build_review_signals(
+        review,
+        map_dict,
+        top_features_col="shap_features",
+        top_values_col="shap_values",
+        top_n=TOP_N,
+        keyword_table=keyword_table,
+    )
+    for g in signals.group_pct.columns:
+        out[f"{GROUP_COL_PREFIX}{g}"] = signals.group_pct[g].to_numpy(dtype=float)
+    for j, fam in enumerate(KEYWORD_FAMILIES):
+        out[f"{KW_COL_PREFIX}{fam}"] = signals.kw_counts[:, j].astype(np.int16)
+    out["pos_credit_cnt"] = np.asarray(signals.pos_credit_cnt, dtype=np.int16)
+
+    res = classify_review_batch(signals)
+    out["risk_type_key"] = res.keys
+    out["dominant_group"] = res.dominant_group()
+    out["credit_pct"] = res.credit_pct
+    out["docs_pct"] = res.docs_pct
+    out["capacity_pct"] = res.capacity_pct
+    out["emp_pct"] = res.emp_pct
+    return out
+
+
+def write_review_table(
+    df: pd.DataFrame,
+    data_version: str,
+    map_dict,
+    *,
+    keyword_table=None,
+    policy: Optional[str] = None,
+    table_dir: Path = REVIEW_TABLE_DIR,
+) -> Path:
+    """build_review_table 결과를 (data_version, policy) 키 파일로 저장. 오래된 파일은 REVIEW_TABLE_KEEP개만 유지"""
+    table = build_review_table(df, map_dict, keyword_table=keyword_table)
+    path = review_table_path(data_version, policy, table_dir=table_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    at = pa.Table.from_pandas(table, preserve_index=False)
+    meta = dict(at.schema.metadata or {})
+    meta[META_KEY] = json.dumps({
+        "data_version": data_version,
+        "policy": policy or policy_hash(),
+        "schema": REVIEW_TABLE_SCHEMA,
+        "total_rows": int(len(df)),
+        "review_rows": int(len(table)),
+    }).encode("utf-8")
+    tmp = path.with_suffix(".tmp")
+    pq.write_table(at.replace_schema_metadata(meta), tmp)
+    tmp.replace(path)
+
+    _prune(Path(table_dir), keep=path)
+    return path
+
+
+def _prune(table_dir: Path, keep: Path) -> None:
+    try:
+        files = sorted(table_dir.glob("review_*.parquet"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for p in files[REVIEW_TABLE_KEEP:]:
+            if p != keep:
+                p.unlink()
+    except Exception:
+        pass  # 정리 실패는 무시 (다음 저장 때 다시 시도)
+
+
+# -----------------------------------------------------------
+# 조회 (추가검토 페이지)
+# -----------------------------------------------------------
+def review_table_meta(path: Path) -> Dict:
+    """파일 메타데이터(전체 고객 수 등)만 읽음"""
+    meta = pq.read_schema(path).metadata or {}
+    raw = meta.get(META_KEY)
+    return json.loads(raw) if raw else {}
+
+
+def review_table_columns(path: Path) -> List[str]:
+    return list(pq.read_schema(path).names)
+
+
+def load_review_table(path: Path, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """필요한 컬럼만 읽기 (없는 컬럼은 무시)"""
+    if columns is not None:
+        available = set(review_table_columns(path))
+        columns = [c for c in columns if c in available]
+    return pq.read_table(path, columns=columns).to_pandas()
+
+
+def signal_columns(columns: Sequence[str]) -> List[str]:
+    return [c for c in columns if c.startswith((GROUP_COL_PREFIX, KW_COL_PREFIX))] + (
+        ["pos_credit_cnt"] if "pos_credit_cnt" in columns else []
+    )
+
+
+def signals_from_table(table: pd.DataFrame) -> ReviewSignals:
+    """저장된 grp__*/kw__*/pos_credit_cnt 컬럼 → ReviewSignals"""
+    gcols = [c for c in table.columns if c.startswith(GROUP_COL_PREFIX)]
+    group_pct = table[gcols].astype(float).reset_index(drop=True)
+    group_pct.columns = [c[len(GROUP_COL_PREFIX):] for c in gcols]
+    kw_counts = np.column_stack([
+        table[f"{KW_COL_PREFIX}{fam}"].to_numpy(dtype=np.int64) if f"{KW_COL_PREFIX}{fam}" in table.columns
+        else np.zeros(len(table), dtype=np.int64)
+        for fam in KEYWORD_FAMILIES
+    ]) if len(table) else np.zeros((0, len(KEYWORD_FAMILIES)), dtype=np.int64)
+    return ReviewSignals(
+        group_pct=group_pct,
+        kw_counts=kw_counts,
+        pos_credit_cnt=table["pos_credit_cnt"].to_numpy(dtype=np.int64),
+    )
+
+
+def ensure_review_table(
+    data_path: Path,
+    data_version: str,
+    map_dict,
+    *,
+    keyword_table=None,
+    policy: Optional[str] = None,
+    table_dir: Path = REVIEW_TABLE_DIR,
+) -> Path:
+    """사이드카가 있으면 경로만 반환, 없으면(기본 샘플/이전 버전 파일) 원본을 읽어 한 번 생성"""
+    path = review_table_path(data_version, policy, table_dir=table_dir)
+    if path.exists():
+        try:
+            if review_table_meta(path).get("schema") == REVIEW_TABLE_SCHEMA:
+                return path
+        except Exception:
+            pass  # 손상 파일은 다시 생성
+    df = pd.read_parquet(data_path)
+    df[ID_COL] = df[ID_COL].astype(str)
+    return write_review_table(df, data_version, map_dict, keyword_table=keyword_table, policy=policy, table_dir=table_dir)
+
+
+# -----------------------------------------------------------
+# 서버측 페이지 조회 (추가검토 후보 표)
+# -----------------------------------------------------------
+REVIEW_SORT_COLUMNS = ("margin_score", "pd_hat", "hcis_score", "risk_type")
+DISPLAY_COLS = [ID_COL, "hcis_score", "margin_score", "pd_hat", "top_reasons"]
+
+
+@dataclass
+class ReviewPage:
+    rows: pd.DataFrame        # 이번 페이지 행만 (risk_type_key/risk_type/dominant_group 포함, 인덱스 = 테이블 행 위치)
+    total: int                # 필터 결과 전체 건수
+    page: int                 # 0부터
+    n_pages: int
+
+
+class ReviewTablePager:
+    """
+    추가검토 테이블(pyarrow 컬럼 저장소) 위의 필터/정렬/페이지 조회.
+    - 필터·정렬은 숫자 컬럼 numpy 배열과 인덱스로만 처리
+    - 표시 컬럼(사유 문구 등)은 선택된 페이지 행만 take → pandas 변환 → 화면에는 한 페이지만 전달
+    - 분류 결과(keys)는 임계값마다 달라지므로 조회 때 인자로 받음
+    """
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+        self._num = {
+            c: table.column(c).to_numpy(zero_copy_only=False).astype(float)
+            for c in ("margin_score", "pd_hat", "hcis_score") if c in table.column_names
+        }
+
+    @classmethod
+    def from_path(cls, path: Path, columns: Sequence[str] = DISPLAY_COLS) -> "ReviewTablePager":
+        available = set(review_table_columns(path))
+        return cls(pq.read_table(path, columns=[c for c in columns if c in available]))
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def value_range(self, col: str) -> Tuple[float, float]:
+        v = self._num.get(col)
+        if v is None or not np.isfinite(v).any():
+            return float("nan"), float("nan")
+        return float(np.nanmin(v)), float(np.nanmax(v))
+
+    def select(
+        self,
+        keys: np.ndarray,
+        *,
+        types: Optional[Sequence[str]] = None,
+        hcis_range: Optional[Tuple[float, float]] = None,
+        margin_range: Optional[Tuple[float, float]] = None,
+        sort_by: str = "margin_score",
+        descending: bool = True,
+    ) -> np.ndarray:
+        """
+        필터 + 정렬 → 테이블 행 위치 배열.
+        keys: 행별 risk_type_key (테이블 행 순서). types: 포함할 risk_type_key 목록(None/빈 값이면 전체)
+        """
+        keys = np.asarray(keys, dtype=object)
+        mask = np.ones(len(self), dtype=bool)
+        if types:
+            mask &= np.isin(keys, list(types))
+        for col, rng in (("hcis_score", hcis_range), ("margin_score", margin_range)):
+            if rng is not None and col in self._num:
+                v = self._num[col]
+                mask &= (v >= rng[0]) & (v <= rng[1])
+        idx = np.flatnonzero(mask)
+
+        # 정렬: NaN은 항상 뒤로, 타입 정렬은 타입 안에서 마진 큰 순
+        if sort_by == "risk_type":
+            names = np.array([risk_type_display(k) for k in keys[idx]], dtype=object)
+            _, codes = np.unique(names.astype(str), return_inverse=True)
+            if descending:
+                codes = codes.max(initial=0) - codes
+            margin = np.nan_to_num(self._num.get("margin_score", np.zeros(len(self)))[idx], nan=-np.inf)
+            idx = idx[np.lexsort((-margin, codes))]
+        elif sort_by in self._num:
+            v = self._num[sort_by][idx]
+            order = np.argsort(np.where(np.isnan(v), np.inf, -v if descending else v), kind="stable")
+            idx = idx[order]
+        return idx
+
+    def page(
+        self,
+        idx: np.ndarray,
+        keys: np.ndarray,
+        *,
+        page: int = 0,
+        page_size: int = 50,
+        dominant_group: Optional[np.ndarray] = None,
+    ) -> ReviewPage:
+        """select 결과에서 한 페이지만 꺼냄. page가 범위를 넘으면 마지막 페이지"""
+        keys = np.asarray(keys, dtype=object)
+        page_size = max(1, int(page_size))
+        total = len(idx)
+        n_pages = max(1, -(-total // page_size))
+        page = min(max(0, int(page)), n_pages - 1)
+        sel = np.asarray(idx[page * page_size:(page + 1) * page_size], dtype=np.int64)
+
+        rows = self.table.take(pa.array(sel, type=pa.int64())).to_pandas()
+        rows.index = sel
+        rows["risk_type_key"] = keys[sel]
+        rows["risk_type"] = [risk_type_display(k) for k in keys[sel]]
+        if dominant_group is not None:
+            rows["dominant_group"] = np.asarray(dominant_group, dtype=object)[sel]
+        return ReviewPage(rows=rows, total=total, page=page, n_pages=n_pages)
+
+    def query(self, keys: np.ndarray, *, page: int = 0, page_size: int = 50, dominant_group=None, **filters) -> ReviewPage:
+        """select + page 한 번에"""
+        idx = self.select(keys, **filters)
+        return self.page(idx, keys, page=page, page_size=page_size, dominant_group=dominant_group)
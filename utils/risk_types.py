@@ -1,8 +1,17 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+import pandas as pd
+
+from utils.hcis_core import (
+    SUPER_GROUPS,
+    GROUP_PCT_PREFIX,
+    group_pct_columns,
+    _coerce_listlike,
+)
 
 
 @dataclass(frozen=True)
@@ -249,6 +258,277 @@ def classify_review_payload(
     return rt, debug
 
 
+# ------------------------------------------------------------
+# Batch classification (추가검토 구간 전체를 한 번에)
+# - classify_review_payload와 동일한 규칙을 (n,) 불리언 마스크로 적용
+# - 입력: (n, groups) 그룹 비중 행렬 + feature별 키워드 비트마스크로 만든 히트 수
+# ------------------------------------------------------------
+
+# 키워드 family 순서 = 비트 순서 (bit0=DOCS, bit1=SPENDING, bit2=CAPACITY, bit3=EMP)
+KEYWORD_FAMILIES: Tuple[str, ...] = ("DOCS", "SPENDING", "CAPACITY", "EMP")
+
+RULE_ORDER: Tuple[str, ...] = (
+    "TYPE1_STRUCTURAL_CREDIT",
+    "TYPE2_DOCS_UNCERTAINTY",
+    "TYPE3_SPENDING_IMBALANCE",
+    "TYPE4_EMPLOYMENT_LIFECYCLE",
+)
+DEFAULT_RISK_TYPE = "TYPE5_MIXED"
+
+
+def feature_keyword_mask(feature: Any) -> int:
+    """feature명 1개 -> 키워드 family 비트마스크 (_count_keyword_hits와 같은 부분문자열 규칙)"""
+    if feature is None:
+        return 0
+    ff = str(feature).lower()
+    mask = 0
+    for bit, fam in enumerate(KEYWORD_FAMILIES):
+        if any(k in ff for k in FEATURE_KEYWORDS[fam]):
+            mask |= 1 << bit
+    return mask
+
+
+def keyword_hit_counts(mask_matrix: np.ndarray) -> np.ndarray:
+    """(n, k) feature 비트마스크 -> (n, 4) family별 히트 수"""
+    m = np.asarray(mask_matrix, dtype=np.uint8)
+    bits = (1 << np.arange(len(KEYWORD_FAMILIES), dtype=np.uint8))
+    return ((m[:, :, None] & bits) != 0).sum(axis=1).astype(np.int32)
+
+
+@dataclass(frozen=True)
+class FeatureKeywordTable:
+    """모델 feature 어휘 -> 4비트 키워드 family 마스크 (아티팩트 로드 시 1회 생성).
+
+    - vocab: feature명 -> index
+    - masks: (F,) uint8, masks[i] = feature_keyword_mask(feature i)
+    """
+    vocab: Dict[str, int]
+    masks: np.ndarray
+
+    @classmethod
+    def from_features(cls, feature_names) -> "FeatureKeywordTable":
+        names = [str(f) for f in feature_names]
+        vocab = {f: i for i, f in enumerate(dict.fromkeys(names))}
+        masks = np.array([feature_keyword_mask(f) for f in vocab], dtype=np.uint8)
+        return cls(vocab=vocab, masks=masks)
+
+    def extended(self, feature_names) -> "FeatureKeywordTable":
+        """어휘에 없는 feature(예: 구버전 아티팩트 산출물)를 뒤에 덧붙인 테이블"""
+        missing = [str(f) for f in dict.fromkeys(feature_names) if str(f) not in self.vocab]
+        if not missing:
+            return self
+        vocab = dict(self.vocab)
+        for f in missing:
+            vocab[f] = len(vocab)
+        extra = np.array([feature_keyword_mask(f) for f in missing], dtype=np.uint8)
+        return FeatureKeywordTable(vocab=vocab, masks=np.concatenate([self.masks, extra]))
+
+    def hit_counts(self, index_matrix: np.ndarray) -> np.ndarray:
+        """(n, k) top-N feature index 행렬(-1=빈칸) -> (n, 4) 히트 수 (bitwise-and + 행 합)"""
+        padded = np.append(self.masks, np.uint8(0))   # -1 -> 마지막 0
+        return keyword_hit_counts(padded[np.asarray(index_matrix)])
+
+
+@dataclass
+class ReviewSignals:
+    """배치 분류 입력.
+
+    - group_pct: (n, G) 그룹별 비중(%) / 컬럼 = super_group 이름
+    - kw_counts: (n, 4) KEYWORD_FAMILIES 순서의 키워드 히트 수
+    - pos_credit_cnt: (n,) 신용 그룹 내 위험↑(shap>0) driver 수
+    """
+    group_pct: pd.DataFrame
+    kw_counts: np.ndarray
+    pos_credit_cnt: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.group_pct)
+
+
+def shap_topn_matrices(
+    df: pd.DataFrame,
+    *,
+    top_features_col: str = "shap_features",
+    top_values_col: str = "shap_values",
+    top_n: int = 10,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """list 컬럼(shap_features/shap_values) -> |SHAP| 내림차순 (n, top_n) 행렬.
+
+    반환: feats (object, 빈칸 None), vals (float, 빈칸 NaN)
+    """
+    n = len(df)
+    feats = np.full((n, top_n), None, dtype=object)
+    vals = np.full((n, top_n), np.nan, dtype=float)
+
+    if top_features_col not in df.columns or top_values_col not in df.columns:
+        return feats, vals
+
+    for i, (fr, vr) in enumerate(zip(df[top_features_col].to_numpy(), df[top_values_col].to_numpy())):
+        f = _coerce_listlike(fr)
+        v = _coerce_listlike(vr)
+        if not f or not v or len(f) != len(v):
+            continue
+        try:
+            v_arr = np.asarray(v, dtype=float)
+        except Exception:
+            continue
+        order = np.argsort(-np.abs(v_arr), kind="stable")[:top_n]
+        feats[i, :len(order)] = [str(f[j]) for j in order]
+        vals[i, :len(order)] = v_arr[order]
+
+    return feats, vals
+
+
+def build_review_signals(
+    df: pd.DataFrame,
+    map_dict: Dict[str, Dict[str, str]],
+    *,
+    top_features_col: str = "shap_features",
+    top_values_col: str = "shap_values",
+    top_n: int = 10,
+    keyword_table: Optional[FeatureKeywordTable] = None,
+) -> ReviewSignals:
+    """추가검토 df -> ReviewSignals (payload 생성 없이 벡터 연산으로).
+
+    - 그룹 비중: 업로드 시 저장된 grp_pct__* 컬럼이 있으면 그대로, 없으면 top_n SHAP 기준
+    - keyword_table: 아티팩트 feature 어휘로 미리 만든 비트마스크 테이블
+      (없거나 어휘 밖 feature가 있으면 해당 feature만 즉석 계산해 덧붙임)
+    """
+    feats, vals = shap_topn_matrices(
+        df, top_features_col=top_features_col, top_values_col=top_values_col, top_n=top_n
+    )
+    n, k = feats.shape
+
+    # feature -> 정수 코드 (고유값만 한 번씩 조회)
+    flat = np.array(["" if f is None else f for f in feats.ravel()], dtype=object)
+    uniq, inv = np.unique(flat.astype(str), return_inverse=True)
+    inv = inv.reshape(n, k)
+    valid = ~np.isnan(vals)
+
+    # feature -> super_group index
+    g_idx = {g: i for i, g in enumerate(SUPER_GROUPS)}
+    fallback = g_idx["서류/운영"]
+    lut_group = np.array(
+        [g_idx.get(map_dict.get(f, {}).get("super_group", "서류/운영"), fallback) for f in uniq],
+        dtype=np.int64,
+    )
+    gmat = lut_group[inv]
+
+    # (1) 그룹 비중
+    full_cols = group_pct_columns(df)
+    if full_cols:
+        group_pct = df[full_cols].astype(float).round(2).reset_index(drop=True)
+        group_pct.columns = [c[len(GROUP_PCT_PREFIX):] for c in full_cols]
+    else:
+        absv = np.where(valid, np.abs(vals), 0.0)
+        G = len(SUPER_GROUPS)
+        flat_idx = (np.arange(n)[:, None] * G + gmat).ravel()
+        contrib = np.bincount(flat_idx, weights=absv.ravel(), minlength=n * G).reshape(n, G)
+        total = absv.sum(axis=1, keepdims=True)
+        total[total == 0] = 1.0
+        group_pct = pd.DataFrame((contrib / total * 100).round(2), columns=list(SUPER_GROUPS))
+
+    # (2) top-N feature index 행렬 -> 키워드 히트 수
+    table = (keyword_table or FeatureKeywordTable.from_features([])).extended(f for f in uniq if f != "")
+    lut_idx = np.array([table.vocab.get(f, -1) for f in uniq], dtype=np.int64)
+    kw_counts = table.hit_counts(np.where(valid, lut_idx[inv], -1))
+
+    # (3) 신용 그룹 위험↑ driver 수
+    credit_codes = [g_idx[g] for g in SUPER_GROUPS if g in GROUP_ALIASES["CREDIT"]]
+    pos_credit_cnt = (np.isin(gmat, credit_codes) & valid & (np.nan_to_num(vals) > 0)).sum(axis=1)
+
+    return ReviewSignals(group_pct=group_pct, kw_counts=kw_counts, pos_credit_cnt=pos_credit_cnt)
+
+
+def _axis_pct(group_pct: pd.DataFrame, alias: set) -> np.ndarray:
+    cols = [c for c in group_pct.columns if c in alias]
+    if not cols:
+        return np.zeros(len(group_pct), dtype=float)
+    return group_pct[cols].to_numpy(dtype=float).max(axis=1)
+
+
+@dataclass
+class ReviewBatchResult:
+    """배치 분류 결과. 고객별 debug dict는 debug(i) 호출 시에만 만든다."""
+    keys: np.ndarray
+    credit_pct: np.ndarray
+    docs_pct: np.ndarray
+    capacity_pct: np.ndarray
+    emp_pct: np.ndarray
+    signals: ReviewSignals = field(repr=False)
+
+    def dominant_group(self) -> np.ndarray:
+        gp = self.signals.group_pct
+        arr = gp.to_numpy(dtype=float)
+        if arr.shape[1] == 0:
+            return np.full(len(gp), None, dtype=object)
+        top = np.asarray(gp.columns, dtype=object)[arr.argmax(axis=1)]
+        return np.where(arr.max(axis=1) > 0, top, None)
+
+    def debug(self, i: int) -> Dict[str, Any]:
+        """classify_review_payload의 debug dict와 같은 형식"""
+        row = self.signals.group_pct.iloc[i]
+        row = row[row > 0]
+        dom_g = str(row.idxmax()) if len(row) else None
+        kw = self.signals.kw_counts[i]
+        return {
+            "dominant_group": dom_g,
+            "dominant_pct": float(row.max()) if dom_g is not None else None,
+            "credit_pct": float(self.credit_pct[i]),
+            "docs_pct": float(self.docs_pct[i]),
+            "capacity_pct": float(self.capacity_pct[i]),
+            "emp_pct": float(self.emp_pct[i]),
+            "kw_docs": int(kw[KEYWORD_FAMILIES.index("DOCS")]),
+            "kw_spending": int(kw[KEYWORD_FAMILIES.index("SPENDING")]),
+            "kw_capacity": int(kw[KEYWORD_FAMILIES.index("CAPACITY")]),
+            "kw_emp": int(kw[KEYWORD_FAMILIES.index("EMP")]),
+            "pos_credit_cnt": int(self.signals.pos_credit_cnt[i]),
+        }
+
+
+def classify_review_batch(
+    signals: ReviewSignals,
+    *,
+    credit_dom_threshold: float = 45.0,
+    docs_dom_threshold: float = 30.0,
+    emp_dom_threshold: float = 25.0,
+    capacity_dom_threshold: float = 35.0,
+) -> ReviewBatchResult:
+    """classify_review_payload의 TYPE1~TYPE5 규칙을 벡터 마스크로 적용.
+
+    신호 계산(build_review_signals)과 분리되어 있어, 임계값만 바꿔 재분류하는 비용은 O(n) 비교 몇 번.
+    """
+    gp = signals.group_pct
+    credit_p = _axis_pct(gp, GROUP_ALIASES["CREDIT"])
+    docs_p = _axis_pct(gp, GROUP_ALIASES["DOCS"])
+    emp_p = _axis_pct(gp, GROUP_ALIASES["EMP"])
+    cap_p = _axis_pct(gp, GROUP_ALIASES["CAPACITY"])
+
+    kw = signals.kw_counts
+    kw_docs = kw[:, KEYWORD_FAMILIES.index("DOCS")]
+    kw_spend = kw[:, KEYWORD_FAMILIES.index("SPENDING")]
+    kw_cap = kw[:, KEYWORD_FAMILIES.index("CAPACITY")]
+    kw_emp = kw[:, KEYWORD_FAMILIES.index("EMP")]
+
+    conds = [
+        (credit_p >= credit_dom_threshold) & (signals.pos_credit_cnt >= 2),     # Rule 1
+        (docs_p >= docs_dom_threshold) | (kw_docs >= 2),                        # Rule 2
+        (cap_p >= capacity_dom_threshold) | (kw_spend >= 2) | (kw_cap >= 3),    # Rule 3
+        (emp_p >= emp_dom_threshold) | (kw_emp >= 2),                           # Rule 4
+    ]
+    # np.select는 앞선 조건이 우선 → if/elif 체인과 동일
+    keys = np.select(conds, list(RULE_ORDER), default=DEFAULT_RISK_TYPE).astype(object)
+
+    return ReviewBatchResult(
+        keys=keys,
+        credit_pct=credit_p,
+        docs_pct=docs_p,
+        capacity_pct=cap_p,
+        emp_pct=emp_p,
+        signals=signals,
+    )
+
+
 def risk_type_display(rt_key: str) -> str:
     spec = RISK_TYPES.get(rt_key)
     return spec.name if spec else rt_key
@@ -0,0 +1,226 @@
+"""
+포트폴리오 스트레스 테스트 (PD 충격 시나리오)
+
+- 시나리오 = 고객 세그먼트(리스크 타입 또는 super_group)별 PD 배수 / logit 이동
+    stressed_pd = sigmoid( logit(clip(pd * multiplier, PD_FLOOR, PD_CEIL)) + logit_shift )
+- 충격 PD → HCIS 점수/밴드는 hcis_core.hcis_score_array / compute_hcis_columns와 동일 규칙으로 재산출
+- (시나리오 S, 고객 n) 행렬로 한 번에 계산, 시나리오가 많으면 chunk_elems 단위로 분할
+- 리포트: 밴드 이동(3x3), 기대손실(EL) 변화, 소요자본(바젤 소매 IRB K) 변화
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+from config import T_LOW, T_HIGH, PD_FLOOR, PD_CEIL, KPI_LGD, KPI_DEFAULT_EAD
+from utils.hcis_core import hcis_score_array, SUPER_GROUPS
+from utils.risk_types import build_review_signals, classify_review_batch, RULE_ORDER, DEFAULT_RISK_TYPE
+
+BAND_LABELS = ["거절", "추가검토", "승인"]   # 밴드 코드 0/1/2
+UNKNOWN_SEGMENT = "unknown"                 # SHAP 기여도가 없어(전부 0/NaN) 지배 그룹을 정할 수 없는 고객
+
+
+@dataclass
+class StressScenario:
+    """
+    PD 충격 시나리오.
+    - pd_multiplier / logit_shift: 전체 고객 공통 충격
+    - segment_multipliers / segment_shifts: 세그먼트별 충격(지정된 세그먼트는 공통값 대신 사용)
+    """
+    name: str
+    pd_multiplier: float = 1.0
+    logit_shift: float = 0.0
+    segment_multipliers: Dict[str, float] = field(default_factory=dict)
+    segment_shifts: Dict[str, float] = field(default_factory=dict)
+
+
+@dataclass
+class StressResult:
+    summary: pd.DataFrame          # 시나리오별 요약 (baseline 행 포함)
+    migration: np.ndarray          # (S, 3, 3) 기준 밴드 → 충격 밴드 고객 수
+    scenario_names: List[str]
+
+    def migration_frame(self, i: int) -> pd.DataFrame:
+        """시나리오 i의 밴드 이동 행렬 (행: 기준 밴드, 열: 충격 후 밴드)"""
+        return pd.DataFrame(self.migration[i], index=BAND_LABELS, columns=BAND_LABELS)
+
+
+def band_codes(score: np.ndarray, t_low: float = T_LOW, t_high: float = T_HIGH) -> np.ndarray:
+    """hcis_band_array와 같은 규칙의 정수 코드(0=거절, 1=추가검토, 2=승인; NaN은 승인)"""
+    s = np.asarray(score, dtype=float)
+    return (2 - (s < t_high).astype(np.int8) - (s < t_low).astype(np.int8)).astype(np.int8)
+
+
+def retail_capital_k(pd_arr: np.ndarray, lgd: float) -> np.ndarray:
+    """바젤 IRB 기타 소매 익스포저 소요자본율 K (EAD 대비)"""
+    p = np.clip(np.asarray(pd_arr, dtype=float), 0.0003, 0.999999)   # 소매 PD 하한 0.03%
+    w = (1 - np.exp(-35 * p)) / (1 - np.exp(-35))
+    r = 0.03 * w + 0.16 * (1 - w)
+    z = (ndtri(p) + np.sqrt(r) * ndtri(0.999)) / np.sqrt(1 - r)
+    return np.maximum(lgd * (ndtr(z) - p), 0.0)
+
+
+def customer_segments(
+    df: pd.DataFrame,
+    map_dict: Dict[str, Dict[str, str]],
+    *,
+    by: str = "super_group",
+    keyword_table=None,
+) -> np.ndarray:
+    """
+    고객별 세그먼트 라벨.
+    - by="super_group": SHAP 기여도(grp_pct__ 또는 top-N) 기준 지배 super_group
+                        (기여도가 전부 0/NaN이면 UNKNOWN_SEGMENT → 세그먼트 시나리오 없이 공통 충격만 적용)
+    - by="risk_type"  : 추가검토 리스크 타입 규칙(classify_review_batch)을 전체 고객에 적용
+    """
+    signals = build_review_signals(df, map_dict, keyword_table=keyword_table)
+    if by == "super_group":
+        gp = signals.group_pct.reindex(columns=SUPER_GROUPS, fill_value=0.0).to_numpy(dtype=float)
+        gp = np.nan_to_num(gp, nan=0.0)
+        seg = np.asarray(SUPER_GROUPS, dtype=object)[gp.argmax(axis=1)]
+        seg[~(gp > 0).any(axis=1)] = UNKNOWN_SEGMENT
+        return seg
+    if by == "risk_type":
+        return classify_review_batch(signals).keys
+    raise ValueError(f"지원하지 않는 세그먼트 기준: {by}")
+
+
+def _scenario_matrices(scenarios: Sequence[StressScenario], seg_labels: List[str]):
+    """(S, G+1) 배수/이동 테이블. 마지막 열은 세그먼트 미지정 고객용"""
+    S, G = len(scenarios), len(seg_labels)
+    mult = np.ones((S, G + 1), dtype=float)
+    shift = np.zeros((S, G + 1), dtype=float)
+    for i, sc in enumerate(scenarios):
+        mult[i, :] = sc.pd_multiplier
+        shift[i, :] = sc.logit_shift
+        for j, g in enumerate(seg_labels):
+            if g in sc.segment_multipliers:
+                mult[i, j] = sc.segment_multipliers[g]
+            if g in sc.segment_shifts:
+                shift[i, j] = sc.segment_shifts[g]
+    return mult, shift
+
+
+def run_stress_test(
+    pd_hat,
+    scenarios: Sequence[StressScenario],
+    *,
+    segments: Optional[np.ndarray] = None,
+    ead: Optional[np.ndarray] = None,
+    lgd: float = KPI_LGD,
+    t_low: float = T_LOW,
+    t_high: float = T_HIGH,
+    chunk_elems: int = 8_000_000,
+) -> StressResult:
+    """
+    pd_hat(n,)에 시나리오별 충격을 적용해 밴드 이동 / EL / 소요자본 변화를 요약.
+    - segments: 고객별 세그먼트 라벨(n,). None이면 공통 충격만 적용
+    - ead: 고객별 EAD(n,). None이면 KPI_DEFAULT_EAD
+    PD가 NaN인 고객은 계산에서 제외.
+    """
+    pd_all = np.asarray(pd_hat, dtype=float)
+    valid = np.isfinite(pd_all)
+    base_pd = np.clip(pd_all[valid], PD_FLOOR, PD_CEIL)
+    n = base_pd.size
+
+    ead = np.full(n, KPI_DEFAULT_EAD) if ead is None else np.asarray(ead, dtype=float)[valid]
+
+    if segments is None:
+        seg_labels: List[str] = []
+        seg_codes = np.zeros(n, dtype=np.int64)
+    else:
+        seg = np.asarray(segments, dtype=object)[valid]
+        seg_labels = sorted({s for s in seg if s is not None and s == s})
+        lut = {g: i for i, g in enumerate(seg_labels)}
+        seg_codes = np.array([lut.get(s, len(seg_labels)) for s in seg], dtype=np.int64)
+
+    scenarios = list(scenarios)
+    mult_tab, shift_tab = _scenario_matrices(scenarios, seg_labels)
+
+    # 기준선
+    base_code = band_codes(hcis_score_array(base_pd), t_low, t_high)
+    base_el = float(base_pd @ ead) * lgd
+    base_cap = float(retail_capital_k(base_pd, lgd) @ ead)
+
+    S = len(scenarios)
+    migration = np.zeros((S, 3, 3), dtype=np.int64)
+    el = np.zeros(S)
+    el_approved = np.zeros(S)
+    cap = np.zeros(S)
+    mean_pd = np.zeros(S)
+    band_n = np.zeros((S, 3), dtype=np.int64)
+
+    step = max(1, int(chunk_elems // max(n, 1)))
+    for s0 in range(0, S, step):
+        s1 = min(s0 + step, S)
+        m = mult_tab[s0:s1][:, seg_codes]          # (s, n)
+        sh = shift_tab[s0:s1][:, seg_codes]
+
+        p = np.clip(base_pd[None, :] * m, PD_FLOOR, PD_CEIL)
+        p = np.where(sh != 0, 1.0 / (1.0 + np.exp(-(np.log(p / (1 - p)) + sh))), p)
+        p = np.clip(p, PD_FLOOR, PD_CEIL)
+
+        code = band_codes(hcis_score_array(p), t_low, t_high)     # (s, n)
+        rows = np.arange(s1 - s0)[:, None]
+        flat = (rows * 9 + base_code[None, :] * 3 + code).ravel()
+        migration[s0:s1] = np.bincount(flat, minlength=(s1 - s0) * 9).reshape(-1, 3, 3)
+        band_n[s0:s1] = migration[s0:s1].sum(axis=1)
+
+        el[s0:s1] = (p @ ead) * lgd
+        el_approved[s0:s1] = ((p * (code == 2)) @ ead) * lgd
+        cap[s0:s1] = retail_capital_k(p, lgd) @ ead
+        mean_pd[s0:s1] = p.mean(axis=1) if n else np.nan
+
+    base_band_n = np.bincount(base_code, minlength=3)
+    base_el_approved = float((base_pd * (base_code == 2)) @ ead) * lgd
+
+    summary = pd.DataFrame({
+        "scenario": ["baseline"] + [sc.name for sc in scenarios],
+        "mean_pd": np.concatenate([[base_pd.mean() if n else np.nan], mean_pd]),
+        "n_approve": np.concatenate([[base_band_n[2]], band_n[:, 2]]),
+        "n_review": np.concatenate([[base_band_n[1]], band_n[:, 1]]),
+        "n_reject": np.concatenate([[base_band_n[0]], band_n[:, 0]]),
+        "approve_to_review": np.concatenate([[0], migration[:, 2, 1]]),
+        "approve_to_reject": np.concatenate([[0], migration[:, 2, 0]]),
+        "review_to_reject": np.concatenate([[0], migration[:, 1, 0]]),
+        "expected_loss": np.concatenate([[base_el], el]),
+        "expected_loss_approved": np.concatenate([[base_el_approved], el_approved]),
+        "capital_k": np.concatenate([[base_cap], cap]),
+    })
+    summary["el_delta"] = summary["expected_loss"] - base_el
+    summary["capital_delta"] = summary["capital_k"] - base_cap
+    summary["rwa"] = summary["capital_k"] * 12.5
+
+    base_mig = np.zeros((1, 3, 3), dtype=np.int64)
+    base_mig[0, np.arange(3), np.arange(3)] = base_band_n
+    return StressResult(
+        summary=summary,
+        migration=np.concatenate([base_mig, migration]),
+        scenario_names=["baseline"] + [sc.name for sc in scenarios],
+    )
+
+
+def default_scenarios(by: str = "super_group") -> List[StressScenario]:
+    """화면 기본 제공 시나리오 세트"""
+    out = [
+        StressScenario("PD x1.1", pd_multiplier=1.1),
+        StressScenario("PD x1.25", pd_multiplier=1.25),
+        StressScenario("PD x1.5", pd_multiplier=1.5),
+        StressScenario("logit +0.25", logit_shift=0.25),
+        StressScenario("logit +0.5", logit_shift=0.5),
+    ]
+    if by == "super_group":
+        out += [
+            StressScenario(f"{g} PD x1.5", segment_multipliers={g: 1.5})
+            for g in SUPER_GROUPS
+        ]
+    elif by == "risk_type":
+        out += [
+            StressScenario(f"{k} logit +0.5", segment_shifts={k: 0.5})
+            for k in list(RULE_ORDER) + [DEFAULT_RISK_TYPE]
+        ]
+    return out